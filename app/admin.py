@@ -0,0 +1,37 @@
+# app/admin.py
+# Acesso administrativo (perfis de requisição etc.): tokens JWT assinados com um segredo
+# próprio, ADMIN_SEGREDO, separado do SECRET_KEY dos usuários. Sem ADMIN_SEGREDO, nada
+# administrativo é aceito. Para gerar um token:
+#     python -c "from app.admin import gerar_token_admin; print(gerar_token_admin(60))"
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from jose import JWTError, jwt
+
+ADMIN_SEGREDO = os.getenv("ADMIN_SEGREDO", "")
+ALGORITHM = "HS256"
+
+
+def gerar_token_admin(minutos: int = 60) -> str:
+    if not ADMIN_SEGREDO:
+        raise RuntimeError("ADMIN_SEGREDO não definido.")
+    exp = datetime.now(timezone.utc) + timedelta(minutes=minutos)
+    return jwt.encode({"escopo": "admin", "exp": int(exp.timestamp())}, ADMIN_SEGREDO, algorithm=ALGORITHM)
+
+
+def token_admin_valido(token: Optional[str]) -> bool:
+    if not ADMIN_SEGREDO or not token:
+        return False
+    try:
+        payload = jwt.decode(token, ADMIN_SEGREDO, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("escopo") == "admin"
+
+
+async def exigir_admin(x_admin_token: Optional[str] = Header(None)):
+    # 404 em vez de 401/403: não anuncia que a rota existe
+    if not token_admin_valido(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -0,0 +1,36 @@
+# app/aquecimento.py
+# Aquecimento do pool: abre N conexões e roda nelas as consultas mais quentes,
+# para que o asyncpg já tenha os statements preparados (cache por conexão)
+# quando chegar a primeira requisição real.
+import asyncio
+import os
+
+from databases import Database
+
+from app.crud import usuario as usuario_crud
+from app.crud import post as post_crud
+from app.crud import like as like_crud
+from app.crud import versao as versao_crud
+
+DB_WARMUP_CONEXOES = int(os.getenv("DB_WARMUP_CONEXOES", os.getenv("DB_POOL_MIN", "2")))
+
+# id que não existe: as consultas rodam (e são preparadas) sem retornar nada
+_SENTINELA = 0
+
+
+async def _consultas_quentes(db: Database):
+    # __wrapped__: sem o single-flight, que rodaria a consulta em outra task/conexão
+    await usuario_crud.buscar_usuario_por_id.__wrapped__(db, _SENTINELA)
+    await versao_crud.marcas_usuario.__wrapped__(db, _SENTINELA)
+    await post_crud.get_posts_por_usuario.__wrapped__(db, _SENTINELA, limit=50)
+    await post_crud.get_feed(db, viewer_id=_SENTINELA, limit=50)
+    await like_crud.batch_resumo_like(db, _SENTINELA, [_SENTINELA])
+
+
+async def aquecer(db: Database, conexoes: int = DB_WARMUP_CONEXOES):
+    async def _uma():
+        # fixa uma conexão do pool nesta task; tasks concorrentes pegam conexões distintas
+        async with db.connection():
+            await _consultas_quentes(db)
+
+    await asyncio.gather(*(_uma() for _ in range(max(conexoes, 1))))
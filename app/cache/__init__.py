@@ -0,0 +1,2 @@
+# app/cache/__init__.py
+# Caches em memória do processo (uma instância por worker do uvicorn).
@@ -0,0 +1,139 @@
+# app/cache/grafo.py
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from databases import Database
+from sqlalchemy import select
+
+from app.models.seguir import seguir
+
+GRAFO_CACHE_MAX_BYTES = int(os.getenv("GRAFO_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Custo fixo estimado por entrada (chave + objeto array + nó do OrderedDict)
+_OVERHEAD = 160
+
+SEGUINDO = "seguindo"
+SEGUIDORES = "seguidores"
+
+
+class GrafoSeguir:
+    """
+    Cache do grafo de seguir: por usuário, arrays ordenados de int32 com
+    quem ele segue e quem o segue.
+        - Carregado sob demanda (uma query por lista).
+        - Atualizado por seguir_usuario / deixar_de_seguir (só listas já em cache).
+        - LRU limitado pelo total de bytes das listas.
+    """
+
+    def __init__(self, max_bytes: int = GRAFO_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[Tuple[str, int], array]" = OrderedDict()
+        self._bytes = 0
+        # muda a cada escrita; carga concorrente com escrita não é cacheada
+        self._geracao = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _tamanho(arr: array) -> int:
+        return _OVERHEAD + arr.itemsize * len(arr)
+
+    def _get(self, chave) -> Optional[array]:
+        arr = self._lru.get(chave)
+        if arr is not None:
+            self._lru.move_to_end(chave)
+        return arr
+
+    def _put(self, chave, arr: array):
+        antigo = self._lru.pop(chave, None)
+        if antigo is not None:
+            self._bytes -= self._tamanho(antigo)
+        self._lru[chave] = arr
+        self._bytes += self._tamanho(arr)
+        self._despejar()
+
+    def _despejar(self):
+        """Remove as listas menos usadas até caber em max_bytes (a mais recente sempre fica)."""
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            _, removido = self._lru.popitem(last=False)
+            self._bytes -= self._tamanho(removido)
+
+    async def _carregar(self, db: Database, direcao: str, usuario_id: int) -> array:
+        chave = (direcao, usuario_id)
+        arr = self._get(chave)
+        if arr is not None:
+            self.hits += 1
+            return arr
+        self.misses += 1
+
+        if direcao == SEGUINDO:
+            col, filtro = seguir.c.seguido_id, seguir.c.seguidor_id
+        else:
+            col, filtro = seguir.c.seguidor_id, seguir.c.seguido_id
+
+        geracao = self._geracao
+        rows = await db.fetch_all(select(col).where(filtro == usuario_id).order_by(col))
+        arr = array("i", (r[0] for r in rows))
+        if geracao == self._geracao:
+            self._put(chave, arr)
+        return arr
+
+    async def seguindo(self, db: Database, usuario_id: int) -> array:
+        """IDs que `usuario_id` segue (ordenados)."""
+        return await self._carregar(db, SEGUINDO, usuario_id)
+
+    async def seguidores(self, db: Database, usuario_id: int) -> array:
+        """IDs que seguem `usuario_id` (ordenados)."""
+        return await self._carregar(db, SEGUIDORES, usuario_id)
+
+    async def segue(self, db: Database, seguidor_id: int, seguido_id: int) -> bool:
+        arr = await self.seguindo(db, seguidor_id)
+        i = bisect_left(arr, seguido_id)
+        return i < len(arr) and arr[i] == seguido_id
+
+    def contagem(self, direcao: str, usuario_id: int) -> Optional[int]:
+        """Tamanho da lista se já estiver em cache (sem carregar)."""
+        arr = self._get((direcao, usuario_id))
+        return None if arr is None else len(arr)
+
+    # ---------- manutenção ----------
+    def _inserir(self, chave, valor: int):
+        arr = self._get(chave)
+        if arr is None:
+            return
+        i = bisect_left(arr, valor)
+        if i < len(arr) and arr[i] == valor:
+            return
+        arr.insert(i, valor)
+        self._bytes += arr.itemsize
+        self._despejar()
+
+    def _remover(self, chave, valor: int):
+        arr = self._get(chave)
+        if arr is None:
+            return
+        i = bisect_left(arr, valor)
+        if i < len(arr) and arr[i] == valor:
+            del arr[i]
+            self._bytes -= arr.itemsize
+
+    def adicionar_aresta(self, seguidor_id: int, seguido_id: int):
+        self._geracao += 1
+        self._inserir((SEGUINDO, seguidor_id), seguido_id)
+        self._inserir((SEGUIDORES, seguido_id), seguidor_id)
+
+    def remover_aresta(self, seguidor_id: int, seguido_id: int):
+        self._geracao += 1
+        self._remover((SEGUINDO, seguidor_id), seguido_id)
+        self._remover((SEGUIDORES, seguido_id), seguidor_id)
+
+    def limpar(self):
+        self._geracao += 1
+        self._lru.clear()
+        self._bytes = 0
+
+
+grafo = GrafoSeguir()
@@ -0,0 +1,151 @@
+# app/cache/singleflight.py
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from app import metricas
+
+SINGLEFLIGHT_TTL_MS = float(os.getenv("SINGLEFLIGHT_TTL_MS", "0"))
+SINGLEFLIGHT_MAX_ENTRADAS = int(os.getenv("SINGLEFLIGHT_MAX_ENTRADAS", "10000"))
+
+
+class _Grupo:
+    """
+    Estado de uma função coalescida:
+        - em_voo: chave -> task em execução (chamadas idênticas aguardam a mesma)
+        - cache:  chave -> (expira_em, resultado), só quando ttl_ms > 0
+    """
+
+    def __init__(self, nome: str, ttl_ms: float):
+        self.nome = nome
+        self.ttl_s = ttl_ms / 1000
+        self.em_voo: Dict[Tuple, asyncio.Task] = {}
+        self.cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self.chamadas = 0
+        self.executadas = 0
+        self.coalescidas = 0
+        self.cache_hits = 0
+
+    def ler_cache(self, chave):
+        item = self.cache.get(chave)
+        if item is None:
+            return False, None
+        expira, valor = item
+        if expira < time.monotonic():
+            del self.cache[chave]
+            return False, None
+        return True, valor
+
+    def gravar_cache(self, chave, valor):
+        if self.ttl_s <= 0:
+            return
+        self.cache[chave] = (time.monotonic() + self.ttl_s, valor)
+        self.cache.move_to_end(chave)
+        while len(self.cache) > SINGLEFLIGHT_MAX_ENTRADAS:
+            self.cache.popitem(last=False)
+
+    def invalidar(self, prefixo: Tuple):
+        n = len(prefixo)
+        for d in (self.em_voo, self.cache):
+            for chave in [c for c in d if c[:n] == prefixo]:
+                del d[chave]
+
+    def estado(self) -> dict:
+        return {
+            "chamadas": self.chamadas,
+            "executadas": self.executadas,
+            "coalescidas": self.coalescidas,
+            "cache_hits": self.cache_hits,
+            "em_voo": len(self.em_voo),
+        }
+
+
+_grupos: Dict[str, _Grupo] = {}
+
+
+def _chave(args: tuple, kwargs: dict) -> Tuple:
+    return args + tuple(sorted(kwargs.items()))
+
+
+def coalescer(ttl_ms: float = SINGLEFLIGHT_TTL_MS):
+    """
+    Decorator para funções de LEITURA do crud (`fn(db, *args, **kwargs)`):
+    chamadas concorrentes com os mesmos argumentos compartilham uma única
+    execução (e resultado/exceção). Com `ttl_ms > 0`, o resultado ainda é
+    reaproveitado por esse tempo (micro-TTL).
+
+    A execução roda numa task própria: se a requisição que a iniciou for
+    cancelada, as demais que aguardam não são afetadas.
+    """
+
+    def decorator(fn):
+        grupo = _Grupo(fn.__name__, ttl_ms)
+        _grupos[grupo.nome] = grupo
+
+        @functools.wraps(fn)
+        async def wrapper(db, *args, **kwargs):
+            chave = _chave(args, kwargs)
+            grupo.chamadas += 1
+
+            achou, valor = grupo.ler_cache(chave)
+            if achou:
+                grupo.cache_hits += 1
+                return valor
+
+            task = grupo.em_voo.get(chave)
+            if task is None:
+                grupo.executadas += 1
+                task = asyncio.ensure_future(fn(db, *args, **kwargs))
+                grupo.em_voo[chave] = task
+
+                def _fim(t, chave=chave):
+                    if grupo.em_voo.get(chave) is t:
+                        del grupo.em_voo[chave]
+                        if not t.cancelled() and t.exception() is None:
+                            grupo.gravar_cache(chave, t.result())
+
+                task.add_done_callback(_fim)
+            else:
+                grupo.coalescidas += 1
+                metricas.incrementar("singleflight.db_calls_economizadas")
+
+            return await asyncio.shield(task)
+
+        wrapper.invalidar = lambda *prefixo: grupo.invalidar(tuple(prefixo))
+        return wrapper
+
+    return decorator
+
+
+def ler(nome: str, *args):
+    """Consulta o micro-cache de `nome` sem executar nada. Retorna (achou, valor)."""
+    grupo = _grupos.get(nome)
+    if grupo is None:
+        return False, None
+    achou, valor = grupo.ler_cache(_chave(args, {}))
+    if achou:
+        grupo.cache_hits += 1
+    return achou, valor
+
+
+def gravar(nome: str, valor, *args):
+    """Alimenta o micro-cache de `nome` com um resultado obtido por outra via (ex.: lote)."""
+    grupo = _grupos.get(nome)
+    if grupo is not None:
+        grupo.gravar_cache(_chave(args, {}), valor)
+
+
+def invalidar(nome: str, *prefixo):
+    """
+    Descarta cache e execução em voo de `nome` cujos argumentos começam com `prefixo`
+    (ex.: invalidar("stats_usuario", 42)). Chamado pelos caminhos de escrita.
+    """
+    grupo = _grupos.get(nome)
+    if grupo is not None:
+        grupo.invalidar(tuple(prefixo))
+
+
+metricas.registrar_coletor("singleflight", lambda: {n: g.estado() for n, g in _grupos.items()})
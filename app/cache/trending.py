@@ -0,0 +1,40 @@
+# app/cache/trending.py
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from databases import Database
+
+from app.crud import trending as trending_crud
+
+TRENDING_K = int(os.getenv("TRENDING_K", "100"))
+
+
+class Trending:
+    """
+    Snapshot em memória do top-K de trending, trocado atomicamente a cada refresh
+    (worker em app/workers/trending.py). O endpoint só lê daqui.
+    """
+
+    def __init__(self, k: int = TRENDING_K):
+        self.k = k
+        self._itens: Optional[List[dict]] = None
+        self.atualizado_em: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def atualizar(self, db: Database):
+        itens = await trending_crud.top_k(db, self.k)
+        self._itens = itens
+        self.atualizado_em = time.monotonic()
+
+    async def listar(self, db: Database, limit: int) -> List[dict]:
+        if self._itens is None:
+            # primeiro acesso antes do worker rodar: preenche uma única vez
+            async with self._lock:
+                if self._itens is None:
+                    await self.atualizar(db)
+        return self._itens[:limit]
+
+
+trending = Trending()
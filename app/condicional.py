@@ -0,0 +1,55 @@
+# app/condicional.py
+# GET condicional: ETag forte a partir de marcas de versão (app/crud/versao.py) e 304
+# para If-None-Match sem rodar a consulta completa. Cache-Control deixa um cache HTTP
+# na frente absorver leituras repetidas.
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+CACHE_PUBLICO_MAX_AGE = int(os.getenv("CACHE_PUBLICO_MAX_AGE", "10"))
+
+# sufixos que a compressão acrescenta ao ETag (app/middleware/compressao.py)
+_SUFIXOS_CODIFICACAO = ("-gzip", "-br", "-zstd")
+
+
+def etag(*partes) -> str:
+    bruto = "|".join(str(p) for p in partes).encode()
+    return '"' + hashlib.blake2b(bruto, digest_size=12).hexdigest() + '"'
+
+
+def _normalizar(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for sufixo in _SUFIXOS_CODIFICACAO:
+        if tag.endswith(sufixo):
+            return tag[: -len(sufixo)]
+    return tag
+
+
+def nao_modificado(request: Request, tag: str) -> bool:
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    alvo = _normalizar(tag)
+    return any(_normalizar(t) == alvo for t in cabecalho.split(","))
+
+
+def responder(request: Request, response: Response, tag: str, max_age: int = CACHE_PUBLICO_MAX_AGE) -> Optional[Response]:
+    """
+    Põe ETag/Cache-Control na resposta. Se o cliente já tem essa versão, devolve o 304
+    (o endpoint retorna ele direto); senão None e o endpoint segue com a consulta.
+    """
+    headers = {
+        "ETag": tag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age * 3}",
+    }
+    if nao_modificado(request, tag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
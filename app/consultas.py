@@ -0,0 +1,140 @@
+# app/consultas.py
+# Ganchos em volta das chamadas ao banco feitas pelo `database` (databases.Database):
+# instrumentar() troca, na instância, execute/execute_many/fetch_all/fetch_one/fetch_val
+# por versões que medem a chamada (incluindo a espera por uma conexão do pool) e avisam
+# os observadores registrados com observar(). Sem observador, a chamada passa direto.
+#
+# Observadores rodam no contexto (contextvars) de quem fez a consulta: é assim que o
+# perfil por requisição (app/middleware/perfil.py) separa as consultas de cada requisição.
+#
+# contar() abre um bloco em que as consultas são contadas e agrupadas por forma (o SQL sem
+# valores): N consultas com a mesma forma num bloco só é o sinal clássico de N+1.
+# app/middleware/consultas.py abre um bloco por requisição. O observador da contagem só
+# entra com ativar_contagem() (o middleware chama ao ser montado): desligado, nenhuma
+# consulta paga o despacho para observadores.
+import contextlib
+import contextvars
+import functools
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.dialects import postgresql
+
+METODOS = ("execute", "execute_many", "fetch_all", "fetch_one", "fetch_val")
+
+# fn(metodo, query, inicio (perf_counter), duracao_s, erro ou None)
+Observador = Callable[[str, Any, float, float, Optional[BaseException]], None]
+
+_observadores: List[Observador] = []
+_dialeto = postgresql.dialect()
+_espacos = re.compile(r"\s+")
+# literais que sobram em SQL textual; nomes como post_2024 ou %(id_1)s não casam (\b)
+_literais = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+CONTAGEM_MAX = 1000  # consultas guardadas por bloco; além disso só o total cresce
+
+
+def observar(fn: Observador) -> Observador:
+    """Registra `fn` para ser chamada ao fim de cada consulta (idempotente). Pode ser usado como decorator."""
+    if fn not in _observadores:
+        _observadores.append(fn)
+    return fn
+
+
+def deixar_de_observar(fn: Observador):
+    if fn in _observadores:
+        _observadores.remove(fn)
+
+
+def sql_de(query) -> str:
+    """SQL da consulta (sem os valores), em uma linha. Caro: use só quando for guardar."""
+    if isinstance(query, str):
+        texto = query
+    else:
+        try:
+            texto = str(query.compile(dialect=_dialeto))
+        except Exception:
+            texto = type(query).__name__
+    return _espacos.sub(" ", texto).strip()
+
+
+def forma(query) -> str:
+    """Impressão digital da consulta: o SQL sem valores, igual para chamadas que só mudam os parâmetros."""
+    return _literais.sub("?", sql_de(query))
+
+
+class Contagem:
+    def __init__(self, pai: Optional["Contagem"] = None):
+        self.pai = pai
+        self.total = 0
+        self.consultas: List[tuple] = []  # (metodo, query): a forma só é calculada se pedida
+
+    def por_forma(self) -> Dict[str, int]:
+        return dict(Counter(forma(query) for _, query in self.consultas).most_common())
+
+    def repetidas(self, limite: int) -> Dict[str, int]:
+        """Formas que aparecem `limite` vezes ou mais (candidatas a N+1)."""
+        if self.total < limite:
+            return {}
+        return {f: n for f, n in self.por_forma().items() if n >= limite}
+
+
+_contagem: contextvars.ContextVar[Optional[Contagem]] = contextvars.ContextVar("contagem_consultas", default=None)
+
+
+@contextlib.contextmanager
+def contar() -> Iterator[Contagem]:
+    """
+    Conta as consultas feitas dentro do bloco (inclusive em tasks criadas nele). Blocos aninhados somam nos dois.
+    Só conta com ativar_contagem() chamado antes.
+    """
+    contagem = Contagem(_contagem.get())
+    token = _contagem.set(contagem)
+    try:
+        yield contagem
+    finally:
+        _contagem.reset(token)
+
+
+def _contar(metodo, query, inicio, duracao, erro):
+    contagem = _contagem.get()
+    while contagem is not None:
+        contagem.total += 1
+        if len(contagem.consultas) < CONTAGEM_MAX:
+            contagem.consultas.append((metodo, query))
+        contagem = contagem.pai
+
+
+def ativar_contagem():
+    observar(_contar)
+
+
+def _envolver(nome: str, original):
+    @functools.wraps(original)
+    async def wrapper(query, *args, **kwargs):
+        if not _observadores:
+            return await original(query, *args, **kwargs)
+        erro = None
+        inicio = time.perf_counter()
+        try:
+            return await original(query, *args, **kwargs)
+        except BaseException as e:
+            erro = e
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            for fn in _observadores:
+                fn(nome, query, inicio, duracao, erro)
+
+    return wrapper
+
+
+def instrumentar(db):
+    """Instala os ganchos na instância `db` (idempotente)."""
+    if getattr(db, "_instrumentado", False):
+        return
+    for nome in METODOS:
+        setattr(db, nome, _envolver(nome, getattr(db, nome)))
+    db._instrumentado = True
@@ -0,0 +1,119 @@
+# app/crud/arquivo.py
+# Arquivo frio de posts: o que é mais velho que POST_ARQUIVO_IDADE_DIAS sai de `post`
+# (tabela quente, particionada) para `post_arquivo`, em lotes curtos. Partições
+# destacadas pelo worker de partições também são drenadas para cá e removidas.
+# Partições a destacar são esvaziadas antes pelo mesmo caminho (esvaziar_antigas): cada
+# lote sai de `post` e entra em `post_arquivo` na mesma instrução, sem janela em que o
+# post não está em nenhuma das duas.
+# O id do post não muda: likes e demais dependentes continuam valendo.
+# Quem lê: a timeline (get_posts_por_usuario) cai no arquivo quando a parte quente do
+# autor acaba; stats, like, delete e purga consultam as duas tabelas.
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from databases import Database
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app import metricas
+from app.crud import particoes as particoes_crud
+from app.models.post import post, post_arquivo
+
+# 0 = não arquiva por idade
+POST_ARQUIVO_IDADE_DIAS = int(os.getenv("POST_ARQUIVO_IDADE_DIAS", "0"))
+POST_ARQUIVO_LOTE = int(os.getenv("POST_ARQUIVO_LOTE", "1000"))
+
+_COLUNAS = ["id", "post", "usuario_id", "data_criacao"]
+
+
+async def arquivar_lote(db: Database, corte: datetime, lote: int = POST_ARQUIVO_LOTE) -> int:
+    """
+    Move até `lote` posts com data_criacao < corte (os mais antigos primeiro) numa única
+    instrução:
+
+        WITH movidos AS (DELETE FROM post WHERE (id, data_criacao) IN (... SKIP LOCKED) RETURNING ...)
+        INSERT INTO post_arquivo SELECT ... FROM movidos
+
+    Retorna quantos foram movidos.
+    """
+    alvo = (
+        select(post.c.id, post.c.data_criacao)
+        .where(post.c.data_criacao < corte)
+        .order_by(post.c.data_criacao)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+    )
+    movidos = (
+        post.delete()
+        .where(tuple_(post.c.id, post.c.data_criacao).in_(alvo))
+        .returning(*(post.c[c] for c in _COLUNAS))
+        .cte("movidos")
+    )
+    stmt = (
+        insert(post_arquivo)
+        .from_select(_COLUNAS, select(*(movidos.c[c] for c in _COLUNAS)))
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(post_arquivo.c.id)
+        .add_cte(movidos)  # CTE que modifica dados precisa ficar no topo do INSERT
+    )
+    n = len(await db.fetch_all(stmt))
+    metricas.incrementar("arquivo.movidos", n)
+    return n
+
+
+async def esvaziar_antigas(
+    db: Database,
+    reter_meses: int = particoes_crud.POST_PARTICOES_RETER_MESES,
+    lote: int = POST_ARQUIVO_LOTE,
+    hoje: Optional[date] = None,
+) -> bool:
+    """
+    Move um lote dos posts das partições que vão ser destacadas (anteriores à retenção).
+    True = lote cheio, ainda pode haver mais; com False elas estão vazias e podem ser destacadas.
+    """
+    corte = particoes_crud.corte_retencao(reter_meses, hoje)
+    if corte is None:
+        return False
+    inicio = datetime(corte.year, corte.month, corte.day, tzinfo=timezone.utc)
+    return await arquivar_lote(db, inicio, lote) == lote
+
+
+async def drenar_destacada(db: Database, lote: int = POST_ARQUIVO_LOTE) -> Optional[int]:
+    """
+    Move um lote da primeira partição destacada para o arquivo; vazia, ela é removida.
+    Retorna quantos posts foram movidos (0 = tabela removida) ou None se não há o que drenar.
+    """
+    destacadas = await particoes_crud.listar_destacadas(db)
+    if not destacadas:
+        return None
+    nome = destacadas[0]
+    colunas = ", ".join(_COLUNAS)
+    async with db.transaction():
+        n = await db.fetch_val(text(
+            f"WITH movidos AS (DELETE FROM {nome} WHERE ctid = ANY(ARRAY(SELECT ctid FROM {nome} LIMIT :lote)) "
+            f"RETURNING {colunas}), "
+            f"gravados AS (INSERT INTO post_arquivo ({colunas}) SELECT {colunas} FROM movidos "
+            f"ON CONFLICT (id) DO NOTHING) "
+            f"SELECT count(*) FROM movidos"
+        ).bindparams(lote=lote))
+        if not n:
+            await db.execute(text(f"DROP TABLE {nome}"))
+            metricas.incrementar("particoes.drenadas")
+    metricas.incrementar("arquivo.movidos", n)
+    return n
+
+
+async def passo(
+    db: Database,
+    idade_dias: int = POST_ARQUIVO_IDADE_DIAS,
+    lote: int = POST_ARQUIVO_LOTE,
+    agora: Optional[datetime] = None,
+) -> bool:
+    """Um lote de trabalho. True = ainda há o que mover (o worker segue sem pausa)."""
+    if await drenar_destacada(db, lote) is not None:
+        return True
+    if idade_dias <= 0:
+        return False
+    corte = (agora or datetime.now(timezone.utc)) - timedelta(days=idade_dias)
+    return await arquivar_lote(db, corte, lote) == lote
@@ -0,0 +1,201 @@
+# app/crud/fila.py
+# Fila durável de tarefas em Postgres (tabela `tarefa`), para tirar efeitos colaterais
+# do caminho da requisição:
+#   - enfileirar() roda na MESMA transação da escrita principal: se ela commita, a tarefa
+#     existe; se faz rollback, a tarefa também some;
+#   - os workers (app/workers/fila.py) pegam a cabeça da fila com FOR UPDATE SKIP LOCKED
+#     e, junto com ela, até `lote` tarefas prontas do mesmo tipo: o tratador recebe a lista
+#     de payloads e pode agregar (ex.: N likes do mesmo post viram um UPDATE);
+#   - falha do tratador desfaz só o savepoint dele; as tarefas voltam com backoff
+#     exponencial (com jitter) e, esgotadas as tentativas, ficam marcadas em morta_em.
+#     Lote que falha é desfeito na hora (cada tarefa volta sem espera, para rodar sozinha)
+#     e tarefa que já falhou é sempre reprocessada sozinha: uma tarefa ruim não trava as outras.
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from databases import Database
+from sqlalchemy import select, func, any_, bindparam, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app import metricas
+from app.models.fila import tarefa
+
+FILA_LOTE = int(os.getenv("FILA_LOTE", "200"))
+FILA_MAX_TENTATIVAS = int(os.getenv("FILA_MAX_TENTATIVAS", "8"))
+FILA_BACKOFF_BASE_S = float(os.getenv("FILA_BACKOFF_BASE_S", "1"))
+FILA_BACKOFF_MAX_S = float(os.getenv("FILA_BACKOFF_MAX_S", "300"))
+# profundidade/atraso por tipo são consultados no máximo a cada N segundos
+FILA_ESTADO_INTERVALO_S = float(os.getenv("FILA_ESTADO_INTERVALO_S", "5"))
+
+Tratador = Callable[[Database, List[dict]], Awaitable[None]]
+
+
+@dataclass
+class _Registro:
+    fn: Tratador
+    lote: int
+
+
+_tratadores: Dict[str, _Registro] = {}
+
+
+def tratador(tipo: str, lote: int = FILA_LOTE):
+    """Registra `fn(db, payloads)` como tratador das tarefas de `tipo`."""
+
+    def decorator(fn: Tratador):
+        _tratadores[tipo] = _Registro(fn, lote)
+        return fn
+
+    return decorator
+
+
+async def enfileirar(db: Database, tipo: str, payload: dict, atraso_s: float = 0):
+    """Insere uma tarefa. Chame dentro da transação da escrita que a originou."""
+    valores = {"tipo": tipo, "payload": payload}
+    if atraso_s > 0:
+        valores["executar_em"] = datetime.now(timezone.utc) + timedelta(seconds=atraso_s)
+    await db.execute(tarefa.insert().values(**valores))
+    metricas.incrementar("fila.enfileiradas")
+
+
+async def enfileirar_varios(db: Database, tipo: str, payloads: List[dict]):
+    """Versão em lote de enfileirar: um único INSERT multi-linha."""
+    if not payloads:
+        return
+    await db.execute(tarefa.insert().values([{"tipo": tipo, "payload": p} for p in payloads]))
+    metricas.incrementar("fila.enfileiradas", len(payloads))
+
+
+def backoff(tentativas: int) -> float:
+    """Espera antes da próxima tentativa: base * 2^n limitado, entre metade e o total (jitter)."""
+    espera = min(FILA_BACKOFF_MAX_S, FILA_BACKOFF_BASE_S * 2 ** tentativas)
+    return random.uniform(espera / 2, espera)
+
+
+def _payload(valor) -> dict:
+    # conforme o driver/codec, JSONB volta como str
+    return json.loads(valor) if isinstance(valor, str) else valor
+
+
+def _prontas():
+    return tarefa.c.morta_em.is_(None) & (tarefa.c.executar_em <= func.now())
+
+
+# ---------- métricas ----------
+_estado: Dict[str, dict] = {}
+_estado_em = 0.0
+
+
+def _registrar_atraso(tipo: str, atraso_s: float, n: int):
+    e = _estado.setdefault(tipo, {})
+    e["ultimo_atraso_s"] = round(atraso_s, 3)
+    e["processadas"] = e.get("processadas", 0) + n
+
+
+async def atualizar_estado(db: Database, forcar: bool = False):
+    """Profundidade (prontas/agendadas/mortas) e atraso da tarefa pronta mais antiga, por tipo."""
+    global _estado_em
+    if not forcar and time.monotonic() - _estado_em < FILA_ESTADO_INTERVALO_S:
+        return
+    _estado_em = time.monotonic()
+    agora = func.now()
+    rows = await db.fetch_all(
+        select(
+            tarefa.c.tipo,
+            func.count().filter(_prontas()).label("prontas"),
+            func.count().filter(tarefa.c.morta_em.is_(None) & (tarefa.c.executar_em > agora)).label("agendadas"),
+            func.count().filter(tarefa.c.morta_em.isnot(None)).label("mortas"),
+            func.extract("epoch", agora - func.min(tarefa.c.executar_em).filter(_prontas())).label("atraso_s"),
+        ).group_by(tarefa.c.tipo)
+    )
+    vistos = set()
+    for r in rows:
+        e = _estado.setdefault(r["tipo"], {})
+        e.update(
+            prontas=r["prontas"],
+            agendadas=r["agendadas"],
+            mortas=r["mortas"],
+            atraso_s=round(float(r["atraso_s"] or 0), 3),
+        )
+        vistos.add(r["tipo"])
+    for tipo, e in _estado.items():
+        if tipo not in vistos:
+            e.update(prontas=0, agendadas=0, mortas=0, atraso_s=0.0)
+
+
+metricas.registrar_coletor("fila", lambda: {t: dict(e) for t, e in _estado.items()})
+
+
+# ---------- consumo ----------
+async def processar_lote(db: Database) -> bool:
+    """
+    Processa um lote (uma transação curta). Retorna False quando não há tarefa pronta.
+    """
+    async with db.transaction():
+        cabeca = await db.fetch_one(
+            select(tarefa)
+            .where(_prontas())
+            .order_by(tarefa.c.executar_em)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if cabeca is None:
+            return False
+
+        registro = _tratadores.get(cabeca["tipo"])
+        if cabeca["tentativas"] > 0 or registro is None or registro.lote <= 1:
+            rows = [cabeca]
+        else:
+            # a cabeça já está travada por esta transação: vem junto no lote
+            rows = await db.fetch_all(
+                select(tarefa)
+                .where(_prontas() & (tarefa.c.tipo == cabeca["tipo"]) & (tarefa.c.tentativas == 0))
+                .order_by(tarefa.c.executar_em)
+                .limit(registro.lote)
+                .with_for_update(skip_locked=True)
+            )
+        ids = [r["id"] for r in rows]
+        ids_bp = bindparam("tarefa_ids", type_=ARRAY(BigInteger), value=ids)
+        agora = datetime.now(timezone.utc)
+        atraso = (agora - min(r["executar_em"] for r in rows)).total_seconds()
+
+        try:
+            if registro is None:
+                raise LookupError(f"sem tratador para o tipo {cabeca['tipo']!r}")
+            async with db.transaction():  # savepoint: falha desfaz só o tratador
+                await registro.fn(db, [_payload(r["payload"]) for r in rows])
+        except Exception as e:
+            tentativas = cabeca["tentativas"] + 1
+            valores = {"tentativas": tarefa.c.tentativas + 1, "erro": f"{type(e).__name__}: {e}"[:1000]}
+            if len(rows) > 1:
+                # lote falhou: sem backoff, cada tarefa volta já para ser tentada sozinha,
+                # e só a ruim (se houver uma) vai para o backoff
+                metricas.incrementar("fila.lotes_divididos")
+            elif tentativas >= FILA_MAX_TENTATIVAS:
+                valores["morta_em"] = agora
+                metricas.incrementar("fila.mortas", len(ids))
+            else:
+                valores["executar_em"] = agora + timedelta(seconds=backoff(tentativas))
+            await db.execute(tarefa.update().where(tarefa.c.id == any_(ids_bp)).values(**valores))
+            metricas.incrementar("fila.falhas", len(ids))
+            return True
+
+        await db.execute(tarefa.delete().where(tarefa.c.id == any_(ids_bp)))
+
+    metricas.incrementar("fila.processadas", len(ids))
+    metricas.incrementar("fila.lotes")
+    _registrar_atraso(cabeca["tipo"], atraso, len(ids))
+    return True
+
+
+async def drenar(db: Database) -> int:
+    """Processa até não sobrar tarefa pronta (scripts e testes). Retorna quantos lotes rodaram."""
+    lotes = 0
+    while await processar_lote(db):
+        lotes += 1
+    return lotes
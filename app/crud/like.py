@@ -1,19 +1,75 @@
-from typing import Dict, List
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from databases import Database
-from sqlalchemy import select, func
+from fastapi import HTTPException
+from sqlalchemy import select, func, literal, tuple_, Integer
 from sqlalchemy.dialects.postgresql import insert
 
 from app.models.like import like
+from app.models.post import post, post_arquivo
+from app.models.usuario import usuario
+from app.crud import ranking as ranking_crud
+from app.crud import trending as trending_crud
+from app.crud import fila as fila_crud
+from app.crud import notificacao as notificacao_crud
+from app.workers import fila as fila_worker
+from app.cache.singleflight import coalescer
+from app.paginacao import codificar_cursor, decodificar_cursor
+
+# Score do post, afinidade, bucket de trending e notificação saem do caminho da requisição:
+# cada like/unlike efetivo vira uma tarefa "like", aplicada em lote pelo worker da fila.
+FILA_LIKE = "like"
+
+
+@fila_crud.tratador(FILA_LIKE)
+async def _aplicar_likes(db: Database, payloads: List[dict]):
+    await ranking_crud.registrar_likes(db, [(p["usuario_id"], p["post_id"], p["delta"]) for p in payloads])
+    await trending_crud.registrar_likes(
+        db, [(p["post_id"], datetime.fromisoformat(p["quando"]), p["delta"]) for p in payloads]
+    )
+    # unlike não desfaz a notificação já entregue
+    await notificacao_crud.registrar(
+        db,
+        [notificacao_crud.evento(notificacao_crud.TIPO_LIKE, p["usuario_id"], p["post_id"]) for p in payloads if p["delta"] > 0],
+    )
+
+
+async def _enfileirar_like(db: Database, usuario_id: int, post_id: int, quando: datetime, delta: int):
+    await fila_crud.enfileirar(
+        db, FILA_LIKE, {"usuario_id": usuario_id, "post_id": post_id, "quando": quando.isoformat(), "delta": delta}
+    )
+
+
+async def _post_existe(db: Database, post_id: int) -> bool:
+    for tabela in (post, post_arquivo):
+        if await db.fetch_val(select(tabela.c.id).where(tabela.c.id == post_id)) is not None:
+            return True
+    return False
 
 
 async def dar_like(db: Database, usuario_id: int, post_id: int) -> dict:
     """
     Idempotente: se já existir, não falha.
-    Usa ON CONFLICT na PK (like_pkey).
+    Usa ON CONFLICT na PK (like_pkey); o RETURNING diz se o like é novo,
+    e só então a atualização de score/trending é enfileirada (mesma transação).
     """
-    stmt = insert(like).values(usuario_id=usuario_id, post_id=post_id)
-    stmt = stmt.on_conflict_do_nothing(constraint="like_pkey")
-    await db.execute(stmt)
+    # INSERT ... SELECT FROM post (quente ou arquivado): faz a checagem de existência que a FK fazia
+    # cast: no UNION o Postgres não infere o tipo do bind pela coluna de destino
+    uid = literal(usuario_id).cast(Integer)
+    origem = select(uid, post.c.id).where(post.c.id == post_id).union_all(
+        select(uid, post_arquivo.c.id).where(post_arquivo.c.id == post_id)
+    )
+    stmt = insert(like).from_select(["usuario_id", "post_id"], origem)
+    stmt = stmt.on_conflict_do_nothing(constraint="like_pkey").returning(like.c.data_criacao)
+    async with db.transaction():
+        row = await db.fetch_one(stmt)
+        if row:
+            await _enfileirar_like(db, usuario_id, post_id, row["data_criacao"], +1)
+    if row is None and not await _post_existe(db, post_id):
+        raise HTTPException(status_code=404, detail="Post não encontrado")
+    if row:
+        fila_worker.acordar.set()
     return {"liked": True, "post_id": post_id}
 
 
@@ -23,8 +79,13 @@ async def remover_like(db: Database, usuario_id: int, post_id: int) -> dict:
     """
     q = like.delete().where(
         (like.c.usuario_id == usuario_id) & (like.c.post_id == post_id)
-    )
-    await db.execute(q)
+    ).returning(like.c.data_criacao)
+    async with db.transaction():
+        row = await db.fetch_one(q)
+        if row:
+            await _enfileirar_like(db, usuario_id, post_id, row["data_criacao"], -1)
+    if row:
+        fila_worker.acordar.set()
     return {"liked": False, "post_id": post_id}
 
 
@@ -89,3 +150,56 @@ async def batch_resumo_like(
             "liked_by_me": int(pid) in mine,
         }
     return out
+
+
+# ---------- curtidores (lista paginada) ----------
+# Primeira página em micro-cache: é a que todo mundo abre num post quente. Não é invalidada
+# a cada like (num post quente isso zeraria o cache justamente onde ele serve); o TTL curto
+# limita o atraso.
+CURTIDORES_CACHE_TTL_MS = float(os.getenv("CURTIDORES_CACHE_TTL_MS", "2000"))
+
+
+def _cursor_curtidor(cursor: str) -> Tuple[datetime, int]:
+    data, uid = decodificar_cursor(cursor, 2)
+    if not isinstance(data, str) or not isinstance(uid, int):
+        raise ValueError("cursor inválido")
+    return datetime.fromisoformat(data), uid
+
+
+async def _pagina_curtidores(db: Database, post_id: int, limit: int, depois_de=None):
+    filtro = [like.c.post_id == post_id]
+    if depois_de is not None:
+        filtro.append(tuple_(like.c.data_criacao, like.c.usuario_id) < depois_de)
+    query = (
+        select(usuario.c.id, usuario.c.nome, like.c.data_criacao.label("curtido_em"))
+        .select_from(like.join(usuario, (usuario.c.id == like.c.usuario_id) & usuario.c.excluido_em.is_(None)))
+        .where(*filtro)
+        .order_by(like.c.data_criacao.desc(), like.c.usuario_id.desc())
+        .limit(limit + 1)
+    )
+    rows = await db.fetch_all(query)
+    proximo = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        proximo = codificar_cursor(rows[-1]["curtido_em"].isoformat(), rows[-1]["id"])
+    return [{"id": r["id"], "nome": r["nome"], "curtido_em": r["curtido_em"]} for r in rows], proximo
+
+
+@coalescer(ttl_ms=CURTIDORES_CACHE_TTL_MS)
+async def _primeira_pagina_curtidores(db: Database, post_id: int, limit: int):
+    return await _pagina_curtidores(db, post_id, limit)
+
+
+async def listar_curtidores(db: Database, post_id: int, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Quem curtiu o post, do like mais recente ao mais antigo, com paginação keyset sobre
+    (data do like, usuario_id) pelo índice ix_like_post_data: cada página lê só `limit + 1`
+    likes e junta só esses usuários. Retorna (itens, proximo_cursor), ou None se o post não
+    existir. ValueError se o cursor for inválido.
+    """
+    if cursor:
+        return await _pagina_curtidores(db, post_id, limit, _cursor_curtidor(cursor))
+    itens, proximo = await _primeira_pagina_curtidores(db, post_id, limit)
+    if not itens and not await _post_existe(db, post_id):
+        return None
+    return itens, proximo
@@ -0,0 +1,196 @@
+# app/crud/notificacao.py
+# Notificações de like e de seguir, geradas fora da requisição:
+#   - like: o tratador da fila de likes (app/crud/like.py) chama registrar() com o lote;
+#   - seguir: seguir_usuario / aplicar_lote enfileiram tarefas "notificacao" na mesma
+#     transação do follow.
+# registrar() agrega o lote por (destinatário, tipo, alvo) e faz um único upsert na linha
+# não lida daquele alvo (índice único parcial): um post viral acumula `total` numa linha só.
+# O contador de não lidas só muda quando nasce uma linha nova ou quando linhas são lidas.
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from databases import Database
+from sqlalchemy import select, func, tuple_, any_, bindparam, text, literal_column, Integer, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models.notificacao import notificacao, notificacao_contador
+from app.models.post import post, post_arquivo
+from app.models.usuario import usuario
+from app.crud import fila as fila_crud
+from app.paginacao import codificar_cursor, decodificar_cursor
+
+TIPO_LIKE = "like"
+TIPO_SEGUIR = "seguir"
+FILA_NOTIFICACAO = "notificacao"
+
+
+def evento(tipo: str, ator_id: int, alvo_id: int = 0, usuario_id: Optional[int] = None) -> dict:
+    """Evento de notificação; sem `usuario_id`, o destinatário é o autor do post `alvo_id`."""
+    return {"tipo": tipo, "ator_id": ator_id, "alvo_id": alvo_id, "usuario_id": usuario_id}
+
+
+async def enfileirar_seguidos(db: Database, seguidor_id: int, seguidos_ids: List[int]):
+    """Uma tarefa por follow novo. Chame dentro da transação que criou as arestas."""
+    await fila_crud.enfileirar_varios(
+        db, FILA_NOTIFICACAO, [evento(TIPO_SEGUIR, seguidor_id, usuario_id=uid) for uid in seguidos_ids]
+    )
+
+
+@fila_crud.tratador(FILA_NOTIFICACAO)
+async def _tratar(db: Database, payloads: List[dict]):
+    await registrar(db, payloads)
+
+
+async def _autores(db: Database, post_ids: List[int]) -> dict:
+    ids_bp = bindparam("post_ids", type_=ARRAY(Integer), value=post_ids)
+    q = select(post.c.id, post.c.usuario_id).where(post.c.id == any_(ids_bp)).union_all(
+        select(post_arquivo.c.id, post_arquivo.c.usuario_id).where(post_arquivo.c.id == any_(ids_bp))
+    )
+    return {r["id"]: r["usuario_id"] for r in await db.fetch_all(q)}
+
+
+async def registrar(db: Database, eventos: List[dict]):
+    """Aplica um lote de eventos (ver evento()). Ignora auto-notificação e destinatários excluídos."""
+    sem_destino = sorted({e["alvo_id"] for e in eventos if e.get("usuario_id") is None})
+    autores = await _autores(db, sem_destino) if sem_destino else {}
+
+    # (destinatário, tipo, alvo) -> [eventos, ator mais recente]
+    grupos = {}
+    for e in eventos:
+        destino = e.get("usuario_id") or autores.get(e["alvo_id"])
+        if destino is None or destino == e["ator_id"]:
+            continue
+        g = grupos.setdefault((destino, e["tipo"], e["alvo_id"]), [0, None])
+        g[0] += 1
+        g[1] = e["ator_id"]
+    if not grupos:
+        return
+
+    ids_bp = bindparam("destinos", type_=ARRAY(Integer), value=sorted({k[0] for k in grupos}))
+    ativos = {
+        r["id"]
+        for r in await db.fetch_all(
+            select(usuario.c.id).where((usuario.c.id == any_(ids_bp)) & usuario.c.excluido_em.is_(None))
+        )
+    }
+    # ordem fixa das linhas: lotes concorrentes não se travam em ordens diferentes
+    linhas = [
+        {"usuario_id": d, "tipo": t, "alvo_id": a, "ator_id": ator, "total": n}
+        for (d, t, a), (n, ator) in sorted(grupos.items())
+        if d in ativos
+    ]
+    if not linhas:
+        return
+
+    stmt = insert(notificacao).values(linhas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["usuario_id", "tipo", "alvo_id"],
+        index_where=text("NOT lida"),
+        set_={
+            "total": notificacao.c.total + stmt.excluded.total,
+            "ator_id": stmt.excluded.ator_id,
+            "atualizado_em": func.now(),
+        },
+    ).returning(
+        notificacao.c.usuario_id,
+        # xmax = 0 só na linha recém-inserida (no DO UPDATE ela carrega o xid desta transação)
+        literal_column("xmax = 0").label("inserida"),
+    )
+    novas = Counter(r["usuario_id"] for r in await db.fetch_all(stmt) if r["inserida"])
+    if novas:
+        stmt = insert(notificacao_contador).values(
+            [{"usuario_id": uid, "nao_lidas": n} for uid, n in sorted(novas.items())]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["usuario_id"],
+            set_={"nao_lidas": notificacao_contador.c.nao_lidas + stmt.excluded.nao_lidas},
+        )
+        await db.execute(stmt)
+
+
+async def nao_lidas(db: Database, usuario_id: int) -> int:
+    n = await db.fetch_val(
+        select(notificacao_contador.c.nao_lidas).where(notificacao_contador.c.usuario_id == usuario_id)
+    )
+    return n or 0
+
+
+async def marcar_lidas(db: Database, usuario_id: int, ids: Optional[List[int]] = None) -> Tuple[int, int]:
+    """
+    Marca como lidas as notificações `ids` do usuário (todas, se `ids` for None).
+    Retorna (quantas mudaram, não lidas restantes).
+    """
+    cond = (notificacao.c.usuario_id == usuario_id) & ~notificacao.c.lida
+    if ids is not None:
+        if not ids:
+            return 0, await nao_lidas(db, usuario_id)
+        cond &= notificacao.c.id == any_(bindparam("ids", type_=ARRAY(BigInteger), value=list(set(ids))))
+    async with db.transaction():
+        marcadas = len(await db.fetch_all(notificacao.update().where(cond).values(lida=True).returning(notificacao.c.id)))
+        if marcadas:
+            await db.execute(
+                notificacao_contador.update()
+                .where(notificacao_contador.c.usuario_id == usuario_id)
+                .values(nao_lidas=func.greatest(notificacao_contador.c.nao_lidas - marcadas, 0))
+            )
+        return marcadas, await nao_lidas(db, usuario_id)
+
+
+def _cursor(cursor: str):
+    data, nid = decodificar_cursor(cursor, 2)
+    if not isinstance(data, str) or not isinstance(nid, int):
+        raise ValueError("cursor inválido")
+    return datetime.fromisoformat(data), nid
+
+
+async def listar(
+    db: Database, usuario_id: int, limit: int = 20, cursor: Optional[str] = None, apenas_nao_lidas: bool = False
+):
+    """
+    Notificações do usuário, da atualizada mais recentemente para a mais antiga, com
+    paginação keyset sobre (atualizado_em, id). Linha agregada que recebe evento novo
+    sobe para o topo. Retorna (itens, proximo_cursor); ValueError se o cursor for inválido.
+    """
+    ator = usuario.alias("ator")
+    filtro = [notificacao.c.usuario_id == usuario_id]
+    if apenas_nao_lidas:
+        filtro.append(~notificacao.c.lida)
+    if cursor:
+        filtro.append(tuple_(notificacao.c.atualizado_em, notificacao.c.id) < _cursor(cursor))
+    query = (
+        select(
+            notificacao.c.id,
+            notificacao.c.tipo,
+            notificacao.c.alvo_id,
+            notificacao.c.total,
+            notificacao.c.lida,
+            notificacao.c.atualizado_em,
+            ator.c.id.label("ator_id"),
+            ator.c.nome.label("ator_nome"),
+        )
+        .select_from(
+            notificacao.outerjoin(ator, (ator.c.id == notificacao.c.ator_id) & ator.c.excluido_em.is_(None))
+        )
+        .where(*filtro)
+        .order_by(notificacao.c.atualizado_em.desc(), notificacao.c.id.desc())
+        .limit(limit + 1)
+    )
+    rows = await db.fetch_all(query)
+    proximo = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        proximo = codificar_cursor(rows[-1]["atualizado_em"].isoformat(), rows[-1]["id"])
+    itens = [
+        {
+            "id": r["id"],
+            "tipo": r["tipo"],
+            "alvo_id": r["alvo_id"],
+            "total": r["total"],
+            "lida": r["lida"],
+            "atualizado_em": r["atualizado_em"],
+            "ator": {"id": r["ator_id"], "nome": r["ator_nome"]} if r["ator_id"] is not None else None,
+        }
+        for r in rows
+    ]
+    return itens, proximo
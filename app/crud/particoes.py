@@ -0,0 +1,104 @@
+# app/crud/particoes.py
+# Manutenção das partições mensais de `post` (app/models/post.py):
+#   - cria com antecedência as partições dos próximos meses;
+#   - destaca (DETACH) meses mais antigos que a retenção configurada. Antes disso os posts
+#     deles já foram para post_arquivo pela tabela quente (arquivo.esvaziar_antigas), então
+#     nada some das leituras; a tabela destacada, vazia, é removida (arquivo.drenar_destacada).
+import os
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from databases import Database
+from sqlalchemy import text
+
+from app import metricas
+from app.models.post import POST_PARTICAO_DEFAULT, inicio_do_mes, limites_particao, nome_particao
+
+POST_PARTICOES_FUTURAS = int(os.getenv("POST_PARTICOES_FUTURAS", "3"))
+# 0 = nunca destaca
+POST_PARTICOES_RETER_MESES = int(os.getenv("POST_PARTICOES_RETER_MESES", "0"))
+
+_LISTAR = text(
+    "SELECT c.relname FROM pg_inherits i "
+    "JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = 'post'::regclass AND c.relname ~ '^post_p[0-9]{6}$'"
+)
+
+
+# tabelas post_pYYYYMM que não estão (mais) penduradas em post
+_LISTAR_DESTACADAS = text(
+    "SELECT c.relname FROM pg_class c "
+    "WHERE c.relkind = 'r' AND c.relname ~ '^post_p[0-9]{6}$' AND pg_table_is_visible(c.oid) "
+    "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) "
+    "ORDER BY c.relname"
+)
+
+
+def _mes_da_particao(nome: str) -> date:
+    return date(int(nome[6:10]), int(nome[10:12]), 1)
+
+
+async def listar(db: Database) -> List[date]:
+    """Meses com partição própria (sem a default), em ordem."""
+    return sorted(_mes_da_particao(r[0]) for r in await db.fetch_all(_LISTAR))
+
+
+async def listar_destacadas(db: Database) -> List[str]:
+    """Nomes das partições destacadas que ainda existem, da mais antiga para a mais nova."""
+    return [r[0] for r in await db.fetch_all(_LISTAR_DESTACADAS)]
+
+
+async def criar_particao(db: Database, mes: date):
+    """
+    Cria a partição do mês. Linhas desse mês que tenham caído na partição default
+    (ex.: o worker ficou parado) são movidas antes do ATTACH, senão ele falharia.
+    """
+    nome = nome_particao(mes)
+    de, ate = limites_particao(mes)
+    async with db.transaction():
+        await db.execute(text(f"CREATE TABLE {nome} (LIKE post INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        await db.execute(text(
+            f"WITH movidos AS (DELETE FROM {POST_PARTICAO_DEFAULT} "
+            f"WHERE data_criacao >= {de} AND data_criacao < {ate} RETURNING *) "
+            f"INSERT INTO {nome} SELECT * FROM movidos"
+        ))
+        await db.execute(text(f"ALTER TABLE post ATTACH PARTITION {nome} FOR VALUES FROM ({de}) TO ({ate})"))
+    metricas.incrementar("particoes.criadas")
+
+
+async def garantir_futuras(db: Database, futuras: int = POST_PARTICOES_FUTURAS, hoje: Optional[date] = None) -> List[date]:
+    hoje = hoje or datetime.now(timezone.utc).date()
+    existentes = set(await listar(db))
+    criadas = []
+    for deslocamento in range(0, futuras + 1):
+        mes = inicio_do_mes(hoje, deslocamento)
+        if mes not in existentes:
+            await criar_particao(db, mes)
+            criadas.append(mes)
+    return criadas
+
+
+def corte_retencao(reter_meses: int = POST_PARTICOES_RETER_MESES, hoje: Optional[date] = None) -> Optional[date]:
+    """Primeiro mês retido em `post` (None = retenção desligada)."""
+    if reter_meses <= 0:
+        return None
+    return inicio_do_mes(hoje or datetime.now(timezone.utc).date(), -reter_meses)
+
+
+async def destacar_antigas(db: Database, reter_meses: int = POST_PARTICOES_RETER_MESES, hoje: Optional[date] = None) -> List[date]:
+    """
+    Destaca partições cujo mês inteiro é anterior aos últimos `reter_meses` meses.
+    Esvazie-as antes (arquivo.esvaziar_antigas): posts numa partição destacada somem
+    das leituras até serem drenados.
+    """
+    corte = corte_retencao(reter_meses, hoje)
+    if corte is None:
+        return []
+    destacadas = []
+    for mes in await listar(db):
+        if mes < corte:
+            # sem CONCURRENTLY: não é permitido com partição default
+            await db.execute(text(f"ALTER TABLE post DETACH PARTITION {nome_particao(mes)}"))
+            destacadas.append(mes)
+            metricas.incrementar("particoes.destacadas")
+    return destacadas
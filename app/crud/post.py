@@ -1,11 +1,36 @@
-from sqlalchemy import select, desc, asc, case, bindparam, Integer, literal
+import os
+from typing import List, Optional
+from sqlalchemy import select, desc, asc, case, bindparam, Integer, literal, any_, func, true, cast, String, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
 from databases import Database
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from app.models.post import post
+from app.models.post import post, post_arquivo
 from app.models.usuario import usuario
-from app.models.seguir import seguir
+from app.models.like import like, like_bucket
+from app.models.ranking import post_score
 from app.schemas.post import PostCreate
+from app.cache.grafo import grafo
+from app.crud import ranking as ranking_crud
+from app.crud import versao as versao_crud
+from app.cache import singleflight
+from app.cache.singleflight import coalescer
+from app import metricas
+
+
+def _post_com_autor():
+    # Contas excluídas (tombstone) somem das leituras antes mesmo da purga
+    return post.join(
+        usuario,
+        (post.c.usuario_id == usuario.c.id) & usuario.c.excluido_em.is_(None),
+    )
+
+
+def _invalidar_autor(usuario_id: int):
+    # timeline e contadores do autor mudaram
+    singleflight.invalidar("get_posts_por_usuario", usuario_id)
+    singleflight.invalidar("stats_usuario", usuario_id)
+    singleflight.invalidar("marcas_usuario", usuario_id)
 
 
 def _row_to_response(row):
@@ -23,12 +48,19 @@ def _row_to_response(row):
 async def create_post(db: Database, post_data: PostCreate, usuario_id: int):
     agora = datetime.now(timezone.utc)
 
-    query = post.insert().values(
-        post=post_data.post,
-        usuario_id=usuario_id,
-        data_criacao=agora,
+    # INSERT ... SELECT FROM usuario: autor excluído (tombstone) não cria post, senão
+    # o DELETE final da purga falharia pela FK
+    origem = select(literal(post_data.post, String), usuario.c.id, literal(agora, DateTime(timezone=True))).where(
+        (usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None)
     )
-    post_id = await db.execute(query)
+    query = post.insert().from_select(["post", "usuario_id", "data_criacao"], origem).returning(post.c.id)
+    # post e score juntos: sem o score o post some do feed ranked
+    async with db.transaction():
+        post_id = await db.fetch_val(query)
+        if post_id is None:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        await ranking_crud.registrar_post(db, post_id, usuario_id, agora)
+    _invalidar_autor(usuario_id)
 
     select_query = (
         select(
@@ -38,7 +70,7 @@ async def create_post(db: Database, post_data: PostCreate, usuario_id: int):
             usuario.c.id.label("usuario_id"),
             usuario.c.nome.label("usuario_nome"),
         )
-        .select_from(post.join(usuario, post.c.usuario_id == usuario.c.id))
+        .select_from(_post_com_autor())
         .where(post.c.id == post_id)
     )
 
@@ -46,6 +78,62 @@ async def create_post(db: Database, post_data: PostCreate, usuario_id: int):
     return _row_to_response(row)
 
 
+POST_BATCH_MAX = int(os.getenv("POST_BATCH_MAX", "100"))
+
+
+async def create_posts(db: Database, posts_data: List[PostCreate], usuario_id: int) -> list:
+    """
+    Cria vários posts do mesmo autor numa única instrução:
+
+        WITH novos AS (INSERT INTO post ... SELECT FROM unnest(:textos, :datas) ... RETURNING ...)
+        SELECT novos.*, usuario.nome FROM novos JOIN usuario ...
+
+    O tamanho do lote não muda o SQL (arrays bindados), então o statement preparado é
+    reaproveitado. Cada post ganha 1µs a mais que o anterior para manter a ordem do lote
+    nas timelines. Efeitos colaterais (score do ranking, caches do autor) saem uma vez por lote.
+    """
+    if not posts_data:
+        return []
+    agora = datetime.now(timezone.utc)
+    textos = [p.post for p in posts_data]
+    datas = [agora + timedelta(microseconds=i) for i in range(len(posts_data))]
+
+    linhas = (
+        func.unnest(
+            # cast explícito: sem ele o Postgres não sabe qual unnest usar
+            cast(bindparam("textos", type_=ARRAY(String), value=textos), ARRAY(String)),
+            cast(bindparam("datas", type_=ARRAY(DateTime(timezone=True)), value=datas), ARRAY(DateTime(timezone=True))),
+        )
+        .table_valued("post", "data_criacao")
+        .render_derived(name="linhas")
+    )
+    # autor inexistente ou excluído (tombstone): nada é inserido -> 404, como em create_post
+    origem = (
+        select(linhas.c.post, usuario.c.id, linhas.c.data_criacao)
+        .select_from(linhas.join(usuario, true()))
+        .where((usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None))
+    )
+    novos = (
+        post.insert()
+        .from_select(["post", "usuario_id", "data_criacao"], origem)
+        .returning(post.c.id, post.c.post, post.c.data_criacao, post.c.usuario_id)
+        .cte("novos")
+    )
+    query = (
+        select(novos, usuario.c.nome.label("usuario_nome"))
+        .select_from(novos.join(usuario, usuario.c.id == novos.c.usuario_id))
+        .order_by(novos.c.data_criacao)
+    )
+
+    async with db.transaction():
+        rows = await db.fetch_all(query)
+        await ranking_crud.registrar_posts(db, rows)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    _invalidar_autor(usuario_id)
+    return [_row_to_response(r) for r in rows]
+
+
 async def get_posts(db: Database, limit: int = 50, offset: int = 0, sort: str = "-data"):
     """
     Lista posts com paginação.
@@ -63,7 +151,7 @@ async def get_posts(db: Database, limit: int = 50, offset: int = 0, sort: str =
             usuario.c.id.label("usuario_id"),
             usuario.c.nome.label("usuario_nome"),
         )
-        .select_from(post.join(usuario, post.c.usuario_id == usuario.c.id))
+        .select_from(_post_com_autor())
         .order_by(order_col)
         .limit(limit)
         .offset(offset)
@@ -72,28 +160,88 @@ async def get_posts(db: Database, limit: int = 50, offset: int = 0, sort: str =
     return [_row_to_response(r) for r in rows]
 
 
+# Feed e timeline leem primeiro só os últimos N dias (poda as partições antigas de post);
+# a consulta sem janela fica de reserva para quando a janela não basta.
+FEED_JANELA_DIAS = int(os.getenv("FEED_JANELA_DIAS", "30"))
+
+
+def _inicio_janela() -> Optional[datetime]:
+    if FEED_JANELA_DIAS <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=FEED_JANELA_DIAS)
+
+
+@coalescer()
 async def get_posts_por_usuario(
     db: Database, usuario_id: int, limit: int = 50, offset: int = 0
 ):
     """
     Timeline pública do usuário (paginada).
+    Página cheia dentro da janela = mesma resposta da consulta completa (ordem só por data).
+    Quando os posts quentes do autor acabam, a página é completada com post_arquivo
+    (tudo lá é mais antigo que qualquer post quente).
     """
+    def _query(desde=None):
+        query = (
+            select(
+                post.c.id,
+                post.c.post,
+                post.c.data_criacao,
+                usuario.c.id.label("usuario_id"),
+                usuario.c.nome.label("usuario_nome"),
+            )
+            .select_from(_post_com_autor())
+            .where(usuario.c.id == usuario_id)
+            .order_by(desc(post.c.data_criacao))
+            .limit(limit)
+            .offset(offset)
+        )
+        if desde is not None:
+            query = query.where(post.c.data_criacao >= desde)
+        return query
+
+    desde = _inicio_janela()
+    if desde is not None:
+        rows = await db.fetch_all(_query(desde))
+        if len(rows) == limit:
+            return [_row_to_response(r) for r in rows]
+        metricas.incrementar("post.janela_fallback")
+    rows = await db.fetch_all(_query())
+    if len(rows) < limit:
+        rows = list(rows) + await _timeline_arquivo(db, usuario_id, limit - len(rows), offset, len(rows))
+    return [_row_to_response(r) for r in rows]
+
+
+async def _timeline_arquivo(db: Database, usuario_id: int, limit: int, offset: int, quentes_na_pagina: int):
+    if quentes_na_pagina:
+        # a página já consumiu o fim da parte quente: o arquivo entra do começo
+        offset_arquivo = 0
+    else:
+        quentes = await db.fetch_val(
+            select(func.count()).select_from(post).where(post.c.usuario_id == usuario_id)
+        )
+        offset_arquivo = max(offset - quentes, 0)
     query = (
         select(
-            post.c.id,
-            post.c.post,
-            post.c.data_criacao,
+            post_arquivo.c.id,
+            post_arquivo.c.post,
+            post_arquivo.c.data_criacao,
             usuario.c.id.label("usuario_id"),
             usuario.c.nome.label("usuario_nome"),
         )
-        .select_from(post.join(usuario, post.c.usuario_id == usuario.c.id))
+        .select_from(post_arquivo.join(
+            usuario,
+            (post_arquivo.c.usuario_id == usuario.c.id) & usuario.c.excluido_em.is_(None),
+        ))
         .where(usuario.c.id == usuario_id)
-        .order_by(desc(post.c.data_criacao))
+        .order_by(desc(post_arquivo.c.data_criacao))
         .limit(limit)
-        .offset(offset)
+        .offset(offset_arquivo)
     )
     rows = await db.fetch_all(query)
-    return [_row_to_response(r) for r in rows]
+    if rows:
+        metricas.incrementar("arquivo.leituras")
+    return list(rows)
 
 
 async def get_feed(db: Database, viewer_id: int, limit: int = 50, offset: int = 0):
@@ -101,34 +249,58 @@ async def get_feed(db: Database, viewer_id: int, limit: int = 50, offset: int =
     Feed:
         - Primeiro posts de quem o viewer segue (prioridade=0), depois os demais (prioridade=1)
         - Dentro de cada grupo, ordem decrescente por data.
-        - Binda viewer_id no próprio bindparam (sem passar values no fetch_all).
+        - Quem o viewer segue vem do cache do grafo (app/cache/grafo.py) e é bindado
+          como um único array, no lugar da subquery em `seguir`.
+        - Tenta primeiro só a janela de FEED_JANELA_DIAS (partições recentes).
     """
+    seguidos = list(await grafo.seguindo(db, viewer_id))
     # binda com tipo e valor para evitar inferência errada (asyncpg esperando str)
-    viewer_bp = bindparam("viewer_id", type_=Integer, value=viewer_id)
-
-    sub_following = select(seguir.c.seguido_id).where(seguir.c.seguidor_id == viewer_bp)
+    seguidos_bp = bindparam("seguidos", type_=ARRAY(Integer), value=seguidos)
 
     prioridade = case(
-        (post.c.usuario_id.in_(sub_following), literal(0).cast(Integer)),
+        (post.c.usuario_id == any_(seguidos_bp), literal(0).cast(Integer)),
         else_=literal(1).cast(Integer),
     ).label("prioridade")
 
-    query = (
-        select(
-            prioridade,
-            post.c.id,
-            post.c.post,
-            post.c.data_criacao,
-            usuario.c.id.label("usuario_id"),
-            usuario.c.nome.label("usuario_nome"),
+    def _query(desde=None):
+        query = (
+            select(
+                prioridade,
+                post.c.id,
+                post.c.post,
+                post.c.data_criacao,
+                usuario.c.id.label("usuario_id"),
+                usuario.c.nome.label("usuario_nome"),
+            )
+            .select_from(_post_com_autor())
+            .order_by(prioridade.asc(), desc(post.c.data_criacao))
+            .limit(limit)
+            .offset(offset)
         )
-        .select_from(post.join(usuario, post.c.usuario_id == usuario.c.id))
-        .order_by(prioridade.asc(), desc(post.c.data_criacao))
-        .limit(limit)
-        .offset(offset)
-    )
+        if desde is not None:
+            query = query.where(post.c.data_criacao >= desde)
+        return query
 
-    rows = await db.fetch_all(query)
+    rows = None
+    desde = _inicio_janela()
+    if desde is not None:
+        rows = await db.fetch_all(_query(desde))
+        # A página da janela é a mesma da consulta completa se estiver cheia e nenhum post
+        # antigo puder entrar nela: posts antigos de seguidos vêm antes dos não seguidos.
+        exata = len(rows) == limit and (
+            all(r.prioridade == 0 for r in rows)
+            or not seguidos
+            or await db.fetch_val(
+                select(post.c.id)
+                .where((post.c.usuario_id == any_(seguidos_bp)) & (post.c.data_criacao < desde))
+                .limit(1)
+            ) is None
+        )
+        if not exata:
+            metricas.incrementar("post.janela_fallback")
+            rows = None
+    if rows is None:
+        rows = await db.fetch_all(_query())
 
     # Descarta 'prioridade' no response
     return [
@@ -142,12 +314,29 @@ async def get_feed(db: Database, viewer_id: int, limit: int = 50, offset: int =
     ]
 
 
+async def apagar_dependentes(db: Database, post_ids: List[int]):
+    """Likes, buckets de trending e score dos posts apagados (antes feito por ON DELETE CASCADE)."""
+    if not post_ids:
+        return
+    ids_bp = bindparam("post_ids", type_=ARRAY(Integer), value=list(post_ids))
+    for tabela in (like, like_bucket, post_score):
+        await db.execute(tabela.delete().where(tabela.c.post_id == any_(ids_bp)))
+
+
 async def delete_post(db: Database, post_id: int, usuario_id: int):
-    dono_query = select(post.c.usuario_id).where(post.c.id == post_id)
-    dono_row = await db.fetch_one(dono_query)
+    for tabela in (post, post_arquivo):
+        dono_row = await db.fetch_one(select(tabela.c.usuario_id).where(tabela.c.id == post_id))
+        if dono_row:
+            break
     if not dono_row:
         raise HTTPException(status_code=404, detail="Post não encontrado")
     if dono_row.usuario_id != usuario_id:
         raise HTTPException(status_code=403, detail="Sem permissão para deletar este post")
-    await db.execute(post.delete().where(post.c.id == post_id))
+    async with db.transaction():
+        await db.execute(tabela.delete().where(tabela.c.id == post_id))
+        # sem FK em cascata (post é particionado): dependentes saem aqui
+        await apagar_dependentes(db, [post_id])
+    # apagar não muda o último post id: sobe a versão para os ETags do autor
+    await versao_crud.incrementar(db, [usuario_id])
+    _invalidar_autor(usuario_id)
     return {"deleted": True, "id": post_id}
@@ -0,0 +1,183 @@
+import os
+from datetime import datetime, timezone
+from databases import Database
+from sqlalchemy import select, tuple_, or_, exists
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.usuario import usuario
+from app.models.post import post, post_arquivo
+from app.models.like import like
+from app.models.seguir import seguir
+from app.models.purga import purga_usuario
+from app.cache.grafo import grafo
+from app.crud import sugestao as sugestao_crud
+from app.crud import ranking as ranking_crud
+from app.crud import versao as versao_crud
+from app.crud import post as post_crud
+from app.cache import singleflight
+
+PURGA_CHUNK = int(os.getenv("PURGA_CHUNK", "500"))
+
+# Ordem da purga: dependentes primeiro, o usuário por último
+FASES = ["likes_dados", "likes_recebidos", "seguir", "posts", "usuario"]
+
+
+async def _purgar_likes_dados(db: Database, usuario_id: int, chunk: int, apos_commit: list) -> int:
+    alvo = select(like.c.usuario_id, like.c.post_id).where(like.c.usuario_id == usuario_id).limit(chunk)
+    q = (
+        like.delete()
+        .where(tuple_(like.c.usuario_id, like.c.post_id).in_(alvo))
+        .returning(like.c.post_id)
+    )
+    rows = await db.fetch_all(q)
+    await ranking_crud.descontar_likes(db, [r["post_id"] for r in rows])
+    return len(rows)
+
+
+async def _purgar_likes_recebidos(db: Database, usuario_id: int, chunk: int, apos_commit: list) -> int:
+    posts_do_usuario = select(post.c.id).where(post.c.usuario_id == usuario_id).union_all(
+        select(post_arquivo.c.id).where(post_arquivo.c.usuario_id == usuario_id)
+    )
+    alvo = (
+        select(like.c.usuario_id, like.c.post_id)
+        .where(like.c.post_id.in_(posts_do_usuario))
+        .limit(chunk)
+    )
+    q = (
+        like.delete()
+        .where(tuple_(like.c.usuario_id, like.c.post_id).in_(alvo))
+        .returning(like.c.post_id)
+    )
+    return len(await db.fetch_all(q))
+
+
+async def _purgar_seguir(db: Database, usuario_id: int, chunk: int, apos_commit: list) -> int:
+    alvo = (
+        select(seguir.c.seguidor_id, seguir.c.seguido_id)
+        .where(or_(seguir.c.seguidor_id == usuario_id, seguir.c.seguido_id == usuario_id))
+        .limit(chunk)
+    )
+    q = (
+        seguir.delete()
+        .where(tuple_(seguir.c.seguidor_id, seguir.c.seguido_id).in_(alvo))
+        .returning(seguir.c.seguidor_id, seguir.c.seguido_id)
+    )
+    rows = await db.fetch_all(q)
+    # contadores do outro lado mudaram
+    outros = {r["seguidor_id"] for r in rows} | {r["seguido_id"] for r in rows}
+    outros.discard(usuario_id)
+    await versao_crud.incrementar(db, outros)
+
+    # caches do processo só depois do commit: num rollback as arestas continuam no banco
+    def _atualizar_caches():
+        for r in rows:
+            grafo.remover_aresta(r["seguidor_id"], r["seguido_id"])
+        for uid in outros:
+            singleflight.invalidar("stats_usuario", uid)
+
+    apos_commit.append(_atualizar_caches)
+    # quem seguia o usuário excluído perde um vizinho: recalcula as sugestões dele
+    await sugestao_crud.marcar_pendentes(
+        db, [r["seguidor_id"] for r in rows if r["seguidor_id"] != usuario_id]
+    )
+    return len(rows)
+
+
+async def _purgar_posts(db: Database, usuario_id: int, chunk: int, apos_commit: list) -> int:
+    # quentes primeiro; o que sobrar do chunk vai para os arquivados
+    ids = []
+    for tabela in (post, post_arquivo):
+        if len(ids) >= chunk:
+            break
+        alvo = select(tabela.c.id).where(tabela.c.usuario_id == usuario_id).limit(chunk - len(ids))
+        q = tabela.delete().where(tabela.c.id.in_(alvo)).returning(tabela.c.id)
+        ids += [r["id"] for r in await db.fetch_all(q)]
+    await post_crud.apagar_dependentes(db, ids)
+    return len(ids)
+
+
+async def _purgar_usuario(db: Database, usuario_id: int, chunk: int, apos_commit: list) -> int:
+    # Qualquer dependente sem ON DELETE criado durante a purga (post quente ou arquivado,
+    # follow em qualquer direção) faria o DELETE falhar por FK e travar a fila de purgas;
+    # nesse caso a purga recomeça da primeira fase.
+    restantes = await db.fetch_val(
+        select(
+            exists().where(post.c.usuario_id == usuario_id)
+            | exists().where(post_arquivo.c.usuario_id == usuario_id)
+            | exists().where(or_(seguir.c.seguidor_id == usuario_id, seguir.c.seguido_id == usuario_id))
+        )
+    )
+    if restantes:
+        return -1
+    q = usuario.delete().where(usuario.c.id == usuario_id).returning(usuario.c.id)
+    return len(await db.fetch_all(q))
+
+
+_EXECUTORES = {
+    "likes_dados": _purgar_likes_dados,
+    "likes_recebidos": _purgar_likes_recebidos,
+    "seguir": _purgar_seguir,
+    "posts": _purgar_posts,
+    "usuario": _purgar_usuario,
+}
+
+
+async def agendar_purga(db: Database, usuario_id: int):
+    """
+    Registra a purga do usuário (idempotente). Deve rodar na mesma transação do tombstone.
+    """
+    stmt = insert(purga_usuario).values(usuario_id=usuario_id, fase=FASES[0], removidos=0)
+    stmt = stmt.on_conflict_do_nothing(index_elements=["usuario_id"])
+    await db.execute(stmt)
+
+
+async def executar_passo(db: Database, chunk: int = PURGA_CHUNK) -> bool:
+    """
+    Processa UM lote da purga pendente mais antiga, numa transação curta.
+    Retorna False quando não há trabalho pendente.
+    SKIP LOCKED permite mais de uma instância rodando o worker sem disputa.
+    Efeitos em caches do processo (apos_commit) só rodam se a transação confirmar.
+    """
+    apos_commit = []
+    async with db.transaction():
+        row = await db.fetch_one(
+            select(purga_usuario)
+            .where(purga_usuario.c.concluido_em.is_(None))
+            .order_by(purga_usuario.c.criado_em)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if not row:
+            return False
+
+        fase = row["fase"]
+        removidos = await _EXECUTORES[fase](db, row["usuario_id"], chunk, apos_commit)
+
+        agora = datetime.now(timezone.utc)
+        valores = {"atualizado_em": agora}
+        if removidos < 0:
+            valores["fase"] = FASES[0]
+        else:
+            valores["removidos"] = row["removidos"] + removidos
+            if removidos < chunk:
+                # fase esgotada: avança (ou conclui)
+                idx = FASES.index(fase)
+                if idx + 1 < len(FASES):
+                    valores["fase"] = FASES[idx + 1]
+                else:
+                    valores["concluido_em"] = agora
+
+        await db.execute(
+            purga_usuario.update()
+            .where(purga_usuario.c.usuario_id == row["usuario_id"])
+            .values(**valores)
+        )
+    for fn in apos_commit:
+        fn()
+    return True
+
+
+async def status_purga(db: Database, usuario_id: int):
+    return await db.fetch_one(
+        select(purga_usuario).where(purga_usuario.c.usuario_id == usuario_id)
+    )
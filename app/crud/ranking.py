@@ -0,0 +1,286 @@
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Tuple
+from databases import Database
+from sqlalchemy import select, func, desc, literal, exists, Float, Integer, bindparam, any_, cast
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models.post import post
+from app.models.like import like
+from app.models.usuario import usuario
+from app.models.ranking import post_score, afinidade
+
+# Segundos para um post "valer" 1 ponto de log(likes) a mais (~12.5h, como no hot do Reddit)
+DECAIMENTO = float(os.getenv("FEED_RANKED_DECAIMENTO", "45000"))
+PESO_AFINIDADE = float(os.getenv("FEED_RANKED_PESO_AFINIDADE", "1.0"))
+# Quantos posts, em ordem de hot, entram na re-ordenação por afinidade
+CANDIDATOS = int(os.getenv("FEED_RANKED_CANDIDATOS", "500"))
+# Posts por lote em completar_scores (worker de ranking)
+SCORES_LOTE = int(os.getenv("FEED_RANKED_SCORES_LOTE", "1000"))
+
+
+def calcular_hot(likes: int, data_criacao: datetime) -> float:
+    return math.log(1 + likes) + data_criacao.timestamp() / DECAIMENTO
+
+
+def _hot_sql(likes_expr):
+    return func.ln(1 + likes_expr) + func.extract("epoch", post_score.c.data_criacao) / DECAIMENTO
+
+
+async def registrar_post(db: Database, post_id: int, usuario_id: int, data_criacao: datetime):
+    await db.execute(
+        post_score.insert().values(
+            post_id=post_id,
+            usuario_id=usuario_id,
+            data_criacao=data_criacao,
+            likes=0,
+            hot=calcular_hot(0, data_criacao),
+        )
+    )
+
+
+async def registrar_posts(db: Database, posts: list):
+    """Versão em lote de registrar_post: um único INSERT multi-linha (`posts` com id, usuario_id, data_criacao)."""
+    if not posts:
+        return
+    await db.execute(
+        post_score.insert().values([
+            {
+                "post_id": p["id"],
+                "usuario_id": p["usuario_id"],
+                "data_criacao": p["data_criacao"],
+                "likes": 0,
+                "hot": calcular_hot(0, p["data_criacao"]),
+            }
+            for p in posts
+        ])
+    )
+
+
+def _unnest(nome: str, *colunas):
+    """FROM unnest(:a, :b, ...) AS nome(a, b, ...) a partir de (coluna, tipo, valores)."""
+    return (
+        func.unnest(*(
+            # cast explícito: sem ele o Postgres não sabe qual unnest usar
+            cast(bindparam(f"{nome}_{c}", type_=ARRAY(t), value=v), ARRAY(t))
+            for c, t, v in colunas
+        ))
+        .table_valued(*(c for c, _, _ in colunas))
+        .render_derived(name=nome)
+    )
+
+
+def _somar(eventos, chave) -> dict:
+    """Soma os deltas por chave, descartando as que se anulam (like + unlike no mesmo lote)."""
+    somas = defaultdict(int)
+    for ev in eventos:
+        somas[chave(ev)] += ev[-1]
+    return {k: v for k, v in sorted(somas.items()) if v}
+
+
+async def registrar_likes(db: Database, eventos: List[Tuple[int, int, int]]):
+    """
+    Aplica um lote de (usuario_id, post_id, delta ±1) no score dos posts e na afinidade
+    viewer -> autor. Deltas são somados por post e por par (viewer, autor): um UPDATE por
+    tabela, com as linhas em ordem fixa (sem deadlock entre lotes concorrentes).
+    Chamado pelo tratador da fila de likes (app/crud/like.py).
+    """
+    por_post = _somar(eventos, lambda ev: ev[1])
+    if por_post:
+        d = _unnest("d", ("post_id", Integer, list(por_post)), ("delta", Integer, list(por_post.values())))
+        await db.execute(
+            post_score.update()
+            .where(post_score.c.post_id == d.c.post_id)
+            .values(likes=post_score.c.likes + d.c.delta, hot=_hot_sql(post_score.c.likes + d.c.delta))
+        )
+
+    ids_bp = bindparam("post_ids", type_=ARRAY(Integer), value=sorted({ev[1] for ev in eventos}))
+    autores = {
+        r["post_id"]: r["usuario_id"]
+        for r in await db.fetch_all(
+            select(post_score.c.post_id, post_score.c.usuario_id).where(post_score.c.post_id == any_(ids_bp))
+        )
+    }
+    por_par = _somar(
+        [(u, autores[p], dl) for u, p, dl in eventos if p in autores and autores[p] != u],
+        lambda ev: (ev[0], ev[1]),
+    )
+    positivos = [(u, a, dl) for (u, a), dl in por_par.items() if dl > 0]
+    if positivos:
+        d = _unnest(
+            "d",
+            ("usuario_id", Integer, [p[0] for p in positivos]),
+            ("autor_id", Integer, [p[1] for p in positivos]),
+            ("likes", Integer, [p[2] for p in positivos]),
+        )
+        # o like pode ter sido enfileirado antes de um dos usuários ser purgado: pula o par (FK)
+        existentes = select(usuario.c.id)
+        origem = select(d.c.usuario_id, d.c.autor_id, d.c.likes).where(
+            d.c.usuario_id.in_(existentes) & d.c.autor_id.in_(existentes)
+        )
+        stmt = insert(afinidade).from_select(["usuario_id", "autor_id", "likes"], origem)
+        stmt = stmt.on_conflict_do_update(
+            constraint="afinidade_pkey",
+            set_={"likes": afinidade.c.likes + stmt.excluded.likes},
+        )
+        await db.execute(stmt)
+    negativos = [(u, a, dl) for (u, a), dl in por_par.items() if dl < 0]
+    if negativos:
+        d = _unnest(
+            "d",
+            ("usuario_id", Integer, [n[0] for n in negativos]),
+            ("autor_id", Integer, [n[1] for n in negativos]),
+            ("delta", Integer, [n[2] for n in negativos]),
+        )
+        await db.execute(
+            afinidade.update()
+            .where((afinidade.c.usuario_id == d.c.usuario_id) & (afinidade.c.autor_id == d.c.autor_id))
+            .values(likes=func.greatest(afinidade.c.likes + d.c.delta, 0))
+        )
+
+
+async def descontar_likes(db: Database, post_ids: List[int]):
+    """-1 like em cada post da lista (purga de likes em lote; a afinidade some com o usuário)."""
+    if not post_ids:
+        return
+    ids_bp = bindparam("post_ids", type_=ARRAY(Integer), value=list(post_ids))
+    await db.execute(
+        post_score.update()
+        .where(post_score.c.post_id == any_(ids_bp))
+        .values(
+            likes=func.greatest(post_score.c.likes - 1, 0),
+            hot=_hot_sql(func.greatest(post_score.c.likes - 1, 0)),
+        )
+    )
+
+
+def query_feed_ranked(viewer_id: int, limit: int = 50, offset: int = 0, candidatos: Optional[int] = None):
+    """
+    Feed ranqueado em duas etapas, ambas baratas:
+        1) top (offset + limit + CANDIDATOS) pelo índice de `hot`;
+        2) re-ordena só esses somando a afinidade do viewer com o autor.
+    """
+    n = offset + limit + (CANDIDATOS if candidatos is None else candidatos)
+    viewer_bp = bindparam("viewer_id", type_=Integer, value=viewer_id)
+
+    cand = (
+        select(post_score.c.post_id, post_score.c.usuario_id, post_score.c.data_criacao, post_score.c.hot)
+        .order_by(desc(post_score.c.hot))
+        .limit(n)
+        .subquery("cand")
+    )
+    af = afinidade.alias("af")
+    score = (
+        cand.c.hot
+        + func.coalesce(func.ln(1 + af.c.likes), literal(0.0, Float)) * PESO_AFINIDADE
+    ).label("score")
+
+    return (
+        select(
+            score,
+            post.c.id,
+            post.c.post,
+            post.c.data_criacao,
+            usuario.c.id.label("usuario_id"),
+            usuario.c.nome.label("usuario_nome"),
+        )
+        .select_from(
+            # data_criacao junto do id: casa a PK de post e poda partições por candidato
+            cand.join(post, (post.c.id == cand.c.post_id) & (post.c.data_criacao == cand.c.data_criacao))
+            .join(usuario, (usuario.c.id == cand.c.usuario_id) & usuario.c.excluido_em.is_(None))
+            .outerjoin(af, (af.c.usuario_id == viewer_bp) & (af.c.autor_id == cand.c.usuario_id))
+        )
+        .order_by(desc(score), desc(post.c.data_criacao))
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+async def get_feed_ranked(db: Database, viewer_id: int, limit: int = 50, offset: int = 0):
+    rows = await db.fetch_all(query_feed_ranked(viewer_id, limit=limit, offset=offset))
+    return [
+        {
+            "id": r.id,
+            "post": r.post,
+            "data_criacao": r.data_criacao,
+            "usuario": {"id": r.usuario_id, "nome": r.usuario_nome},
+        }
+        for r in rows
+    ]
+
+
+async def backfill_scores(db: Database) -> int:
+    """
+    Preenche post_score / afinidade a partir de post e like (após o deploy ou para avaliação).
+    Idempotente: recalcula tudo a partir das tabelas de origem.
+    """
+    likes_por_post = (
+        select(like.c.post_id, func.count().label("n"))
+        .group_by(like.c.post_id)
+        .subquery()
+    )
+    n_likes = func.coalesce(likes_por_post.c.n, 0)
+    origem = select(
+        post.c.id,
+        post.c.usuario_id,
+        post.c.data_criacao,
+        n_likes,
+        func.ln(1 + n_likes) + func.extract("epoch", post.c.data_criacao) / DECAIMENTO,
+    ).select_from(post.outerjoin(likes_por_post, likes_por_post.c.post_id == post.c.id))
+
+    stmt = insert(post_score).from_select(
+        ["post_id", "usuario_id", "data_criacao", "likes", "hot"], origem
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["post_id"],
+        set_={"likes": stmt.excluded.likes, "hot": stmt.excluded.hot},
+    )
+
+    af_origem = (
+        select(like.c.usuario_id, post.c.usuario_id, func.count())
+        .select_from(like.join(post, post.c.id == like.c.post_id))
+        .where(like.c.usuario_id != post.c.usuario_id)
+        .group_by(like.c.usuario_id, post.c.usuario_id)
+    )
+    af_stmt = insert(afinidade).from_select(["usuario_id", "autor_id", "likes"], af_origem)
+    af_stmt = af_stmt.on_conflict_do_update(
+        constraint="afinidade_pkey", set_={"likes": af_stmt.excluded.likes}
+    )
+
+    async with db.transaction():
+        await db.execute(stmt)
+        await db.execute(af_stmt)
+    return int(await db.fetch_val(select(func.count()).select_from(post_score)))
+
+
+async def completar_scores(db: Database, depois_de: int, lote: int = SCORES_LOTE) -> Optional[int]:
+    """
+    Cria o post_score que falta para os próximos `lote` posts (por id) depois de `depois_de`:
+    posts anteriores ao feed ranqueado nunca passaram por registrar_post e não seriam
+    candidatos. Não mexe em scores existentes (ON CONFLICT DO NOTHING).
+    Retorna o último id visto, ou None quando não há mais posts.
+    """
+    ids = [
+        r["id"]
+        for r in await db.fetch_all(
+            select(post.c.id).where(post.c.id > depois_de).order_by(post.c.id).limit(lote)
+        )
+    ]
+    if not ids:
+        return None
+    n_likes = select(func.count()).where(like.c.post_id == post.c.id).scalar_subquery()
+    origem = select(
+        post.c.id,
+        post.c.usuario_id,
+        post.c.data_criacao,
+        n_likes,
+        func.ln(1 + n_likes) + func.extract("epoch", post.c.data_criacao) / DECAIMENTO,
+    ).where(
+        (post.c.id == any_(bindparam("ids", type_=ARRAY(Integer), value=ids)))
+        & ~exists().where(post_score.c.post_id == post.c.id)
+    )
+    stmt = insert(post_score).from_select(["post_id", "usuario_id", "data_criacao", "likes", "hot"], origem)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["post_id"]))
+    return ids[-1]
@@ -1,32 +1,211 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
 from databases import Database
+from fastapi import HTTPException
+from sqlalchemy import select, func, true, tuple_, any_, bindparam, literal, exists, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from app.models.seguir import seguir
 from app.models.usuario import usuario
+from app.cache.grafo import grafo, SEGUIDORES
+from app.crud import sugestao as sugestao_crud
+from app.crud import versao as versao_crud
+from app.crud import notificacao as notificacao_crud
+from app.workers import fila as fila_worker
+from app.cache import singleflight
+from app.paginacao import codificar_cursor, decodificar_cursor
 
-async def seguir_usuario(db: Database, seguidor_id: int, seguido_id: int):
-    query = seguir.insert().values(seguidor_id=seguidor_id, seguido_id=seguido_id)
-    await db.execute(query)
-    return {"seguidor_id": seguidor_id, "seguido_id": seguido_id}
+def _invalidar_stats(*usuario_ids: int):
+    for uid in usuario_ids:
+        singleflight.invalidar("stats_usuario", uid)
 
-async def listar_seguidos(db: Database, seguidor_id: int):
-    query = usuario.select().where(
-        usuario.c.id.in_(
-            seguir.select().with_only_columns(seguir.c.seguido_id).where(
-                seguir.c.seguidor_id == seguidor_id
-            )
-        )
+def _ativo(usuario_id):
+    """EXISTS: usuário existe e não foi excluído (tombstone)."""
+    return exists().where((usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None))
+
+async def seguir_usuario(db: Database, seguidor_id: int, seguido_id: int):
+    if seguidor_id == seguido_id:
+        raise HTTPException(status_code=400, detail="Não é possível seguir a si mesmo")
+    # INSERT ... SELECT: conta excluída (dos dois lados) não ganha follow novo; um follow
+    # criado depois da fase "seguir" da purga impediria o DELETE final do usuário
+    origem = select(literal(seguidor_id, Integer), literal(seguido_id, Integer)).where(
+        _ativo(seguidor_id) & _ativo(seguido_id)
+    )
+    query = (
+        insert(seguir)
+        .from_select(["seguidor_id", "seguido_id"], origem)
+        .on_conflict_do_nothing(index_elements=["seguidor_id", "seguido_id"])
+        .returning(seguir.c.seguido_id)
     )
-    return await db.fetch_all(query)
+    async with db.transaction():
+        if await db.fetch_one(query) is None:
+            # nada inserido: ou um dos dois não existe/foi excluído, ou já segue
+            ambos = select(_ativo(seguidor_id) & _ativo(seguido_id))
+            if not await db.fetch_val(ambos):
+                raise HTTPException(status_code=404, detail="Usuário não encontrado")
+            raise HTTPException(status_code=409, detail="Já segue este usuário")
+        await notificacao_crud.enfileirar_seguidos(db, seguidor_id, [seguido_id])
+    fila_worker.acordar.set()
+    grafo.adicionar_aresta(seguidor_id, seguido_id)
+    await versao_crud.incrementar(db, [seguidor_id, seguido_id])
+    _invalidar_stats(seguidor_id, seguido_id)
+    await sugestao_crud.marcar_pendente(db, seguidor_id)
+    return {"seguidor_id": seguidor_id, "seguido_id": seguido_id}
 
 async def deixar_de_seguir(db: Database, seguidor_id: int, seguido_id: int):
-    query = seguir.delete().where(
-        (seguir.c.seguidor_id == seguidor_id) & (seguir.c.seguido_id == seguido_id)
+    query = (
+        seguir.delete()
+        .where((seguir.c.seguidor_id == seguidor_id) & (seguir.c.seguido_id == seguido_id))
+        .returning(seguir.c.seguido_id)
     )
-    result = await db.execute(query)
+    async with db.transaction():
+        removido = await db.fetch_one(query)
+    # unfollow repetido não mexe em caches, versões (ETags) nem sugestões
+    if removido is not None:
+        grafo.remover_aresta(seguidor_id, seguido_id)
+        await versao_crud.incrementar(db, [seguidor_id, seguido_id])
+        _invalidar_stats(seguidor_id, seguido_id)
+        await sugestao_crud.marcar_pendente(db, seguidor_id)
     return {"deleted": True, "seguidor_id": seguidor_id, "seguido_id": seguido_id}
 
+async def aplicar_lote(db: Database, seguidor_id: int, seguir_ids: List[int], deixar_ids: List[int]) -> dict:
+    """
+    Segue/deixa de seguir uma lista de usuários de uma vez, de forma idempotente:
+        - um INSERT ... SELECT ... ON CONFLICT DO NOTHING (ignora já seguidos, o próprio
+          usuário e ids inexistentes/excluídos; seguidor excluído não segue ninguém);
+        - um DELETE ... seguido_id = ANY(...).
+    Ambos com RETURNING: caches, contadores e sugestões são atualizados uma vez só,
+    e apenas para as arestas que mudaram (só os follows novos geram notificação).
+    """
+    seguidos, deixados = [], []
+    async with db.transaction():
+        if seguir_ids:
+            ids_bp = bindparam("seguir_ids", type_=ARRAY(Integer), value=list(set(seguir_ids)))
+            alvos = select(literal(seguidor_id, Integer), usuario.c.id).where(
+                (usuario.c.id == any_(ids_bp))
+                & (usuario.c.id != seguidor_id)
+                & usuario.c.excluido_em.is_(None)
+                & _ativo(seguidor_id)
+            )
+            stmt = (
+                insert(seguir)
+                .from_select(["seguidor_id", "seguido_id"], alvos)
+                .on_conflict_do_nothing(index_elements=["seguidor_id", "seguido_id"])
+                .returning(seguir.c.seguido_id)
+            )
+            seguidos = [r["seguido_id"] for r in await db.fetch_all(stmt)]
+            await notificacao_crud.enfileirar_seguidos(db, seguidor_id, sorted(seguidos))
+        if deixar_ids:
+            ids_bp = bindparam("deixar_ids", type_=ARRAY(Integer), value=list(set(deixar_ids)))
+            stmt = (
+                seguir.delete()
+                .where((seguir.c.seguidor_id == seguidor_id) & (seguir.c.seguido_id == any_(ids_bp)))
+                .returning(seguir.c.seguido_id)
+            )
+            deixados = [r["seguido_id"] for r in await db.fetch_all(stmt)]
+
+    if seguidos or deixados:
+        if seguidos:
+            fila_worker.acordar.set()
+        for uid in seguidos:
+            grafo.adicionar_aresta(seguidor_id, uid)
+        for uid in deixados:
+            grafo.remover_aresta(seguidor_id, uid)
+        await versao_crud.incrementar(db, [seguidor_id, *seguidos, *deixados])
+        _invalidar_stats(seguidor_id, *seguidos, *deixados)
+        await sugestao_crud.marcar_pendente(db, seguidor_id)
+    return {"seguidos": sorted(seguidos), "deixados": sorted(deixados)}
+
+SEGUIR_STATUS_MAX = int(os.getenv("SEGUIR_STATUS_MAX", "300"))
+
+async def status_relacoes(db: Database, usuario_id: int, outros_ids: List[int]) -> Dict[int, dict]:
+    """
+    Para cada id: `usuario_id` segue ele? ele segue `usuario_id`?
+    Uma única consulta, as duas metades do OR resolvidas pela PK (seguidor_id, seguido_id):
+        (seguidor_id = :eu AND seguido_id = ANY(:ids)) OR (seguidor_id = ANY(:ids) AND seguido_id = :eu)
+    """
+    ids = list(dict.fromkeys(outros_ids))
+    resultado = {uid: {"eu_sigo": False, "me_segue": False} for uid in ids}
+    if not ids:
+        return resultado
+
+    ids_bp = bindparam("outros_ids", type_=ARRAY(Integer), value=ids)
+    query = select(seguir.c.seguidor_id, seguir.c.seguido_id).where(
+        ((seguir.c.seguidor_id == usuario_id) & (seguir.c.seguido_id == any_(ids_bp)))
+        | ((seguir.c.seguidor_id == any_(ids_bp)) & (seguir.c.seguido_id == usuario_id))
+    )
+    for r in await db.fetch_all(query):
+        if r["seguidor_id"] == usuario_id:
+            resultado[r["seguido_id"]]["eu_sigo"] = True
+        if r["seguido_id"] == usuario_id:
+            resultado[r["seguidor_id"]]["me_segue"] = True
+    return resultado
+
 async def remover_todas_as_relacoes_do_usuario(db: Database, usuario_id: int):
     query = seguir.delete().where(
         (seguir.c.seguidor_id == usuario_id) | (seguir.c.seguido_id == usuario_id)
+    ).returning(seguir.c.seguidor_id, seguir.c.seguido_id)
+    for r in await db.fetch_all(query):
+        grafo.remover_aresta(r["seguidor_id"], r["seguido_id"])
+    return {"removed": True, "usuario_id": usuario_id}
+
+
+# ---------- listas paginadas (seguidores / seguindo) ----------
+
+def _cursor_relacao(cursor: str):
+    data, outro_id = decodificar_cursor(cursor, 2)
+    if not isinstance(data, str) or not isinstance(outro_id, int):
+        raise ValueError("cursor inválido")
+    return datetime.fromisoformat(data), outro_id
+
+
+async def listar_relacoes(
+    db: Database, usuario_id: int, direcao: str, limit: int = 50, cursor: Optional[str] = None
+):
+    """
+    Seguidores (ou seguidos) de `usuario_id`, do follow mais recente para o mais antigo,
+    com paginação keyset sobre (data_criacao, id) e o total na MESMA consulta:
+
+        SELECT (SELECT count(*) ...) AS total, pagina.*
+        FROM usuario LEFT JOIN (... LIMIT n+1) pagina ON true
+        WHERE usuario.id = :id AND usuario.excluido_em IS NULL
+
+    O total conta as arestas (como stats_usuario); a página já omite contas excluídas.
+    Retorna None se o usuário não existir; senão (total, linhas, proximo_cursor).
+    ValueError se o cursor for inválido.
+    """
+    if direcao == SEGUIDORES:
+        col_dono, col_outro = seguir.c.seguido_id, seguir.c.seguidor_id
+    else:
+        col_dono, col_outro = seguir.c.seguidor_id, seguir.c.seguido_id
+
+    outro = usuario.alias("outro")
+    filtro = [col_dono == usuario_id, outro.c.excluido_em.is_(None)]
+    if cursor:
+        filtro.append(tuple_(seguir.c.data_criacao, col_outro) < _cursor_relacao(cursor))
+
+    pagina = (
+        select(outro.c.id, outro.c.nome, outro.c.email, seguir.c.data_criacao.label("desde"))
+        .select_from(seguir.join(outro, outro.c.id == col_outro))
+        .where(*filtro)
+        .order_by(seguir.c.data_criacao.desc(), col_outro.desc())
+        .limit(limit + 1)
+        .subquery("pagina")
+    )
+    total = select(func.count()).select_from(seguir).where(col_dono == usuario_id).scalar_subquery()
+    query = (
+        select(total.label("total"), pagina)
+        .select_from(usuario.outerjoin(pagina, true()))
+        .where((usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None))
+        .order_by(pagina.c.desde.desc(), pagina.c.id.desc())
     )
-    await db.execute(query)
-    return {"removed": True, "usuario_id": usuario_id}
\ No newline at end of file
+    rows = await db.fetch_all(query)
+    if not rows:
+        return None
+
+    itens = [r for r in rows if r["id"] is not None]
+    proximo = None
+    if len(itens) > limit:
+        itens = itens[:limit]
+        proximo = codificar_cursor(itens[-1]["desde"].isoformat(), itens[-1]["id"])
+    return int(rows[0]["total"]), itens, proximo
@@ -0,0 +1,215 @@
+import os
+from datetime import datetime, timezone
+from typing import List
+from databases import Database
+from sqlalchemy import select, func, exists, any_, bindparam, Integer, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models.seguir import seguir
+from app.models.usuario import usuario
+from app.models.sugestao import sugestao, sugestao_pendente, sugestao_expansao
+
+SUGESTOES_TOP_N = int(os.getenv("SUGESTOES_TOP_N", "50"))
+SUGESTOES_LOTE = int(os.getenv("SUGESTOES_LOTE", "500"))
+SUGESTOES_EXPANSAO_LOTE = int(os.getenv("SUGESTOES_EXPANSAO_LOTE", "1000"))
+
+
+async def marcar_pendente(db: Database, usuario_id: int):
+    """
+    Aresta saindo de `usuario_id` mudou: os amigos-de-amigos dele e de quem o segue
+    mudam junto. Na requisição só o próprio usuário é marcado (e a expansão registrada,
+    numa única instrução); os seguidores, que podem ser milhões, ficam para o worker
+    (expandir_pendentes), em lotes.
+    """
+    agora = datetime.now(timezone.utc)
+    pendente = (
+        insert(sugestao_pendente)
+        .values(usuario_id=usuario_id, marcado_em=agora)
+        .on_conflict_do_nothing(index_elements=["usuario_id"])
+        .cte("pendente")
+    )
+    stmt = insert(sugestao_expansao).values(usuario_id=usuario_id, marcado_em=agora, iniciado_em=agora)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["usuario_id"], set_={"marcado_em": stmt.excluded.marcado_em}
+    ).add_cte(pendente)
+    await db.execute(stmt)
+
+
+async def marcar_pendentes(db: Database, usuario_ids: List[int]):
+    """Marca diretamente uma lista de usuários para recálculo."""
+    if not usuario_ids:
+        return
+    stmt = insert(sugestao_pendente).values([{"usuario_id": u} for u in set(usuario_ids)])
+    stmt = stmt.on_conflict_do_nothing(index_elements=["usuario_id"])
+    await db.execute(stmt)
+
+
+async def expandir_pendentes(db: Database, lote: int = SUGESTOES_EXPANSAO_LOTE) -> bool:
+    """
+    Marca o próximo lote de seguidores de uma expansão registrada por marcar_pendente.
+    Transação curta por lote; SKIP LOCKED deixa outra instância pegar outra expansão.
+    Retorna False quando não há expansão pendente.
+    """
+    async with db.transaction():
+        row = await db.fetch_one(
+            select(sugestao_expansao)
+            .order_by(sugestao_expansao.c.marcado_em)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if not row:
+            return False
+
+        q = select(seguir.c.seguidor_id, seguir.c.data_criacao).where(seguir.c.seguido_id == row["usuario_id"])
+        if row["cursor_data"] is not None:
+            q = q.where(
+                tuple_(seguir.c.data_criacao, seguir.c.seguidor_id)
+                > tuple_(row["cursor_data"], row["cursor_seguidor_id"])
+            )
+        seguidores = await db.fetch_all(q.order_by(seguir.c.data_criacao, seguir.c.seguidor_id).limit(lote))
+        await marcar_pendentes(db, [r["seguidor_id"] for r in seguidores])
+
+        onde = sugestao_expansao.c.usuario_id == row["usuario_id"]
+        if len(seguidores) == lote:
+            ultimo = seguidores[-1]
+            await db.execute(
+                sugestao_expansao.update().where(onde).values(
+                    cursor_data=ultimo["data_criacao"], cursor_seguidor_id=ultimo["seguidor_id"]
+                )
+            )
+        elif row["marcado_em"] > row["iniciado_em"]:
+            # mudou de novo durante a passada: quem já foi marcado pode ter sido recalculado antes
+            await db.execute(
+                sugestao_expansao.update().where(onde).values(
+                    iniciado_em=row["marcado_em"], cursor_data=None, cursor_seguidor_id=None
+                )
+            )
+        else:
+            await db.execute(sugestao_expansao.delete().where(onde))
+    return True
+
+
+async def recalcular(db: Database, usuario_ids: List[int], top_n: int = SUGESTOES_TOP_N) -> int:
+    """
+    Recalcula o top-N de um lote de usuários numa única instrução set-based:
+    self-join de `seguir` (a -> b -> c), contagem de vizinhos em comum por (a, c),
+    exclusão de quem `a` já segue e ROW_NUMBER por usuário.
+    """
+    if not usuario_ids:
+        return 0
+    ids_bp = bindparam("usuario_ids", type_=ARRAY(Integer), value=list(usuario_ids))
+
+    a = seguir.alias("a")
+    b = seguir.alias("b")
+    ja = seguir.alias("ja")
+
+    candidatos = (
+        select(
+            a.c.seguidor_id.label("usuario_id"),
+            b.c.seguido_id.label("sugerido_id"),
+            func.count().label("em_comum"),
+        )
+        .select_from(a.join(b, a.c.seguido_id == b.c.seguidor_id))
+        .where(a.c.seguidor_id == any_(ids_bp))
+        .where(b.c.seguido_id != a.c.seguidor_id)
+        .where(
+            ~exists().where(
+                (ja.c.seguidor_id == a.c.seguidor_id) & (ja.c.seguido_id == b.c.seguido_id)
+            )
+        )
+        .group_by(a.c.seguidor_id, b.c.seguido_id)
+        .subquery()
+    )
+    ranqueados = select(
+        candidatos.c.usuario_id,
+        candidatos.c.sugerido_id,
+        candidatos.c.em_comum,
+        func.row_number()
+        .over(
+            partition_by=candidatos.c.usuario_id,
+            order_by=(candidatos.c.em_comum.desc(), candidatos.c.sugerido_id),
+        )
+        .label("posicao"),
+    ).subquery()
+
+    async with db.transaction():
+        await db.execute(sugestao.delete().where(sugestao.c.usuario_id == any_(ids_bp)))
+        await db.execute(
+            sugestao.insert().from_select(
+                ["usuario_id", "sugerido_id", "em_comum", "posicao"],
+                select(
+                    ranqueados.c.usuario_id,
+                    ranqueados.c.sugerido_id,
+                    ranqueados.c.em_comum,
+                    ranqueados.c.posicao,
+                ).where(ranqueados.c.posicao <= top_n),
+            )
+        )
+    return len(usuario_ids)
+
+
+async def processar_pendentes(db: Database, lote: int = SUGESTOES_LOTE) -> int:
+    """
+    Consome um lote de `sugestao_pendente` e recalcula só esses usuários.
+    Retorna quantos foram processados (0 = nada pendente).
+    """
+    alvo = (
+        select(sugestao_pendente.c.usuario_id)
+        .order_by(sugestao_pendente.c.marcado_em)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+    )
+    async with db.transaction():
+        rows = await db.fetch_all(
+            sugestao_pendente.delete()
+            .where(sugestao_pendente.c.usuario_id.in_(alvo))
+            .returning(sugestao_pendente.c.usuario_id)
+        )
+        ids = [r["usuario_id"] for r in rows]
+        await recalcular(db, ids)
+    return len(ids)
+
+
+async def recalcular_todos(db: Database, lote: int = SUGESTOES_LOTE) -> int:
+    """
+    Recálculo completo (backfill), percorrendo os seguidores por keyset em lotes.
+    """
+    total = 0
+    ultimo = 0
+    while True:
+        rows = await db.fetch_all(
+            select(seguir.c.seguidor_id)
+            .where(seguir.c.seguidor_id > ultimo)
+            .group_by(seguir.c.seguidor_id)
+            .order_by(seguir.c.seguidor_id)
+            .limit(lote)
+        )
+        if not rows:
+            return total
+        ids = [r["seguidor_id"] for r in rows]
+        total += await recalcular(db, ids)
+        ultimo = ids[-1]
+
+
+async def listar_sugestoes(db: Database, usuario_id: int, limit: int = 20):
+    """
+    Leitura indexada (usuario_id, posicao) do top-N pré-calculado.
+    """
+    query = (
+        select(
+            usuario.c.id,
+            usuario.c.nome,
+            sugestao.c.em_comum,
+        )
+        .select_from(
+            sugestao.join(
+                usuario,
+                (sugestao.c.sugerido_id == usuario.c.id) & usuario.c.excluido_em.is_(None),
+            )
+        )
+        .where(sugestao.c.usuario_id == usuario_id)
+        .order_by(sugestao.c.posicao)
+        .limit(limit)
+    )
+    rows = await db.fetch_all(query)
+    return [{"id": r["id"], "nome": r["nome"], "em_comum": r["em_comum"]} for r in rows]
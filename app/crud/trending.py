@@ -0,0 +1,111 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from databases import Database
+from sqlalchemy import select, func, desc, bindparam, cast, Integer, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models.like import like_bucket
+from app.models.post import post
+from app.models.usuario import usuario
+
+TRENDING_BUCKET_SEGUNDOS = int(os.getenv("TRENDING_BUCKET_SEGUNDOS", "300"))
+TRENDING_JANELA_SEGUNDOS = int(os.getenv("TRENDING_JANELA_SEGUNDOS", "3600"))
+
+
+def bucket_de(quando: datetime) -> datetime:
+    ts = int(quando.timestamp())
+    return datetime.fromtimestamp(ts - ts % TRENDING_BUCKET_SEGUNDOS, tz=timezone.utc)
+
+
+async def registrar_likes(db: Database, eventos: List[Tuple[int, datetime, int]]):
+    """
+    Aplica um lote de (post_id, momento do like, delta ±1) nos buckets de trending.
+    +N soma no bucket do momento do like (criando-o); -N desconta do bucket em que o like
+    removido foi dado (se esse bucket já expirou, não há o que descontar).
+    """
+    somas = defaultdict(int)
+    for post_id, quando, delta in eventos:
+        somas[(post_id, bucket_de(quando))] += delta
+    somas = {k: v for k, v in sorted(somas.items()) if v}
+
+    positivos = [{"post_id": p, "bucket": b, "likes": d} for (p, b), d in somas.items() if d > 0]
+    if positivos:
+        stmt = insert(like_bucket).values(positivos)
+        stmt = stmt.on_conflict_do_update(
+            constraint="like_bucket_pkey",
+            set_={"likes": like_bucket.c.likes + stmt.excluded.likes},
+        )
+        await db.execute(stmt)
+    negativos = [(p, b, d) for (p, b), d in somas.items() if d < 0]
+    if negativos:
+        tz = DateTime(timezone=True)
+        linhas = (
+            func.unnest(
+                cast(bindparam("post_ids", type_=ARRAY(Integer), value=[n[0] for n in negativos]), ARRAY(Integer)),
+                cast(bindparam("buckets", type_=ARRAY(tz), value=[n[1] for n in negativos]), ARRAY(tz)),
+                cast(bindparam("deltas", type_=ARRAY(Integer), value=[n[2] for n in negativos]), ARRAY(Integer)),
+            )
+            .table_valued("post_id", "bucket", "delta")
+            .render_derived(name="d")
+        )
+        await db.execute(
+            like_bucket.update()
+            .where((like_bucket.c.post_id == linhas.c.post_id) & (like_bucket.c.bucket == linhas.c.bucket))
+            .values(likes=func.greatest(like_bucket.c.likes + linhas.c.delta, 0))
+        )
+
+
+async def expirar_buckets(db: Database) -> int:
+    """Remove buckets que já saíram da janela."""
+    corte = bucket_de(datetime.now(timezone.utc) - timedelta(seconds=TRENDING_JANELA_SEGUNDOS))
+    rows = await db.fetch_all(
+        like_bucket.delete().where(like_bucket.c.bucket < corte).returning(like_bucket.c.post_id)
+    )
+    return len(rows)
+
+
+async def top_k(db: Database, k: int):
+    """
+    Top-K posts por likes na janela. Soma só os buckets da janela (poucas linhas por post),
+    nunca varre `like`.
+    """
+    corte = bucket_de(datetime.now(timezone.utc) - timedelta(seconds=TRENDING_JANELA_SEGUNDOS))
+    somas = (
+        select(like_bucket.c.post_id, func.sum(like_bucket.c.likes).label("likes"))
+        .where(like_bucket.c.bucket >= corte)
+        .group_by(like_bucket.c.post_id)
+        .having(func.sum(like_bucket.c.likes) > 0)
+        .order_by(desc("likes"), desc(like_bucket.c.post_id))
+        .limit(k)
+        .subquery()
+    )
+    query = (
+        select(
+            post.c.id,
+            post.c.post,
+            post.c.data_criacao,
+            usuario.c.id.label("usuario_id"),
+            usuario.c.nome.label("usuario_nome"),
+            somas.c.likes,
+        )
+        .select_from(
+            somas.join(post, post.c.id == somas.c.post_id).join(
+                usuario,
+                (post.c.usuario_id == usuario.c.id) & usuario.c.excluido_em.is_(None),
+            )
+        )
+        .order_by(desc(somas.c.likes), desc(post.c.id))
+    )
+    rows = await db.fetch_all(query)
+    return [
+        {
+            "id": r.id,
+            "post": r.post,
+            "data_criacao": r.data_criacao,
+            "usuario": {"id": r.usuario_id, "nome": r.usuario_nome},
+            "likes": int(r.likes),
+        }
+        for r in rows
+    ]
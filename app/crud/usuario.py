@@ -1,15 +1,24 @@
 from app.models.usuario import usuario
 from app.models.seguir import seguir
-from app.models.post import post
+from app.models.post import post, post_arquivo
 from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
-from app.crud.seguir import remover_todas_as_relacoes_do_usuario
+from app.crud import purga as purga_crud
+from app.workers import purga as purga_worker
+from app.cache.grafo import grafo, SEGUIDORES, SEGUINDO
+from app.cache import singleflight
+from app.cache.singleflight import coalescer
+from app.paginacao import codificar_cursor, decodificar_cursor
 from databases import Database
 from fastapi import HTTPException, Depends, status
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select, asc, desc, func
+from sqlalchemy import select, asc, desc, func, any_, bindparam, Integer, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
 import os
 
 try:
@@ -24,6 +33,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/usuario/login")
 
 
+# bcrypt é CPU pura (~centenas de ms por chamada, de propósito): nas rotas, chame via
+# asyncio.to_thread para não prender o event loop (ver app/monitor_loop.py)
 def verificar_senha(senha_plana, senha_hash):
     return pwd_context.verify(senha_plana, senha_hash)
 
@@ -52,6 +63,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> int:
     return usuario_id
 
 
+def _invalidar_leituras(usuario_id: int):
+    """Escritas no perfil descartam leituras coalescidas/em cache desse usuário."""
+    singleflight.invalidar("buscar_usuario_por_id", usuario_id)
+    singleflight.invalidar("stats_usuario", usuario_id)
+    singleflight.invalidar("get_posts_por_usuario", usuario_id)
+    singleflight.invalidar("marcas_usuario", usuario_id)
+
+
 # ---------- criação de usuário ----------
 async def criar_usuario(db: Database, usuario_data: UsuarioCreate) -> dict:
     """
@@ -59,7 +78,7 @@ async def criar_usuario(db: Database, usuario_data: UsuarioCreate) -> dict:
     Retorna apenas {id, nome, email}.
     Lança HTTPException 409 para e-mail duplicado e 400 para falhas genéricas.
     """
-    senha_hash = gerar_hash_senha(usuario_data.senha)
+    senha_hash = await asyncio.to_thread(gerar_hash_senha, usuario_data.senha)
     insert_stmt = usuario.insert().values(
         nome=usuario_data.nome,
         email=usuario_data.email,
@@ -87,56 +106,130 @@ async def criar_usuario(db: Database, usuario_data: UsuarioCreate) -> dict:
 
 
 # ---------- listagem com ordenação ----------
-async def listar_usuarios(db: Database, limit: int = 50, offset: int = 0, sort: str = "nome"):
+# sort -> (colunas do keyset, descendente?)
+_ORDENS_USUARIO = {
+    "nome": ((usuario.c.nome, usuario.c.id), False),
+    "-nome": ((usuario.c.nome, usuario.c.id), True),
+    "id": ((usuario.c.id,), False),
+    "-id": ((usuario.c.id,), True),
+}
+
+
+def _escapar_like(texto: str) -> str:
+    # "\\" já é o escape padrão do LIKE no Postgres (um ESCAPE explícito atrapalha o uso do índice)
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def listar_usuarios(
+    db: Database,
+    limit: int = 50,
+    sort: str = "nome",
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+):
     """
-    Lista usuários com paginação.
+    Lista usuários com paginação keyset (sem OFFSET).
     sort:
-        - "nome" (default)  => nome asc
+        - "nome" (default)  => nome asc  (id desempata)
         - "-nome"           => nome desc
         - "id"              => id asc
         - "-id"             => id desc
+    cursor: o `proximo_cursor` da página anterior (ValueError se inválido).
+    q: prefixo do nome, sem diferenciar maiúsculas (índice ix_usuario_nome_prefixo).
+
+    Retorna (linhas, proximo_cursor); proximo_cursor é None na última página.
     """
-    if sort == "-nome":
-        order_col = desc(usuario.c.nome)
-    elif sort == "id":
-        order_col = asc(usuario.c.id)
-    elif sort == "-id":
-        order_col = desc(usuario.c.id)
-    else:
-        order_col = asc(usuario.c.nome)
-
-    query = (
-        select(usuario)
-        .order_by(order_col)
-        .limit(limit)
-        .offset(offset)
-    )
-    return await db.fetch_all(query)
+    colunas, descendente = _ORDENS_USUARIO.get(sort, _ORDENS_USUARIO["nome"])
+
+    query = select(usuario).where(usuario.c.excluido_em.is_(None))
+    if q:
+        query = query.where(func.lower(usuario.c.nome).like(_escapar_like(q.lower()) + "%"))
+    if cursor:
+        valores = decodificar_cursor(cursor, len(colunas))
+        if not all(isinstance(v, c.type.python_type) for v, c in zip(valores, colunas)):
+            raise ValueError("cursor inválido")
+        chave = tuple_(*colunas)
+        query = query.where(chave < tuple(valores) if descendente else chave > tuple(valores))
 
+    query = query.order_by(*(desc(c) if descendente else asc(c) for c in colunas)).limit(limit + 1)
+    rows = await db.fetch_all(query)
 
+    proximo = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        proximo = codificar_cursor(*(rows[-1][c.name] for c in colunas))
+    return rows, proximo
+
+
+@coalescer()
 async def buscar_usuario_por_id(db: Database, usuario_id: int):
-    query = usuario.select().where(usuario.c.id == usuario_id)
+    query = usuario.select().where(
+        (usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None)
+    )
     return await db.fetch_one(query)
 
 
-async def deletar_usuario(db: Database, usuario_id: int):
-    # Remove os posts primeiro
-    await db.execute(post.delete().where(post.c.usuario_id == usuario_id))
+USUARIO_BATCH_MAX = int(os.getenv("USUARIO_BATCH_MAX", "300"))
 
-    # Remove TODAS as relações de seguir desse usuário
-    await remover_todas_as_relacoes_do_usuario(db, usuario_id)
 
-    # Agora remove o usuário
-    query = usuario.delete().where(usuario.c.id == usuario_id)
-    await db.execute(query)
+async def buscar_usuarios_por_ids(db: Database, usuario_ids: List[int]) -> list:
+    """
+    Lote de usuários numa única consulta (`id = ANY(...)`), na ordem pedida, sem repetidos
+    e sem os inexistentes. Passa pelo mesmo micro-cache de buscar_usuario_por_id:
+    ids em cache não vão ao banco, e os lidos aqui alimentam o cache.
+    """
+    ids = list(dict.fromkeys(usuario_ids))
+    encontrados = {}
+    faltando = []
+    for uid in ids:
+        achou, row = singleflight.ler("buscar_usuario_por_id", uid)
+        if achou and row is not None:
+            encontrados[uid] = row
+        else:
+            faltando.append(uid)
+
+    if faltando:
+        ids_bp = bindparam("usuario_ids", type_=ARRAY(Integer), value=faltando)
+        rows = await db.fetch_all(
+            usuario.select().where((usuario.c.id == any_(ids_bp)) & usuario.c.excluido_em.is_(None))
+        )
+        for row in rows:
+            encontrados[row["id"]] = row
+            singleflight.gravar("buscar_usuario_por_id", row, row["id"])
+
+    return [encontrados[uid] for uid in ids if uid in encontrados]
+
+
+async def deletar_usuario(db: Database, usuario_id: int):
+    """
+    Exclusão em tempo constante:
+        - Numa transação: marca o tombstone (excluido_em), libera o e-mail e agenda a purga.
+        - Posts, likes e relações de seguir são removidos depois, em lotes,
+          pelo worker de purga (app/workers/purga.py).
+    """
+    async with db.transaction():
+        await db.execute(
+            usuario.update()
+            .where((usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None))
+            .values(
+                excluido_em=datetime.now(timezone.utc),
+                email=f"excluido+{usuario_id}@rocketmail.invalid",
+            )
+        )
+        await purga_crud.agendar_purga(db, usuario_id)
+
+    _invalidar_leituras(usuario_id)
+    purga_worker.acordar.set()
 
     return {"deleted": True, "usuario_id": usuario_id}
 
 
 async def autenticar_usuario(db: Database, email: str, senha: str):
-    query = usuario.select().where(usuario.c.email == email)
+    query = usuario.select().where(
+        (usuario.c.email == email) & usuario.c.excluido_em.is_(None)
+    )
     user = await db.fetch_one(query)
-    if not user or not verificar_senha(senha, user["senha"]):
+    if not user or not await asyncio.to_thread(verificar_senha, senha, user["senha"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciais inválidas",
@@ -151,38 +244,6 @@ def _usuario_publico(row) -> dict:
     return {"id": row["id"], "nome": row["nome"], "email": row["email"]}
 
 
-# ---------- seguir / deixar de seguir ----------
-async def seguir_usuario(
-    db: Database, seguido_id: int, seguidor_id: int = Depends(get_current_user)
-):
-    query = seguir.insert().values(seguidor_id=seguidor_id, seguido_id=seguido_id)
-    await db.execute(query)
-    return {"seguidor_id": seguidor_id, "seguido_id": seguido_id}
-
-
-async def listar_seguidos(
-    db: Database, seguidor_id: int = Depends(get_current_user)
-):
-    query = usuario.select().where(
-        usuario.c.id.in_(
-            seguir.select()
-            .with_only_columns(seguir.c.seguido_id)
-            .where(seguir.c.seguidor_id == seguidor_id)
-        )
-    )
-    return await db.fetch_all(query)
-
-
-async def deixar_de_seguir(
-    db: Database, seguido_id: int, seguidor_id: int = Depends(get_current_user)
-):
-    query = seguir.delete().where(
-        (seguir.c.seguidor_id == seguidor_id) & (seguir.c.seguido_id == seguido_id)
-    )
-    await db.execute(query)
-    return {"deleted": True, "seguidor_id": seguidor_id, "seguido_id": seguido_id}
-
-
 # ---------- atualizar perfil (/me PATCH) ----------
 async def atualizar_usuario(db: Database, usuario_id: int, data: UsuarioUpdate) -> dict:
     valores = {}
@@ -191,12 +252,13 @@ async def atualizar_usuario(db: Database, usuario_id: int, data: UsuarioUpdate)
     if data.email is not None:
         valores["email"] = data.email
     if data.senha is not None:
-        valores["senha"] = gerar_hash_senha(data.senha)
+        valores["senha"] = await asyncio.to_thread(gerar_hash_senha, data.senha)
 
     if valores:
         await db.execute(
-            usuario.update().where(usuario.c.id == usuario_id).values(**valores)
+            usuario.update().where(usuario.c.id == usuario_id).values(**valores, atualizado_em=func.now())
         )
+        _invalidar_leituras(usuario_id)
 
     row = await buscar_usuario_por_id(db, usuario_id)
     if not row:
@@ -205,20 +267,30 @@ async def atualizar_usuario(db: Database, usuario_id: int, data: UsuarioUpdate)
 
 
 # ---------- estatísticas do perfil ----------
+@coalescer()
 async def stats_usuario(db: Database, usuario_id: int) -> dict:
     # Verifica existência do usuário
-    urow = await db.fetch_one(select(usuario).where(usuario.c.id == usuario_id))
+    urow = await buscar_usuario_por_id(db, usuario_id)
     if not urow:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-    # Contadores agregados
-    posts_q = select(func.count()).select_from(post).where(post.c.usuario_id == usuario_id)
-    seguidores_q = select(func.count()).select_from(seguir).where(seguir.c.seguido_id == usuario_id)
-    seguindo_q = select(func.count()).select_from(seguir).where(seguir.c.seguidor_id == usuario_id)
-
+    # Contadores agregados (seguidores/seguindo saem do cache do grafo quando já carregado)
+    # quentes + arquivados, numa consulta só
+    posts_q = select(
+        select(func.count()).select_from(post).where(post.c.usuario_id == usuario_id).scalar_subquery()
+        + select(func.count()).select_from(post_arquivo).where(post_arquivo.c.usuario_id == usuario_id).scalar_subquery()
+    )
     posts_count = await db.fetch_val(posts_q) or 0
-    seguidores_count = await db.fetch_val(seguidores_q) or 0
-    seguindo_count = await db.fetch_val(seguindo_q) or 0
+
+    seguidores_count = grafo.contagem(SEGUIDORES, usuario_id)
+    if seguidores_count is None:
+        seguidores_q = select(func.count()).select_from(seguir).where(seguir.c.seguido_id == usuario_id)
+        seguidores_count = await db.fetch_val(seguidores_q) or 0
+
+    seguindo_count = grafo.contagem(SEGUINDO, usuario_id)
+    if seguindo_count is None:
+        seguindo_q = select(func.count()).select_from(seguir).where(seguir.c.seguidor_id == usuario_id)
+        seguindo_count = await db.fetch_val(seguindo_q) or 0
 
     return {
         "usuario": {"id": urow["id"], "nome": urow["nome"], "email": urow["email"]},
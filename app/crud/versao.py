@@ -0,0 +1,38 @@
+# app/crud/versao.py
+# Marcas d'água baratas do perfil, usadas nos ETags (app/condicional.py):
+#   - usuario.atualizado_em: muda quando o perfil muda;
+#   - usuario.versao: contador que sobe quando contadores/timeline mudam sem criar post
+#     (post apagado, follow/unfollow, purga de relações);
+#   - último post id: cobre posts novos sem escrita extra no usuario.
+from typing import Iterable
+
+from databases import Database
+from sqlalchemy import select, func, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.models.usuario import usuario
+from app.models.post import post
+from app.cache import singleflight
+from app.cache.singleflight import coalescer
+
+
+async def incrementar(db: Database, usuario_ids: Iterable[int]):
+    ids = sorted(set(usuario_ids))  # ordem fixa: evita deadlock entre lotes concorrentes
+    if not ids:
+        return
+    ids_bp = bindparam("usuario_ids", type_=ARRAY(Integer), value=ids)
+    await db.execute(
+        usuario.update().where(usuario.c.id == any_(ids_bp)).values(versao=usuario.c.versao + 1)
+    )
+    for uid in ids:
+        singleflight.invalidar("marcas_usuario", uid)
+
+
+@coalescer()
+async def marcas_usuario(db: Database, usuario_id: int):
+    """(atualizado_em, versao, ultimo_post) do usuário, ou None se não existir. Uma consulta indexada."""
+    ultimo_post = select(func.max(post.c.id)).where(post.c.usuario_id == usuario.c.id).scalar_subquery()
+    query = select(
+        usuario.c.atualizado_em, usuario.c.versao, ultimo_post.label("ultimo_post")
+    ).where((usuario.c.id == usuario_id) & usuario.c.excluido_em.is_(None))
+    return await db.fetch_one(query)
@@ -1,11 +1,15 @@
 # app/database.py
 import os
 import ssl
+from functools import lru_cache
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, MetaData
+from fastapi import HTTPException
+from sqlalchemy import MetaData
 from databases import Database
 from sqlalchemy.orm import declarative_base
 
+from app import consultas
+
 ENV = os.getenv("PYTHON_ENV", "dev")
 
 # Só carrega .env localmente (no Render não precisa)
@@ -16,24 +20,49 @@ elif ENV == "dev":
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
-    raise ValueError("DATABASE_URL não definida.")
+    if os.getenv("REPOSITORIO") != "memoria":
+        raise ValueError("DATABASE_URL não definida.")
+    # backend em memória (app/repositorio): o Database é construído mas nunca conecta
+    DATABASE_URL = "postgresql://localhost/memoria"
 
 # compat: algumas plataformas usam postgres://
 DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Pool pequeno abre rápido no cold start; o aquecimento (app/aquecimento.py) prepara as conexões
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
 metadata = MetaData()
 Base = declarative_base()
 
-# engine (sync) - só usado se você ligar RUN_MIGRATIONS=1
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args={"sslmode": "require"},
-)
 
-# databases (asyncpg) - FORÇA SSL
+@lru_cache(maxsize=1)
+def get_engine():
+    """
+    engine (sync/psycopg2) - só usado para create_all (RUN_MIGRATIONS=1, testes, scripts).
+    Criado sob demanda para não pesar no import da aplicação.
+    """
+    from sqlalchemy import create_engine
+
+    return create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        connect_args={"sslmode": "require"},
+    )
+
+
+# databases (asyncpg) - FORÇA SSL. Construir não conecta; a conexão sai no lifespan.
 ssl_context = ssl.create_default_context()
-database = Database(DATABASE_URL, ssl=ssl_context)
+database = Database(DATABASE_URL, ssl=ssl_context, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX)
+# ganchos de medição por consulta (perfil por requisição); sem observador, custo ~zero
+consultas.instrumentar(database)
 
 def get_database():
-    return database
\ No newline at end of file
+    # Durante o cold start o pool ainda está conectando: responde 503 rápido em vez de 500
+    if not database.is_connected:
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados ainda não está disponível.",
+            headers={"Retry-After": "2"},
+        )
+    return database
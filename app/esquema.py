@@ -0,0 +1,49 @@
+# app/esquema.py
+# Atualização idempotente de bancos criados antes das colunas e índices novos em tabelas
+# que já existiam (usuario, like, seguir). metadata.create_all só cria as tabelas que
+# faltam e pula as existentes inteiras, então o que foi acrescentado a elas entra aqui,
+# com ADD COLUMN IF NOT EXISTS / CREATE INDEX IF NOT EXISTS: rodar de novo não faz nada.
+# As definições vêm dos próprios models (tipo, default e NOT NULL de cada coluna).
+# Roda logo depois do create_all com RUN_MIGRATIONS=1 (app/main.py) ou à mão por
+# scripts/atualizar_esquema.py. A conversão de `post` para particionada é à parte
+# (scripts/particionar_post.py).
+from sqlalchemy.schema import CreateIndex
+
+from app import models  # noqa: F401  (registra todas as tabelas no metadata)
+from app.database import metadata
+from app.models.like import like
+from app.models.seguir import seguir
+from app.models.usuario import usuario
+
+# colunas que não existiam quando a tabela foi criada
+COLUNAS = [
+    usuario.c.excluido_em,
+    usuario.c.atualizado_em,
+    usuario.c.versao,
+    like.c.data_criacao,
+    seguir.c.data_criacao,
+]
+
+# tabelas já existentes cujos índices foram todos acrescentados depois
+TABELAS_COM_INDICES = [usuario, like, seguir]
+
+
+def atualizar_esquema(conn) -> None:
+    """Acrescenta colunas e índices que faltam nas tabelas existentes (idempotente)."""
+    preparador = conn.dialect.identifier_preparer
+    ddl = conn.dialect.ddl_compiler(conn.dialect, None)
+    for coluna in COLUNAS:
+        conn.exec_driver_sql(
+            f"ALTER TABLE {preparador.format_table(coluna.table)} "
+            f"ADD COLUMN IF NOT EXISTS {ddl.get_column_specification(coluna)}"
+        )
+    for tabela in TABELAS_COM_INDICES:
+        for indice in sorted(tabela.indexes, key=lambda i: i.name):
+            conn.execute(CreateIndex(indice, if_not_exists=True))
+
+
+def migrar(engine) -> None:
+    """create_all (tabelas novas) seguido de atualizar_esquema (tabelas antigas), numa transação."""
+    with engine.begin() as conn:
+        metadata.create_all(bind=conn)
+        atualizar_esquema(conn)
@@ -1,50 +1,138 @@
 import os
 import logging
 import asyncio
+import random
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.database import database, engine, metadata
-from app.routers import usuario, post, seguir, like
+from app.database import database, get_engine
+from app.routers import usuario, post, seguir, like, notificacao, admin
+from app import workers
+from app import aquecimento
+from app import esquema
+from app import metricas
+from app.monitor_loop import monitor as monitor_loop, LOOP_MONITOR_ATIVO
+from app.repositorio import REPOSITORIO
+from app.middleware.consultas import ConsultasMiddleware, CONSULTAS_ATIVA
+from app.middleware.admissao import AdmissaoMiddleware, ADMISSAO_ATIVA
+from app.middleware.compressao import CompressaoMiddleware, COMPRESSAO_ATIVA
+from app.middleware.perfil import PerfilMiddleware, PERFIL_ATIVO
 
 logger = logging.getLogger("uvicorn.error")
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")
 RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "0") == "1"
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    if RUN_MIGRATIONS:
-        logger.info("RUN_MIGRATIONS=1 -> criando tabelas...")
-        metadata.create_all(bind=engine)
-        logger.info("✅ metadata.create_all OK")
-
-    # Retry DB connect (muito comum o primeiro connect falhar no Render)
-    last_err = None
-    for attempt in range(1, 6):
+# Backoff exponencial com jitter ("full jitter") para o primeiro connect
+DB_CONNECT_TENTATIVAS = int(os.getenv("DB_CONNECT_TENTATIVAS", "8"))
+DB_CONNECT_BACKOFF_BASE = float(os.getenv("DB_CONNECT_BACKOFF_BASE", "0.25"))
+DB_CONNECT_BACKOFF_MAX = float(os.getenv("DB_CONNECT_BACKOFF_MAX", "8"))
+
+# Estado de prontidão (readiness), separado da vivacidade (/healthz)
+prontidao = {"status": "iniciando", "erro": None, "inicio": time.monotonic(), "pronto_em_s": None}
+
+
+def _espera_backoff(tentativa: int) -> float:
+    return random.uniform(0, min(DB_CONNECT_BACKOFF_MAX, DB_CONNECT_BACKOFF_BASE * 2 ** min(tentativa, 30)))
+
+
+async def _conectar_com_backoff():
+    """
+    Tenta conectar até conseguir, com backoff limitado a DB_CONNECT_BACKOFF_MAX. Depois de
+    DB_CONNECT_TENTATIVAS falhas o /readyz passa a mostrar o erro, mas as tentativas não
+    param: o /healthz segue ok (a plataforma não reinicia a instância), então desistir
+    deixaria as rotas de banco em 503 até um restart manual.
+    """
+    tentativa = 0
+    while True:
+        tentativa += 1
         try:
-            logger.info(f"Conectando no banco... (tentativa {attempt}/5)")
+            logger.info(f"Conectando no banco... (tentativa {tentativa})")
             await database.connect()
             logger.info("✅ database.connect OK")
-            last_err = None
-            break
+            return
+        except Exception as e:
+            if tentativa >= DB_CONNECT_TENTATIVAS:
+                prontidao["status"] = "erro"
+                prontidao["erro"] = str(e)
+            espera = _espera_backoff(tentativa)
+            logger.warning("⚠️ Falha ao conectar no banco (%s); nova tentativa em %.2fs", e, espera)
+            await asyncio.sleep(espera)
+
+
+async def _inicializar_banco():
+    """
+    Roda em segundo plano: o app já responde /healthz enquanto isso acontece.
+    Falhas (create_all, aquecimento) não são definitivas: a inicialização recomeça
+    com backoff até dar certo.
+    """
+    if REPOSITORIO == "memoria":
+        logger.info("REPOSITORIO=memoria -> sem banco e sem workers")
+        prontidao["status"] = "pronto"
+        prontidao["pronto_em_s"] = round(time.monotonic() - prontidao["inicio"], 3)
+        return
+    tentativa = 0
+    while True:
+        tentativa += 1
+        try:
+            if RUN_MIGRATIONS:
+                logger.info("RUN_MIGRATIONS=1 -> criando tabelas e atualizando as existentes...")
+                # create_all + colunas/índices novos (app/esquema.py) são síncronos (psycopg2): fora do event loop
+                await asyncio.to_thread(esquema.migrar, get_engine())
+                logger.info("✅ esquema OK")
+
+            await _conectar_com_backoff()
+            await aquecimento.aquecer(database)
+            logger.info("✅ pool aquecido")
+
+            workers.iniciar(database)
+            prontidao["status"] = "pronto"
+            prontidao["erro"] = None
+            prontidao["pronto_em_s"] = round(time.monotonic() - prontidao["inicio"], 3)
+            return
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            last_err = e
-            logger.exception("⚠️ Falha ao conectar no banco: %s", e)
-            await asyncio.sleep(2 * attempt)  # 2s,4s,6s,8s,10s
+            # não derruba o processo: /readyz reporta o erro e o Render mostra nos logs
+            espera = _espera_backoff(tentativa)
+            logger.exception("❌ Banco indisponível: %s; nova tentativa em %.2fs", e, espera)
+            prontidao["status"] = "erro"
+            prontidao["erro"] = str(e)
+            await asyncio.sleep(espera)
+
 
-    if last_err:
-        raise last_err  # derruba o app e deixa o Render mostrar o erro final
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prontidao["inicio"] = time.monotonic()
+    if LOOP_MONITOR_ATIVO:
+        monitor_loop.iniciar()
+    init_task = asyncio.create_task(_inicializar_banco(), name="inicializar-banco")
 
     yield
 
-    await database.disconnect()
+    init_task.cancel()
+    await asyncio.gather(init_task, return_exceptions=True)
+    await workers.parar()
+    if LOOP_MONITOR_ATIVO:
+        await monitor_loop.parar()
+    if database.is_connected:
+        await database.disconnect()
     logger.info("✅ database.disconnect OK")
 
 app = FastAPI(lifespan=lifespan)
 
+# Contagem de consultas bem por dentro: só o que a rota faz (inclusive background tasks)
+if CONSULTAS_ATIVA:
+    app.add_middleware(ConsultasMiddleware)
+
+# Admissão fica por dentro do CORS: os 503 de load shedding também levam os headers de CORS
+if ADMISSAO_ATIVA:
+    app.add_middleware(AdmissaoMiddleware)
+
 origins_list = [o.strip() for o in ALLOWED_ORIGINS.split(",") if o.strip()]
 use_wildcard = (not origins_list) or ("*" in origins_list)
 
@@ -56,11 +144,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão por fora de tudo: comprime o corpo final, já com os headers de CORS
+if COMPRESSAO_ATIVA:
+    app.add_middleware(CompressaoMiddleware)
+
+# Perfil por requisição mais por fora ainda: mede também compressão e espera na admissão
+if PERFIL_ATIVO:
+    app.add_middleware(PerfilMiddleware)
+
 @app.get("/healthz", tags=["Infra"])
 async def healthz():
     return {"status": "ok"}
 
+@app.get("/metricas", tags=["Infra"])
+async def metricas_processo():
+    return metricas.snapshot()
+
+@app.get("/readyz", tags=["Infra"])
+async def readyz():
+    """Pronto para tráfego: banco conectado e pool aquecido."""
+    corpo = {"status": prontidao["status"], "pronto_em_s": prontidao["pronto_em_s"]}
+    if prontidao["erro"]:
+        corpo["erro"] = prontidao["erro"]
+    if prontidao["status"] != "pronto":
+        return JSONResponse(corpo, status_code=503, headers={"Retry-After": "2"})
+    return corpo
+
 app.include_router(usuario.router)
 app.include_router(post.router)
 app.include_router(seguir.router)
-app.include_router(like.router)
\ No newline at end of file
+app.include_router(like.router)
+app.include_router(notificacao.router)
+app.include_router(admin.router)
\ No newline at end of file
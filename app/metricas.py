@@ -0,0 +1,23 @@
+# app/metricas.py
+# Registro simples de métricas do processo, exposto em GET /metricas.
+from collections import defaultdict
+from typing import Callable, Dict
+
+_contadores: Dict[str, int] = defaultdict(int)
+_coletores: Dict[str, Callable[[], dict]] = {}
+
+
+def incrementar(nome: str, n: int = 1):
+    _contadores[nome] += n
+
+
+def registrar_coletor(nome: str, fn: Callable[[], dict]):
+    """`fn` é chamada a cada snapshot e devolve o estado atual (gauges) daquele componente."""
+    _coletores[nome] = fn
+
+
+def snapshot() -> dict:
+    out = {"contadores": dict(_contadores)}
+    for nome, fn in _coletores.items():
+        out[nome] = fn()
+    return out
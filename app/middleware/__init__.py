@@ -0,0 +1,2 @@
+# app/middleware/__init__.py
+# Middlewares ASGI puros (sem BaseHTTPMiddleware, para não bufferizar nem criar tasks extras).
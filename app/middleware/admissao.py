@@ -0,0 +1,185 @@
+# app/middleware/admissao.py
+# Controle de admissão: limite de concorrência por grupo de rotas, com fila curta
+# e limite adaptativo (AIMD) guiado pela latência observada. Quando não há vaga
+# nem lugar na fila, responde 503 + Retry-After na hora (load shedding).
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from app import metricas
+from app.database import DB_POOL_MAX
+
+ADMISSAO_ATIVA = os.getenv("ADMISSAO_ATIVA", "1") == "1"
+
+# Rotas que nunca passam pelo limitador
+ISENTAS = {"/healthz", "/readyz", "/metricas"}
+
+
+@dataclass
+class ConfigGrupo:
+    inicial: int
+    minimo: int
+    maximo: int
+    fila_max: int
+    alvo_ms: float
+    espera_max_s: float
+
+
+# O feed fica com no máximo metade do pool: o resto sobra para rotas baratas.
+GRUPOS: Dict[str, ConfigGrupo] = {
+    "feed": ConfigGrupo(max(1, DB_POOL_MAX // 2), 1, max(1, DB_POOL_MAX // 2), 32, 300, 1.0),
+    "likes": ConfigGrupo(DB_POOL_MAX, 2, DB_POOL_MAX * 2, 128, 50, 0.5),
+    "auth": ConfigGrupo(4, 1, 8, 32, 500, 2.0),  # bcrypt: CPU, não banco
+    "escrita": ConfigGrupo(DB_POOL_MAX, 2, DB_POOL_MAX * 2, 64, 150, 1.0),
+    "leitura": ConfigGrupo(DB_POOL_MAX, 2, DB_POOL_MAX * 2, 64, 150, 1.0),
+}
+
+
+def grupo_da_rota(method: str, path: str) -> Optional[str]:
+    if path in ISENTAS:
+        return None
+    if path.startswith("/post/feed"):
+        return "feed"
+    if path.startswith("/like"):
+        return "likes"
+    if path == "/usuario/login" or (path.rstrip("/") == "/usuario" and method == "POST"):
+        return "auth"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "leitura"
+    return "escrita"
+
+
+class LimiteAdaptativo:
+    """
+    AIMD:
+        - latência <= alvo  -> limite += 1/limite (≈ +1 por "janela" de requisições)
+        - latência >  alvo  -> limite *= 0.9, no máximo uma vez por intervalo de alvo
+    Vagas liberadas passam direto para o primeiro da fila (FIFO).
+    """
+
+    def __init__(self, nome: str, cfg: ConfigGrupo):
+        self.nome = nome
+        self.cfg = cfg
+        self.limite = float(cfg.inicial)
+        self.em_uso = 0
+        self.fila: Deque[asyncio.Future] = deque()
+        self._ultimo_corte = 0.0
+        self.admitidas = 0
+        self.rejeitadas = 0
+        self.expiradas = 0
+
+    def _vagas(self) -> int:
+        return max(self.cfg.minimo, int(self.limite))
+
+    async def adquirir(self) -> bool:
+        if self.em_uso < self._vagas() and not self.fila:
+            self.em_uso += 1
+            self.admitidas += 1
+            return True
+        if len(self.fila) >= self.cfg.fila_max:
+            self.rejeitadas += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self.fila.append(fut)
+        try:
+            await asyncio.wait_for(fut, timeout=self.cfg.espera_max_s)
+        except asyncio.TimeoutError:
+            try:
+                self.fila.remove(fut)
+            except ValueError:
+                pass
+            if fut.done() and not fut.cancelled():
+                # a vaga chegou junto com o timeout
+                self._devolver()
+            self.expiradas += 1
+            return False
+        except asyncio.CancelledError:
+            # cliente desistiu: se a vaga já tinha sido transferida, devolve
+            if fut.done() and not fut.cancelled():
+                self._devolver()
+            raise
+        self.admitidas += 1
+        return True
+
+    def liberar(self, latencia_s: float):
+        self._ajustar(latencia_s)
+        self._devolver()
+
+    def _devolver(self):
+        self.em_uso -= 1
+        # acorda quem estiver na fila enquanto houver vaga (a vaga é transferida)
+        while self.fila and self.em_uso < self._vagas():
+            fut = self.fila.popleft()
+            if not fut.done():
+                self.em_uso += 1
+                fut.set_result(None)
+
+    def _ajustar(self, latencia_s: float):
+        if latencia_s * 1000 <= self.cfg.alvo_ms:
+            self.limite = min(self.cfg.maximo, self.limite + 1.0 / self.limite)
+            return
+        agora = time.monotonic()
+        if agora - self._ultimo_corte >= self.cfg.alvo_ms / 1000:
+            self.limite = max(self.cfg.minimo, self.limite * 0.9)
+            self._ultimo_corte = agora
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.cfg.espera_max_s))
+
+    def estado(self) -> dict:
+        return {
+            "limite": round(self.limite, 2),
+            "em_uso": self.em_uso,
+            "fila": len(self.fila),
+            "admitidas": self.admitidas,
+            "rejeitadas": self.rejeitadas,
+            "expiradas": self.expiradas,
+        }
+
+
+class AdmissaoMiddleware:
+    def __init__(self, app, grupos: Optional[Dict[str, ConfigGrupo]] = None):
+        self.app = app
+        self.limites = {nome: LimiteAdaptativo(nome, cfg) for nome, cfg in (grupos or GRUPOS).items()}
+        metricas.registrar_coletor("admissao", self.estado)
+
+    def estado(self) -> dict:
+        return {nome: lim.estado() for nome, lim in self.limites.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        nome = grupo_da_rota(scope["method"], scope["path"])
+        limite = self.limites.get(nome) if nome else None
+        if limite is None:
+            return await self.app(scope, receive, send)
+
+        if not await limite.adquirir():
+            return await self._rejeitar(limite, send)
+
+        inicio = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limite.liberar(time.monotonic() - inicio)
+
+    @staticmethod
+    async def _rejeitar(limite: LimiteAdaptativo, send):
+        corpo = json.dumps({"detail": "Servidor sobrecarregado, tente novamente."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(corpo)).encode()),
+                (b"retry-after", str(limite.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": corpo})
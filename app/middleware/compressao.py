@@ -0,0 +1,227 @@
+# app/middleware/compressao.py
+# Compressão de respostas negociada por Accept-Encoding (br / zstd / gzip).
+#   - só acima de COMPRESSAO_MIN_BYTES e para tipos de texto/JSON;
+#   - corpos grandes são comprimidos numa thread, fora do event loop;
+#   - rotas públicas cacheáveis guardam o corpo já comprimido, indexado pelo hash
+#     do corpo original: a mesma página não é comprimida duas vezes.
+# Respostas em streaming (mais de um chunk) passam sem compressão.
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app import metricas
+
+try:
+    import brotli  # opcional
+except Exception:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard  # opcional
+except Exception:  # pragma: no cover
+    zstandard = None
+
+COMPRESSAO_ATIVA = os.getenv("COMPRESSAO_ATIVA", "1") == "1"
+COMPRESSAO_MIN_BYTES = int(os.getenv("COMPRESSAO_MIN_BYTES", "1024"))
+COMPRESSAO_THREAD_BYTES = int(os.getenv("COMPRESSAO_THREAD_BYTES", str(64 * 1024)))
+COMPRESSAO_CACHE_MAX_BYTES = int(os.getenv("COMPRESSAO_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# GETs públicos (sem dependência do usuário autenticado) cujos corpos valem cache
+ROTAS_CACHEAVEIS = [
+    re.compile(r"^/usuario/\d+/posts$"),
+    re.compile(r"^/usuario/\d+/stats$"),
+    re.compile(r"^/post/trending$"),
+]
+
+_TIPOS_TEXTO = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _gzip(corpo: bytes) -> bytes:
+    return gzip.compress(corpo, compresslevel=6, mtime=0)
+
+
+def _brotli(corpo: bytes) -> bytes:
+    # qualidade 5: bom meio-termo para conteúdo dinâmico (11 é lento demais por requisição)
+    return brotli.compress(corpo, quality=5)
+
+
+def _zstd(corpo: bytes) -> bytes:
+    # um compressor por chamada: ZstdCompressor não é seguro entre threads
+    return zstandard.ZstdCompressor(level=3).compress(corpo)
+
+
+def _sufixar(etag: str, codificacao: str) -> str:
+    return f'{etag[:-1]}-{codificacao}"'
+
+
+# ordem = preferência do servidor em caso de empate no q do cliente
+CODIFICADORES: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    CODIFICADORES["br"] = _brotli
+if zstandard is not None:
+    CODIFICADORES["zstd"] = _zstd
+CODIFICADORES["gzip"] = _gzip
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """Melhor codificação disponível segundo os q-values do Accept-Encoding (None = identity)."""
+    aceitas: Dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nome, _, params = parte.strip().partition(";")
+        q = 1.0
+        for p in params.split(";"):
+            chave, _, valor = p.strip().partition("=")
+            if chave == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if nome:
+            aceitas[nome.strip().lower()] = q
+
+    melhor, melhor_q = None, 0.0
+    for cod in CODIFICADORES:
+        q = aceitas.get(cod, aceitas.get("*", 0.0))
+        if q > melhor_q:
+            melhor, melhor_q = cod, q
+    return melhor
+
+
+class CacheComprimidos:
+    """LRU (limitado em bytes) de (codificação, hash do corpo) -> corpo comprimido."""
+
+    def __init__(self, max_bytes: int = COMPRESSAO_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave) -> Optional[bytes]:
+        valor = self._lru.get(chave)
+        if valor is None:
+            self.misses += 1
+            return None
+        self._lru.move_to_end(chave)
+        self.hits += 1
+        return valor
+
+    def put(self, chave, valor: bytes):
+        if len(valor) > self.max_bytes:
+            return
+        antigo = self._lru.pop(chave, None)
+        if antigo is not None:
+            self._bytes -= len(antigo)
+        self._lru[chave] = valor
+        self._bytes += len(valor)
+        while self._bytes > self.max_bytes:
+            _, removido = self._lru.popitem(last=False)
+            self._bytes -= len(removido)
+
+    def estado(self) -> dict:
+        return {"entradas": len(self._lru), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class CompressaoMiddleware:
+    def __init__(self, app, min_bytes: int = COMPRESSAO_MIN_BYTES, thread_bytes: int = COMPRESSAO_THREAD_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+        self.thread_bytes = thread_bytes
+        self.cache = CacheComprimidos()
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+        metricas.registrar_coletor("compressao", self.estado)
+
+    def estado(self) -> dict:
+        return {
+            "codificacoes": list(CODIFICADORES),
+            "bytes_entrada": self.bytes_entrada,
+            "bytes_saida": self.bytes_saida,
+            "cache": self.cache.estado(),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        pedido = Headers(scope=scope)
+        codificacao = escolher_codificacao(pedido.get("accept-encoding", ""))
+        cacheavel = scope["method"] == "GET" and any(r.match(scope["path"]) for r in ROTAS_CACHEAVEIS)
+        inicio = None
+
+        async def _send(message):
+            nonlocal inicio
+            if message["type"] == "http.response.start":
+                inicio = message  # segura os headers até ver o corpo
+                return
+            if message["type"] != "http.response.body" or inicio is None:
+                return await send(message)
+
+            start, inicio = inicio, None
+            corpo = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            tipo = headers.get("content-type", "")
+            comprimivel = (
+                tipo.startswith(_TIPOS_TEXTO)
+                and "content-encoding" not in headers
+                and "no-transform" not in headers.get("cache-control", "")
+                and start["status"] not in (204, 304)
+            )
+            if comprimivel:
+                headers.add_vary_header("Accept-Encoding")
+            elif start["status"] == 304 and codificacao is not None:
+                # o 304 valida a representação que o cliente tem: leva o mesmo ETag (com
+                # sufixo) que o 200 comprimido levou, a não ser que ele tenha a versão crua
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if (
+                    etag and etag.endswith('"') and not etag.startswith("W/")
+                    and etag not in [t.strip() for t in pedido.get("if-none-match", "").split(",")]
+                ):
+                    headers["etag"] = _sufixar(etag, codificacao)
+            if (
+                not comprimivel
+                or codificacao is None
+                or message.get("more_body", False)
+                or len(corpo) < self.min_bytes
+            ):
+                await send(start)
+                return await send(message)
+
+            comprimido = await self._comprimir(codificacao, corpo, cacheavel and start["status"] == 200)
+            self.bytes_entrada += len(corpo)
+            self.bytes_saida += len(comprimido)
+            headers["content-encoding"] = codificacao
+            etag = headers.get("etag")
+            if etag and etag.endswith('"') and not etag.startswith("W/"):
+                # ETag forte identifica bytes: a versão comprimida ganha um sufixo próprio
+                headers["etag"] = _sufixar(etag, codificacao)
+            headers["content-length"] = str(len(comprimido))
+            await send(start)
+            await send({"type": "http.response.body", "body": comprimido})
+
+        await self.app(scope, receive, _send)
+
+    async def _comprimir(self, codificacao: str, corpo: bytes, cacheavel: bool) -> bytes:
+        chave = None
+        if cacheavel:
+            chave = (codificacao, hashlib.blake2b(corpo, digest_size=16).digest())
+            pronto = self.cache.get(chave)
+            if pronto is not None:
+                return pronto
+
+        fn = CODIFICADORES[codificacao]
+        if len(corpo) >= self.thread_bytes:
+            comprimido = await asyncio.to_thread(fn, corpo)
+        else:
+            comprimido = fn(corpo)
+
+        if chave is not None:
+            self.cache.put(chave, comprimido)
+        return comprimido
@@ -0,0 +1,56 @@
+# app/middleware/consultas.py
+# Conta as consultas ao banco de cada requisição (app/consultas.contar) e procura N+1:
+# a mesma forma de consulta CONSULTAS_N_MAIS_1 vezes ou mais numa requisição vira aviso
+# no log e o contador `consultas.n_mais_1` em /metricas. A forma (SQL compilado) só é
+# calculada quando a requisição fez pelo menos esse tanto de consultas.
+# Desligado por padrão (CONSULTAS_ATIVA=1 liga; os testes ligam em tests/conftest.py):
+# com ele ligado toda consulta passa pelo observador da contagem.
+# Ouvintes registrados com ouvir() recebem (metodo, caminho, Contagem) ao fim de cada
+# requisição: é por aqui que os testes impõem orçamento de consultas (tests/conftest.py).
+import logging
+import os
+from typing import Callable, List
+
+from app import consultas, metricas
+
+CONSULTAS_ATIVA = os.getenv("CONSULTAS_ATIVA", "0") == "1"
+CONSULTAS_N_MAIS_1 = int(os.getenv("CONSULTAS_N_MAIS_1", "5"))
+
+logger = logging.getLogger("uvicorn.error")
+
+Ouvinte = Callable[[str, str, consultas.Contagem], None]
+_ouvintes: List[Ouvinte] = []
+
+
+def ouvir(fn: Ouvinte) -> Ouvinte:
+    _ouvintes.append(fn)
+    return fn
+
+
+def deixar_de_ouvir(fn: Ouvinte):
+    if fn in _ouvintes:
+        _ouvintes.remove(fn)
+
+
+class ConsultasMiddleware:
+    def __init__(self, app):
+        self.app = app
+        consultas.ativar_contagem()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with consultas.contar() as contagem:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self._fechar(scope["method"], scope["path"], contagem)
+
+    @staticmethod
+    def _fechar(metodo: str, caminho: str, contagem: consultas.Contagem):
+        metricas.incrementar("consultas.total", contagem.total)
+        for forma, n in contagem.repetidas(CONSULTAS_N_MAIS_1).items():
+            metricas.incrementar("consultas.n_mais_1")
+            logger.warning("⚠️ possível N+1 em %s %s: %d× %s", metodo, caminho, n, forma[:300])
+        for fn in _ouvintes:
+            fn(metodo, caminho, contagem)
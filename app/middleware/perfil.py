@@ -0,0 +1,274 @@
+# app/middleware/perfil.py
+# Perfil sob demanda de uma requisição, para descobrir onde foi o tempo (Python,
+# serialização ou banco) de uma chamada lenta em produção. Ligado por requisição:
+#   - header `X-Perfil: <token admin>` (ver app/admin.py), ou
+#   - amostragem aleatória: PERFIL_AMOSTRAGEM (fração das requisições, 0 = desligada).
+# Enquanto a requisição roda:
+#   - uma thread amostra a pilha da thread do event loop a cada PERFIL_INTERVALO_MS
+#     (perfil de CPU amostrado; a resolução real fica limitada por sys.getswitchinterval()).
+#     Amostras com o loop parado em select() são tempo esperando I/O (banco, rede);
+#   - cada chamada ao `database` feita no contexto da requisição entra na linha do tempo
+#     (ganchos de app/consultas.py), com início, duração e SQL.
+# Um perfil por vez no processo: as amostras são da thread do loop, então outras requisições
+# concorrentes também aparecem nelas; as consultas, não (são separadas por contextvar).
+# Os últimos PERFIL_BUFFER perfis ficam num buffer circular e saem em pstats ou speedscope
+# JSON por /admin/perfis (app/routers/admin.py). A resposta perfilada leva `X-Perfil-Id`.
+import contextvars
+import itertools
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app import consultas, metricas
+from app.admin import token_admin_valido
+
+PERFIL_ATIVO = os.getenv("PERFIL_ATIVO", "1") == "1"
+PERFIL_AMOSTRAGEM = float(os.getenv("PERFIL_AMOSTRAGEM", "0"))
+PERFIL_INTERVALO_MS = float(os.getenv("PERFIL_INTERVALO_MS", "5"))
+PERFIL_BUFFER = int(os.getenv("PERFIL_BUFFER", "20"))
+PERFIL_MAX_AMOSTRAS = int(os.getenv("PERFIL_MAX_AMOSTRAS", "20000"))
+PERFIL_MAX_CONSULTAS = int(os.getenv("PERFIL_MAX_CONSULTAS", "2000"))
+
+HEADER = b"x-perfil"
+ISENTAS = ("/healthz", "/readyz", "/metricas", "/admin")
+
+# (arquivo, linha de início da função, nome): a mesma chave que o pstats usa
+Quadro = Tuple[str, int, str]
+
+
+class Perfil:
+    def __init__(self, perfil_id: int, metodo: str, caminho: str, motivo: str):
+        self.id = perfil_id
+        self.metodo = metodo
+        self.caminho = caminho
+        self.motivo = motivo
+        self.status: Optional[int] = None
+        self.criado_em = time.time()
+        self.inicio = time.perf_counter()
+        self.duracao_s = 0.0
+        self.quadros: List[Quadro] = []
+        self._indices: Dict[Quadro, int] = {}
+        # pilhas (raiz -> folha) como índices em `quadros`, e o tempo que cada uma representa
+        self.amostras: List[Tuple[int, ...]] = []
+        self.pesos: List[float] = []
+        # (metodo, query, inicio_s relativo, duracao_s, erro): o SQL só é gerado na exportação
+        self.consultas: List[tuple] = []
+        self.consultas_descartadas = 0
+
+    def indice(self, quadro: Quadro) -> int:
+        i = self._indices.get(quadro)
+        if i is None:
+            i = self._indices[quadro] = len(self.quadros)
+            self.quadros.append(quadro)
+        return i
+
+    def resumo(self) -> dict:
+        return {
+            "id": self.id,
+            "metodo": self.metodo,
+            "caminho": self.caminho,
+            "status": self.status,
+            "motivo": self.motivo,
+            "criado_em": self.criado_em,
+            "duracao_ms": round(self.duracao_s * 1000, 3),
+            "amostras": len(self.amostras),
+            "consultas": len(self.consultas) + self.consultas_descartadas,
+            "banco_ms": round(sum(c[3] for c in self.consultas) * 1000, 3),
+        }
+
+    def linha_do_tempo(self) -> List[dict]:
+        return [
+            {
+                "metodo": metodo,
+                "sql": consultas.sql_de(query),
+                "inicio_ms": round(inicio * 1000, 3),
+                "duracao_ms": round(duracao * 1000, 3),
+                "erro": erro,
+            }
+            for metodo, query, inicio, duracao, erro in self.consultas
+        ]
+
+    def speedscope(self) -> dict:
+        """Formato https://www.speedscope.app: CPU amostrada + consultas como eventos."""
+        quadros = [{"name": nome, "file": arquivo, "line": linha} for arquivo, linha, nome in self.quadros]
+        perfis = [{
+            "type": "sampled",
+            "name": f"{self.metodo} {self.caminho} (CPU amostrada)",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(self.pesos) * 1000,
+            "samples": [list(a) for a in self.amostras],
+            "weights": [p * 1000 for p in self.pesos],
+        }]
+        eventos, fim_anterior = [], 0.0
+        for c in sorted(self.linha_do_tempo(), key=lambda c: c["inicio_ms"]):
+            # eventos precisam ser aninhados: consultas concorrentes (gather) são cortadas
+            inicio = max(c["inicio_ms"], fim_anterior)
+            fim = c["inicio_ms"] + c["duracao_ms"]
+            if fim <= inicio:
+                continue
+            quadros.append({"name": f"SQL {c['metodo']}: {c['sql'][:200]}"})
+            eventos.append({"type": "O", "frame": len(quadros) - 1, "at": inicio})
+            eventos.append({"type": "C", "frame": len(quadros) - 1, "at": fim})
+            fim_anterior = fim
+        if eventos:
+            perfis.append({
+                "type": "evented",
+                "name": "banco (consultas)",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": max(self.duracao_s * 1000, fim_anterior),
+                "events": eventos,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"perfil {self.id}: {self.metodo} {self.caminho}",
+            "exporter": "rocketmail",
+            "activeProfileIndex": 0,
+            "shared": {"frames": quadros},
+            "profiles": perfis,
+        }
+
+    def pstats(self) -> bytes:
+        """
+        Mesmo formato que cProfile grava (marshal de {função: (cc, nc, tt, ct, callers)}),
+        carregável com pstats.Stats(arquivo). Montado das amostras: tempos são estimados
+        e "chamadas" contam amostras em que a função estava na pilha.
+        """
+        stats: Dict[Quadro, list] = {}
+        for pilha, peso in zip(self.amostras, self.pesos):
+            chaves = [self.quadros[i] for i in pilha]
+            for chave in set(chaves):
+                s = stats.setdefault(chave, [0, 0, 0.0, 0.0, {}])
+                s[0] += 1
+                s[1] += 1
+                s[3] += peso
+            stats[chaves[-1]][2] += peso
+            for chamador, chamado in set(zip(chaves, chaves[1:])):
+                a = stats[chamado][4].setdefault(chamador, [0, 0, 0.0, 0.0])
+                a[0] += 1
+                a[1] += 1
+                a[3] += peso
+            if len(chaves) > 1:
+                stats[chaves[-1]][4][chaves[-2]][2] += peso
+        return marshal.dumps({
+            chave: (cc, nc, tt, ct, {c: tuple(v) for c, v in chamadores.items()})
+            for chave, (cc, nc, tt, ct, chamadores) in stats.items()
+        })
+
+
+class _Amostrador(threading.Thread):
+    def __init__(self, perfil: Perfil, thread_id: int, intervalo_s: float):
+        super().__init__(name="perfil-amostrador", daemon=True)
+        self.perfil = perfil
+        self.thread_id = thread_id
+        self.intervalo_s = intervalo_s
+        self.parar = threading.Event()
+
+    def run(self):
+        perfil = self.perfil
+        anterior = time.perf_counter()
+        while not self.parar.wait(self.intervalo_s):
+            frame = sys._current_frames().get(self.thread_id)
+            agora = time.perf_counter()
+            if frame is None:
+                return
+            pilha = []
+            while frame is not None:
+                co = frame.f_code
+                pilha.append(perfil.indice((co.co_filename, co.co_firstlineno, co.co_name)))
+                frame = frame.f_back
+            pilha.reverse()
+            perfil.amostras.append(tuple(pilha))
+            perfil.pesos.append(agora - anterior)
+            anterior = agora
+            if len(perfil.amostras) >= PERFIL_MAX_AMOSTRAS:
+                return
+
+
+# ---------- estado do processo ----------
+perfis: Deque[Perfil] = deque(maxlen=PERFIL_BUFFER)
+_ids = itertools.count(1)
+_atual: contextvars.ContextVar[Optional[Perfil]] = contextvars.ContextVar("perfil_atual", default=None)
+_em_andamento = False
+
+
+def buscar(perfil_id: int) -> Optional[Perfil]:
+    for p in perfis:
+        if p.id == perfil_id:
+            return p
+    return None
+
+
+def _registrar_consulta(metodo, query, inicio, duracao, erro):
+    perfil = _atual.get()
+    if perfil is None:
+        return
+    if len(perfil.consultas) >= PERFIL_MAX_CONSULTAS:
+        perfil.consultas_descartadas += 1
+        return
+    perfil.consultas.append(
+        (metodo, query, inicio - perfil.inicio, duracao, type(erro).__name__ if erro else None)
+    )
+
+
+metricas.registrar_coletor("perfil", lambda: {"no_buffer": len(perfis), "em_andamento": _em_andamento})
+
+
+class PerfilMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # observador só com o middleware montado (PERFIL_ATIVO)
+        consultas.observar(_registrar_consulta)
+
+    @staticmethod
+    def _motivo(scope) -> Optional[str]:
+        if scope["path"].startswith(ISENTAS):
+            return None
+        for nome, valor in scope["headers"]:
+            if nome == HEADER:
+                # header inválido não liga nada (nem denuncia que existe)
+                return "header" if token_admin_valido(valor.decode("latin-1")) else None
+        if PERFIL_AMOSTRAGEM > 0 and random.random() < PERFIL_AMOSTRAGEM:
+            return "amostragem"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        global _em_andamento
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        motivo = self._motivo(scope)
+        if motivo is None:
+            return await self.app(scope, receive, send)
+        if _em_andamento:
+            metricas.incrementar("perfil.ignorados_ocupado")
+            return await self.app(scope, receive, send)
+
+        _em_andamento = True
+        perfil = Perfil(next(_ids), scope["method"], scope["path"], motivo)
+        token = _atual.set(perfil)
+        amostrador = _Amostrador(perfil, threading.get_ident(), PERFIL_INTERVALO_MS / 1000)
+        amostrador.start()
+
+        async def send_com_id(message):
+            if message["type"] == "http.response.start":
+                perfil.status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-perfil-id", str(perfil.id).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_id)
+        finally:
+            perfil.duracao_s = time.perf_counter() - perfil.inicio
+            amostrador.parar.set()
+            amostrador.join(timeout=1)
+            _atual.reset(token)
+            _em_andamento = False
+            perfis.append(perfil)
+            metricas.incrementar("perfil.capturados")
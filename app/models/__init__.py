@@ -1,4 +1,9 @@
 from .usuario import usuario
-from .post import post
+from .post import post, post_arquivo
 from .seguir import seguir
-from .like import like
+from .like import like, like_bucket
+from .purga import purga_usuario
+from .sugestao import sugestao, sugestao_pendente
+from .ranking import post_score, afinidade
+from .fila import tarefa
+from .notificacao import notificacao, notificacao_contador
@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, BigInteger, Integer, String, Text, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import metadata
+
+# Fila de efeitos colaterais das escritas (app/crud/fila.py). A tarefa é inserida na mesma
+# transação da escrita principal e apagada quando processada; morta_em marca as que
+# esgotaram as tentativas (ficam para inspeção, fora da fila).
+tarefa = Table(
+    "tarefa",
+    metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("tipo", String(50), nullable=False),
+    Column("payload", JSONB, nullable=False),
+    Column("tentativas", Integer, nullable=False, server_default="0"),
+    Column("executar_em", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("criado_em", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("erro", Text, nullable=True),
+    Column("morta_em", DateTime(timezone=True), nullable=True),
+    # cabeça da fila e lotes do mesmo tipo, só entre as vivas
+    Index("ix_tarefa_fila", "executar_em", postgresql_where=text("morta_em IS NULL")),
+    Index("ix_tarefa_tipo_fila", "tipo", "executar_em", postgresql_where=text("morta_em IS NULL")),
+)
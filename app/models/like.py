@@ -1,10 +1,25 @@
-from sqlalchemy import Table, Column, Integer, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Table, Column, Integer, ForeignKey, PrimaryKeyConstraint, DateTime, Index, func
 from app.database import metadata
 
 like = Table(
     "like",
     metadata,
     Column("usuario_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
-    Column("post_id", Integer, ForeignKey("post.id", ondelete="CASCADE"), nullable=False),
+    # sem FK: post é particionado (ver app/models/post.py)
+    Column("post_id", Integer, nullable=False),
+    Column("data_criacao", DateTime(timezone=True), nullable=False, server_default=func.now()),
     PrimaryKeyConstraint("usuario_id", "post_id", name="like_pkey"),
+    # curtidores de um post por data (keyset em /like/{post_id}/usuarios) e contagem por post
+    Index("ix_like_post_data", "post_id", "data_criacao", "usuario_id"),
+)
+
+# Contadores de likes por post em janelas de tempo (trending); buckets antigos expiram
+like_bucket = Table(
+    "like_bucket",
+    metadata,
+    Column("post_id", Integer, nullable=False),
+    Column("bucket", DateTime(timezone=True), nullable=False),
+    Column("likes", Integer, nullable=False, default=0),
+    PrimaryKeyConstraint("post_id", "bucket", name="like_bucket_pkey"),
+    Index("ix_like_bucket_bucket", "bucket"),
 )
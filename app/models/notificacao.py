@@ -0,0 +1,36 @@
+from sqlalchemy import Table, Column, BigInteger, Integer, String, Boolean, ForeignKey, DateTime, Index, func, text
+from app.database import metadata
+
+# Notificações agregadas por alvo: enquanto não lida, existe UMA linha por
+# (destinatário, tipo, alvo) e novos eventos só somam em `total` e trocam o último ator
+# ("X e mais 23 curtiram seu post"). Depois de lida, o próximo evento abre outra linha.
+notificacao = Table(
+    "notificacao",
+    metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("usuario_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
+    Column("tipo", String(20), nullable=False),
+    # post curtido (tipo "like"); 0 quando o alvo é o próprio destinatário ("seguir")
+    Column("alvo_id", Integer, nullable=False, server_default="0"),
+    # ator mais recente; total = quantos eventos foram agregados na linha
+    Column("ator_id", Integer, ForeignKey("usuario.id", ondelete="SET NULL"), nullable=True),
+    Column("total", Integer, nullable=False, server_default="1"),
+    Column("lida", Boolean, nullable=False, server_default="false"),
+    Column("criado_em", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("atualizado_em", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    # alvo do ON CONFLICT da agregação: só uma linha não lida por alvo
+    Index(
+        "ux_notificacao_nao_lida", "usuario_id", "tipo", "alvo_id",
+        unique=True, postgresql_where=text("NOT lida"),
+    ),
+    # listagem keyset: (atualizado_em, id) decrescente por destinatário
+    Index("ix_notificacao_usuario_atualizado", "usuario_id", "atualizado_em", "id"),
+)
+
+# Contador de não lidas mantido junto com as escritas (sem COUNT(*) na leitura)
+notificacao_contador = Table(
+    "notificacao_contador",
+    metadata,
+    Column("usuario_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), primary_key=True),
+    Column("nao_lidas", Integer, nullable=False, server_default="0"),
+)
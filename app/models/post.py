@@ -1,12 +1,67 @@
-from sqlalchemy import Table, Column, Integer, String, ForeignKey, DateTime
-from datetime import datetime, timezone
+from sqlalchemy import Table, Column, Integer, String, ForeignKey, DateTime, Index, PrimaryKeyConstraint, event, text
+from datetime import date, datetime, timezone
 from app.database import metadata
 
+# Particionada por mês em data_criacao: feed/timeline leem só as partições recentes e
+# meses antigos podem ser destacados (app/crud/particoes.py). A PK precisa conter a
+# chave de partição, então `id` sozinho não é mais único no catálogo: like, like_bucket
+# e post_score não têm FK para post e a limpeza deles é explícita (delete_post / purga).
 post = Table(
     "post",
     metadata,
-    Column("id", Integer, primary_key=True),
+    Column("id", Integer, autoincrement=True, nullable=False),
     Column("post", String, nullable=False),
     Column("usuario_id", Integer, ForeignKey("usuario.id")),
-    Column("data_criacao", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+    Column("data_criacao", DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)),
+    PrimaryKeyConstraint("id", "data_criacao", name="post_pkey"),
+    # posts por autor (timeline, contagem, último post do ETag)
+    Index("ix_post_usuario_id", "usuario_id", "id"),
+    Index("ix_post_usuario_data", "usuario_id", "data_criacao"),
+    Index("ix_post_data_criacao", "data_criacao"),
+    postgresql_partition_by="RANGE (data_criacao)",
+)
+
+POST_PARTICAO_DEFAULT = "post_default"
+
+
+def inicio_do_mes(d: date, deslocamento: int = 0) -> date:
+    """Primeiro dia do mês de `d`, deslocado `deslocamento` meses."""
+    n = d.year * 12 + (d.month - 1) + deslocamento
+    return date(n // 12, n % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    return f"post_p{mes.year:04d}{mes.month:02d}"
+
+
+def limites_particao(mes: date) -> tuple:
+    """Literais (UTC) de FOR VALUES FROM ... TO ... do mês."""
+    return f"'{mes.isoformat()} 00:00:00+00'", f"'{inicio_do_mes(mes, 1).isoformat()} 00:00:00+00'"
+
+
+@event.listens_for(post, "after_create")
+def _criar_particoes_iniciais(target, connection, **kw):
+    # tabela recém-criada (vazia): partição default + mês passado, atual e os próximos 3;
+    # daí em diante o worker de partições mantém a janela à frente
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {POST_PARTICAO_DEFAULT} PARTITION OF post DEFAULT"))
+    hoje = datetime.now(timezone.utc).date()
+    for deslocamento in range(-1, 4):
+        mes = inicio_do_mes(hoje, deslocamento)
+        de, ate = limites_particao(mes)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {nome_particao(mes)} PARTITION OF post FOR VALUES FROM ({de}) TO ({ate})"
+        ))
+
+
+# Arquivo frio: posts mais velhos que POST_ARQUIVO_IDADE_DIAS saem de `post` para cá
+# (app/crud/arquivo.py). Tabela simples, só com o índice que a timeline usa; as
+# leituras caem aqui quando a parte quente do autor se esgota.
+post_arquivo = Table(
+    "post_arquivo",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("post", String, nullable=False),
+    Column("usuario_id", Integer, ForeignKey("usuario.id")),
+    Column("data_criacao", DateTime(timezone=True), nullable=False),
+    Index("ix_post_arquivo_usuario_data", "usuario_id", "data_criacao"),
 )
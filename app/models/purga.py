@@ -0,0 +1,15 @@
+from sqlalchemy import Table, Column, Integer, String, DateTime
+from datetime import datetime, timezone
+from app.database import metadata
+
+# Progresso da purga de contas excluídas (sem FK: a linha sobrevive ao usuário)
+purga_usuario = Table(
+    "purga_usuario",
+    metadata,
+    Column("usuario_id", Integer, primary_key=True),
+    Column("fase", String(20), nullable=False, default="likes_dados"),
+    Column("removidos", Integer, nullable=False, default=0),
+    Column("criado_em", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+    Column("atualizado_em", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+    Column("concluido_em", DateTime(timezone=True), nullable=True),
+)
@@ -0,0 +1,26 @@
+from sqlalchemy import Table, Column, Integer, Float, ForeignKey, DateTime, PrimaryKeyConstraint, Index
+from app.database import metadata
+
+# Score de engajamento por post, mantido incrementalmente (create_post / dar_like / remover_like).
+# hot = log(1 + likes) + epoch(data_criacao) / DECAIMENTO  -> não depende de "agora", então é indexável.
+post_score = Table(
+    "post_score",
+    metadata,
+    # sem FK: post é particionado; delete_post / purga apagam o score junto
+    Column("post_id", Integer, primary_key=True),
+    Column("usuario_id", Integer, nullable=False),
+    Column("data_criacao", DateTime(timezone=True), nullable=False),
+    Column("likes", Integer, nullable=False, default=0),
+    Column("hot", Float, nullable=False),
+    Index("ix_post_score_hot", "hot"),
+)
+
+# Afinidade viewer -> autor: quantos posts do autor o viewer curtiu
+afinidade = Table(
+    "afinidade",
+    metadata,
+    Column("usuario_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
+    Column("autor_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
+    Column("likes", Integer, nullable=False, default=0),
+    PrimaryKeyConstraint("usuario_id", "autor_id", name="afinidade_pkey"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy import Table, Column, Integer, ForeignKey, DateTime, Index, func
 from app.database import metadata
 
 seguir = Table(
@@ -6,4 +6,8 @@ seguir = Table(
     metadata,
     Column("seguidor_id", Integer, ForeignKey("usuario.id"), primary_key=True),
     Column("seguido_id", Integer, ForeignKey("usuario.id"), primary_key=True),
+    Column("data_criacao", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    # listas paginadas por data de follow (keyset) e contagem de seguidores
+    Index("ix_seguir_seguido_data", "seguido_id", "data_criacao", "seguidor_id"),
+    Index("ix_seguir_seguidor_data", "seguidor_id", "data_criacao", "seguido_id"),
 )
@@ -0,0 +1,37 @@
+from sqlalchemy import Table, Column, Integer, ForeignKey, DateTime, PrimaryKeyConstraint, Index
+from datetime import datetime, timezone
+from app.database import metadata
+
+# "Quem seguir": top-N pré-calculado por usuário (amigos de amigos)
+sugestao = Table(
+    "sugestao",
+    metadata,
+    Column("usuario_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
+    Column("sugerido_id", Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False),
+    Column("em_comum", Integer, nullable=False),
+    Column("posicao", Integer, nullable=False),
+    PrimaryKeyConstraint("usuario_id", "sugerido_id", name="sugestao_pkey"),
+    Index("ix_sugestao_usuario_posicao", "usuario_id", "posicao"),
+)
+
+# Usuários cujas arestas mudaram desde o último cálculo
+sugestao_pendente = Table(
+    "sugestao_pendente",
+    metadata,
+    Column("usuario_id", Integer, primary_key=True),
+    Column("marcado_em", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+)
+
+# Usuários cujas arestas de saída mudaram: os seguidores deles ainda precisam ir para
+# sugestao_pendente. O worker percorre os seguidores em lotes (keyset por data do follow);
+# marcado_em > iniciado_em ao fim de uma passada = mudou de novo no meio, recomeça.
+sugestao_expansao = Table(
+    "sugestao_expansao",
+    metadata,
+    Column("usuario_id", Integer, primary_key=True),
+    Column("marcado_em", DateTime(timezone=True), nullable=False),
+    Column("iniciado_em", DateTime(timezone=True), nullable=False),
+    Column("cursor_data", DateTime(timezone=True), nullable=True),
+    Column("cursor_seguidor_id", Integer, nullable=True),
+    Index("ix_sugestao_expansao_marcado", "marcado_em"),
+)
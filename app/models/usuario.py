@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String
+from sqlalchemy import Table, Column, Integer, String, DateTime, Index, func
 from app.database import metadata
 
 usuario = Table(
@@ -8,4 +8,18 @@ usuario = Table(
     Column("nome", String(100), nullable=False),
     Column("email", String(100), nullable=False, unique=True),
     Column("senha", String(200), nullable=False),
+    # tombstone: conta excluída, aguardando a purga em segundo plano
+    Column("excluido_em", DateTime(timezone=True), nullable=True),
+    # marcas d'água dos ETags (app/crud/versao.py)
+    Column("atualizado_em", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("versao", Integer, nullable=False, server_default="0"),
+    # keyset de listar_usuarios ordenado por nome (id desempata)
+    Index("ix_usuario_nome_id", "nome", "id"),
+)
+
+# busca por prefixo: lower(nome) LIKE 'abc%' usa este índice independente da collation
+Index(
+    "ix_usuario_nome_prefixo",
+    func.lower(usuario.c.nome).label("nome_lower"),
+    postgresql_ops={"nome_lower": "text_pattern_ops"},
 )
@@ -0,0 +1,164 @@
+# app/monitor_loop.py
+# Monitor do event loop: mede continuamente o atraso de agendamento (lag) e, quando o loop
+# fica preso além de um limiar, captura a pilha de quem o prendeu.
+#   - batimento: uma task dorme LOOP_INTERVALO_MS e mede quanto acordou atrasada;
+#     o atraso é tempo em que o loop não conseguiu rodar nada (código síncrono, CPU);
+#   - vigia: uma thread confere o último batimento; se ele passou do limiar, guarda a
+#     pilha da thread do loop naquele instante (quem está bloqueando) e o nome da task.
+#     Código C que segura o GIL (ex.: hash sem liberar o GIL) atrasa a própria vigia: aí o
+#     bloqueio ainda é registrado pelo batimento, mas sem pilha.
+# Lag (último, máximo, p50/p99 na janela) e bloqueios saem em /metricas ("loop"); as pilhas,
+# em /admin/loop/bloqueios. Nos testes, o conftest usa o monitor para falhar o teste em que
+# o loop ficou bloqueado além de LOOP_BLOQUEIO_MAX_MS.
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+from app import metricas
+
+LOOP_MONITOR_ATIVO = os.getenv("LOOP_MONITOR_ATIVO", "1") == "1"
+LOOP_INTERVALO_MS = float(os.getenv("LOOP_INTERVALO_MS", "100"))
+LOOP_LIMIAR_MS = float(os.getenv("LOOP_LIMIAR_MS", "100"))
+LOOP_JANELA = int(os.getenv("LOOP_JANELA", "600"))
+LOOP_BLOQUEIOS_BUFFER = int(os.getenv("LOOP_BLOQUEIOS_BUFFER", "20"))
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class MonitorLoop:
+    def __init__(
+        self,
+        intervalo_ms: float = LOOP_INTERVALO_MS,
+        limiar_ms: float = LOOP_LIMIAR_MS,
+        janela: int = LOOP_JANELA,
+        buffer: int = LOOP_BLOQUEIOS_BUFFER,
+    ):
+        self.intervalo_s = intervalo_ms / 1000
+        self.limiar_s = limiar_ms / 1000
+        self.janela: Deque[float] = deque(maxlen=janela)
+        self.bloqueios: Deque[dict] = deque(maxlen=buffer)
+        self.total_bloqueios = 0
+        self.lag_max_s = 0.0
+        self._lock = threading.Lock()
+        self._batimento = 0.0
+        self._bloqueio_atual: Optional[dict] = None
+        # loop parado (não só ocupado): ex. entre as fases de um teste no pytest-asyncio
+        self._loop_parado = False
+        self._parar = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._vigia: Optional[threading.Thread] = None
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self):
+        """Chame de dentro do loop a monitorar."""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._batimento = time.monotonic()
+        self._parar.clear()
+        self._task = self._loop.create_task(self._batimentos(), name="monitor-loop")
+        self._vigia = threading.Thread(target=self._vigiar, name="monitor-loop-vigia", daemon=True)
+        self._vigia.start()
+
+    async def parar(self):
+        self._parar.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._vigia is not None:
+            self._vigia.join(timeout=1)
+
+    # ---------- batimento (no loop) ----------
+    async def _batimentos(self):
+        # a primeira medida parte de iniciar(): o loop pode estar preso antes desta task rodar
+        inicio = self._batimento
+        while True:
+            await asyncio.sleep(self.intervalo_s)
+            agora = time.monotonic()
+            self._registrar(max(0.0, agora - inicio - self.intervalo_s), agora)
+            inicio = agora
+
+    def _registrar(self, lag_s: float, agora: float):
+        with self._lock:
+            bloqueio, self._bloqueio_atual = self._bloqueio_atual, None
+            parado, self._loop_parado = self._loop_parado, False
+            self._batimento = agora
+        if parado:
+            # o atraso foi o loop fora de execução, não bloqueado: descarta a medida
+            return
+        self.janela.append(lag_s)
+        self.lag_max_s = max(self.lag_max_s, lag_s)
+        if bloqueio is None and lag_s >= self.limiar_s:
+            # a vigia não conseguiu olhar a tempo (GIL preso): fica o registro, sem pilha
+            bloqueio = self._novo_bloqueio(None, None)
+        if bloqueio is not None:
+            bloqueio["duracao_ms"] = round(lag_s * 1000, 1)
+            logger.warning(
+                "⚠️ event loop bloqueado por %.0f ms (task %s)%s",
+                lag_s * 1000,
+                bloqueio["tarefa"],
+                ":\n" + "".join(bloqueio["pilha"]) if bloqueio["pilha"] else "",
+            )
+
+    # ---------- vigia (thread) ----------
+    def _vigiar(self):
+        verificacao = max(0.005, min(self.intervalo_s, self.limiar_s) / 2)
+        while not self._parar.wait(verificacao):
+            with self._lock:
+                if self._bloqueio_atual is not None:
+                    continue  # este bloqueio já tem pilha
+                if not self._loop.is_running():
+                    self._loop_parado = True
+                    continue
+                if time.monotonic() - self._batimento - self.intervalo_s < self.limiar_s:
+                    continue
+                frame = sys._current_frames().get(self._thread_id)
+                pilha = traceback.format_stack(frame) if frame is not None else None
+                del frame
+                try:
+                    tarefa = asyncio.current_task(self._loop)
+                except Exception:
+                    tarefa = None
+                self._bloqueio_atual = self._novo_bloqueio(pilha, tarefa)
+
+    def _novo_bloqueio(self, pilha: Optional[List[str]], tarefa) -> dict:
+        bloqueio = {
+            "em": time.time(),
+            "duracao_ms": None,  # preenchida quando o loop volta
+            "tarefa": tarefa.get_name() if tarefa is not None else None,
+            "pilha": pilha,
+        }
+        self.bloqueios.append(bloqueio)
+        self.total_bloqueios += 1
+        metricas.incrementar("loop.bloqueios")
+        return bloqueio
+
+    # ---------- leitura ----------
+    def estado(self) -> dict:
+        janela = list(self.janela)
+        return {
+            "lag_ms": round(janela[-1] * 1000, 2) if janela else 0.0,
+            "lag_p50_ms": round(_percentil(janela, 0.50) * 1000, 2),
+            "lag_p99_ms": round(_percentil(janela, 0.99) * 1000, 2),
+            "lag_max_ms": round(self.lag_max_s * 1000, 2),
+            "bloqueios": self.total_bloqueios,
+        }
+
+
+# monitor do processo (iniciado no lifespan, app/main.py)
+monitor = MonitorLoop()
+metricas.registrar_coletor("loop", monitor.estado)
@@ -0,0 +1,22 @@
+# app/paginacao.py
+# Cursores opacos para paginação keyset: o cliente devolve o cursor recebido
+# e a consulta continua a partir da última linha entregue (sem OFFSET).
+import base64
+import json
+
+
+def codificar_cursor(*valores) -> str:
+    bruto = json.dumps(list(valores), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, tamanho: int) -> list:
+    """Levanta ValueError se o cursor não for um cursor válido com `tamanho` valores."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except Exception as e:
+        raise ValueError("cursor inválido") from e
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise ValueError("cursor inválido")
+    return valores
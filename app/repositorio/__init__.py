@@ -0,0 +1,27 @@
+# app/repositorio/__init__.py
+# Escolha do backend de armazenamento das rotas do caminho quente:
+#   REPOSITORIO=postgres (default) -> RepositorioPostgres (app/crud + Postgres)
+#   REPOSITORIO=memoria            -> RepositorioMemoria (sem banco; benchmarks/profiling)
+# Rotas fora do contrato (listagens, sugestões, trending, feed ranked, exclusão de conta)
+# continuam dependendo de get_database e respondem 503 no modo memória.
+import os
+
+from app.database import database, get_database
+from app.repositorio.base import Repositorio
+from app.repositorio.memoria import RepositorioMemoria
+from app.repositorio.postgres import RepositorioPostgres
+
+REPOSITORIO = os.getenv("REPOSITORIO", "postgres")
+if REPOSITORIO not in ("postgres", "memoria"):
+    raise ValueError(f"REPOSITORIO inválido: {REPOSITORIO!r} (use 'postgres' ou 'memoria').")
+
+_postgres = RepositorioPostgres(database)
+memoria = RepositorioMemoria()
+
+
+def get_repositorio() -> Repositorio:
+    if REPOSITORIO == "memoria":
+        return memoria
+    get_database()  # 503 enquanto o pool ainda conecta
+    return _postgres
+
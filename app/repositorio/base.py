@@ -0,0 +1,57 @@
+# app/repositorio/base.py
+# Contrato das operações do caminho quente da API (usuário, post, like, seguir).
+# Implementações: postgres.py (delegando para app/crud) e memoria.py (dicts/listas).
+# Formatos de retorno e erros (HTTPException 404/403/409/401) são os mesmos do crud.
+from typing import Dict, List, Protocol
+
+from app.schemas.post import PostCreate
+from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
+
+
+class Repositorio(Protocol):
+    # ---------- usuário ----------
+    async def criar_usuario(self, dados: UsuarioCreate) -> dict: ...
+
+    async def autenticar_usuario(self, email: str, senha: str) -> dict: ...
+
+    async def buscar_usuario_por_id(self, usuario_id: int): ...
+
+    async def buscar_usuarios_por_ids(self, usuario_ids: List[int]) -> list: ...
+
+    async def atualizar_usuario(self, usuario_id: int, dados: UsuarioUpdate) -> dict: ...
+
+    async def stats_usuario(self, usuario_id: int) -> dict: ...
+
+    async def marcas_usuario(self, usuario_id: int):
+        """(atualizado_em, versao, ultimo_post) para os ETags, ou None se o usuário não existe."""
+        ...
+
+    # ---------- post ----------
+    async def create_post(self, dados: PostCreate, usuario_id: int) -> dict: ...
+
+    async def create_posts(self, dados: List[PostCreate], usuario_id: int) -> list: ...
+
+    async def get_posts_por_usuario(self, usuario_id: int, limit: int = 50, offset: int = 0) -> list: ...
+
+    async def get_feed(self, viewer_id: int, limit: int = 50, offset: int = 0) -> list: ...
+
+    async def delete_post(self, post_id: int, usuario_id: int) -> dict: ...
+
+    # ---------- like ----------
+    async def dar_like(self, usuario_id: int, post_id: int) -> dict: ...
+
+    async def remover_like(self, usuario_id: int, post_id: int) -> dict: ...
+
+    async def resumo_like(self, usuario_id: int, post_id: int) -> dict: ...
+
+    async def batch_resumo_like(self, usuario_id: int, post_ids: List[int]) -> Dict[int, dict]: ...
+
+    # ---------- seguir ----------
+    async def seguir_usuario(self, seguidor_id: int, seguido_id: int) -> dict: ...
+
+    async def deixar_de_seguir(self, seguidor_id: int, seguido_id: int) -> dict: ...
+
+    async def aplicar_lote(self, seguidor_id: int, seguir_ids: List[int], deixar_ids: List[int]) -> dict: ...
+
+    async def status_relacoes(self, usuario_id: int, outros_ids: List[int]) -> Dict[int, dict]: ...
+
@@ -0,0 +1,249 @@
+# app/repositorio/memoria.py
+# Repositório em memória (REPOSITORIO=memoria): mesmas operações, formatos e ordenações
+# do Postgres, sem banco. Serve para medir/perfilar o custo puro de Python + HTTP de
+# cada rota e para rodar a API localmente. Nada é persistido.
+#
+# Estruturas (ids crescem com o tempo, então ordem de id = ordem de data_criacao):
+#   - usuarios:   id -> dict (mesmas colunas da tabela), por_email: email -> id
+#   - posts:      id -> dict; ordem: todos os ids em ordem crescente;
+#                 por_autor: usuario_id -> ids em ordem crescente (timeline = fatia invertida)
+#   - likes:      post_id -> set(usuario_id)
+#   - seguindo / seguidores: usuario_id -> set(usuario_id)
+import asyncio
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import chain, count, islice
+from typing import Dict, List, Set
+
+from fastapi import HTTPException, status
+
+from app.crud.usuario import criar_token_acesso, gerar_hash_senha, verificar_senha
+from app.schemas.post import PostCreate
+from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
+
+
+def _remover_ordenado(ids: List[int], valor: int):
+    i = bisect_left(ids, valor)
+    if i < len(ids) and ids[i] == valor:
+        del ids[i]
+
+
+class RepositorioMemoria:
+    def __init__(self):
+        self._ids_usuario = count(1)
+        self._ids_post = count(1)
+        self.usuarios: Dict[int, dict] = {}
+        self.por_email: Dict[str, int] = {}
+        self.posts: Dict[int, dict] = {}
+        self.ordem: List[int] = []
+        self.por_autor: Dict[int, List[int]] = defaultdict(list)
+        self.likes: Dict[int, Set[int]] = defaultdict(set)
+        self.seguindo: Dict[int, Set[int]] = defaultdict(set)
+        self.seguidores: Dict[int, Set[int]] = defaultdict(set)
+
+    # ---------- helpers ----------
+    def _usuario_ou_404(self, usuario_id: int) -> dict:
+        row = self.usuarios.get(usuario_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        return row
+
+    def _incrementar_versao(self, *usuario_ids: int):
+        for uid in set(usuario_ids):
+            row = self.usuarios.get(uid)
+            if row is not None:
+                row["versao"] += 1
+
+    def _post_response(self, p: dict) -> dict:
+        return {
+            "id": p["id"],
+            "post": p["post"],
+            "data_criacao": p["data_criacao"],
+            "usuario": {"id": p["usuario_id"], "nome": self.usuarios[p["usuario_id"]]["nome"]},
+        }
+
+    def _inserir_post(self, texto: str, usuario_id: int, quando: datetime) -> dict:
+        pid = next(self._ids_post)
+        p = {"id": pid, "post": texto, "usuario_id": usuario_id, "data_criacao": quando}
+        self.posts[pid] = p
+        self.ordem.append(pid)
+        self.por_autor[usuario_id].append(pid)
+        return p
+
+    # ---------- usuário ----------
+    async def criar_usuario(self, dados: UsuarioCreate) -> dict:
+        # hash antes da checagem: daqui até o insert não há await, então não há corrida no e-mail
+        senha_hash = await asyncio.to_thread(gerar_hash_senha, dados.senha)
+        if dados.email in self.por_email:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="E-mail já cadastrado.")
+        uid = next(self._ids_usuario)
+        self.usuarios[uid] = {
+            "id": uid,
+            "nome": dados.nome,
+            "email": dados.email,
+            "senha": senha_hash,
+            "excluido_em": None,
+            "atualizado_em": datetime.now(timezone.utc),
+            "versao": 0,
+        }
+        self.por_email[dados.email] = uid
+        return {"id": uid, "nome": dados.nome, "email": dados.email}
+
+    async def autenticar_usuario(self, email: str, senha: str) -> dict:
+        user = self.usuarios.get(self.por_email.get(email))
+        if not user or not await asyncio.to_thread(verificar_senha, senha, user["senha"]):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
+        token = criar_token_acesso({"sub": str(user["id"]), "email": user["email"]})
+        return {"access_token": token, "token_type": "bearer"}
+
+    async def buscar_usuario_por_id(self, usuario_id: int):
+        return self.usuarios.get(usuario_id)
+
+    async def buscar_usuarios_por_ids(self, usuario_ids: List[int]) -> list:
+        return [self.usuarios[uid] for uid in dict.fromkeys(usuario_ids) if uid in self.usuarios]
+
+    async def atualizar_usuario(self, usuario_id: int, dados: UsuarioUpdate) -> dict:
+        senha_hash = await asyncio.to_thread(gerar_hash_senha, dados.senha) if dados.senha is not None else None
+        row = self._usuario_ou_404(usuario_id)
+        if dados.email is not None and self.por_email.get(dados.email, usuario_id) != usuario_id:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="E-mail já cadastrado.")
+        if dados.nome is not None or dados.email is not None or dados.senha is not None:
+            if dados.nome is not None:
+                row["nome"] = dados.nome
+            if dados.email is not None:
+                del self.por_email[row["email"]]
+                row["email"] = dados.email
+                self.por_email[dados.email] = usuario_id
+            if dados.senha is not None:
+                row["senha"] = senha_hash
+            row["atualizado_em"] = datetime.now(timezone.utc)
+        return {"id": row["id"], "nome": row["nome"], "email": row["email"]}
+
+    async def stats_usuario(self, usuario_id: int) -> dict:
+        row = self._usuario_ou_404(usuario_id)
+        return {
+            "usuario": {"id": row["id"], "nome": row["nome"], "email": row["email"]},
+            "stats": {
+                "posts": len(self.por_autor.get(usuario_id, ())),
+                "seguidores": len(self.seguidores.get(usuario_id, ())),
+                "seguindo": len(self.seguindo.get(usuario_id, ())),
+            },
+        }
+
+    async def marcas_usuario(self, usuario_id: int):
+        row = self.usuarios.get(usuario_id)
+        if row is None:
+            return None
+        ids = self.por_autor.get(usuario_id)
+        return {"atualizado_em": row["atualizado_em"], "versao": row["versao"], "ultimo_post": ids[-1] if ids else None}
+
+    # ---------- post ----------
+    async def create_post(self, dados: PostCreate, usuario_id: int) -> dict:
+        self._usuario_ou_404(usuario_id)
+        return self._post_response(self._inserir_post(dados.post, usuario_id, datetime.now(timezone.utc)))
+
+    async def create_posts(self, dados: List[PostCreate], usuario_id: int) -> list:
+        if not dados:
+            return []
+        self._usuario_ou_404(usuario_id)
+        agora = datetime.now(timezone.utc)
+        return [
+            self._post_response(self._inserir_post(d.post, usuario_id, agora + timedelta(microseconds=i)))
+            for i, d in enumerate(dados)
+        ]
+
+    async def get_posts_por_usuario(self, usuario_id: int, limit: int = 50, offset: int = 0) -> list:
+        if usuario_id not in self.usuarios:
+            return []
+        ids = self.por_autor.get(usuario_id, [])
+        fim = len(ids) - offset
+        if fim <= 0:
+            return []
+        return [self._post_response(self.posts[pid]) for pid in reversed(ids[max(fim - limit, 0):fim])]
+
+    async def get_feed(self, viewer_id: int, limit: int = 50, offset: int = 0) -> list:
+        # prioridade 0: posts de quem o viewer segue (merge das timelines, mais novo primeiro);
+        # prioridade 1: todo o resto, também do mais novo para o mais antigo
+        seguidos = self.seguindo.get(viewer_id, set())
+        dos_seguidos = heapq.merge(
+            *(reversed(self.por_autor[uid]) for uid in seguidos if uid in self.por_autor), reverse=True
+        )
+        demais = (pid for pid in reversed(self.ordem) if self.posts[pid]["usuario_id"] not in seguidos)
+        return [self._post_response(self.posts[pid]) for pid in islice(chain(dos_seguidos, demais), offset, offset + limit)]
+
+    async def delete_post(self, post_id: int, usuario_id: int) -> dict:
+        p = self.posts.get(post_id)
+        if p is None:
+            raise HTTPException(status_code=404, detail="Post não encontrado")
+        if p["usuario_id"] != usuario_id:
+            raise HTTPException(status_code=403, detail="Sem permissão para deletar este post")
+        del self.posts[post_id]
+        _remover_ordenado(self.ordem, post_id)
+        _remover_ordenado(self.por_autor[usuario_id], post_id)
+        self.likes.pop(post_id, None)
+        self._incrementar_versao(usuario_id)
+        return {"deleted": True, "id": post_id}
+
+    # ---------- like ----------
+    async def dar_like(self, usuario_id: int, post_id: int) -> dict:
+        if post_id not in self.posts:
+            raise HTTPException(status_code=404, detail="Post não encontrado")
+        self.likes[post_id].add(usuario_id)
+        return {"liked": True, "post_id": post_id}
+
+    async def remover_like(self, usuario_id: int, post_id: int) -> dict:
+        curtidores = self.likes.get(post_id)
+        if curtidores is not None:
+            curtidores.discard(usuario_id)
+        return {"liked": False, "post_id": post_id}
+
+    async def resumo_like(self, usuario_id: int, post_id: int) -> dict:
+        curtidores = self.likes.get(post_id, ())
+        return {"post_id": post_id, "count": len(curtidores), "liked_by_me": usuario_id in curtidores}
+
+    async def batch_resumo_like(self, usuario_id: int, post_ids: List[int]) -> Dict[int, dict]:
+        return {int(pid): await self.resumo_like(usuario_id, int(pid)) for pid in post_ids}
+
+    # ---------- seguir ----------
+    async def seguir_usuario(self, seguidor_id: int, seguido_id: int) -> dict:
+        if seguidor_id == seguido_id:
+            raise HTTPException(status_code=400, detail="Não é possível seguir a si mesmo")
+        self._usuario_ou_404(seguidor_id)
+        self._usuario_ou_404(seguido_id)
+        if seguido_id in self.seguindo[seguidor_id]:
+            raise HTTPException(status_code=409, detail="Já segue este usuário")
+        self.seguindo[seguidor_id].add(seguido_id)
+        self.seguidores[seguido_id].add(seguidor_id)
+        self._incrementar_versao(seguidor_id, seguido_id)
+        return {"seguidor_id": seguidor_id, "seguido_id": seguido_id}
+
+    async def deixar_de_seguir(self, seguidor_id: int, seguido_id: int) -> dict:
+        self.seguindo[seguidor_id].discard(seguido_id)
+        self.seguidores[seguido_id].discard(seguidor_id)
+        self._incrementar_versao(seguidor_id, seguido_id)
+        return {"deleted": True, "seguidor_id": seguidor_id, "seguido_id": seguido_id}
+
+    async def aplicar_lote(self, seguidor_id: int, seguir_ids: List[int], deixar_ids: List[int]) -> dict:
+        # mesmas regras do INSERT ... SELECT: ignora já seguidos, o próprio usuário e inexistentes
+        meus = self.seguindo[seguidor_id]
+        seguidos = sorted(
+            uid for uid in set(seguir_ids)
+            if uid != seguidor_id and uid in self.usuarios and uid not in meus
+        )
+        deixados = sorted(uid for uid in set(deixar_ids) if uid in meus)
+        for uid in seguidos:
+            meus.add(uid)
+            self.seguidores[uid].add(seguidor_id)
+        for uid in deixados:
+            meus.discard(uid)
+            self.seguidores[uid].discard(seguidor_id)
+        if seguidos or deixados:
+            self._incrementar_versao(seguidor_id, *seguidos, *deixados)
+        return {"seguidos": seguidos, "deixados": deixados}
+
+    async def status_relacoes(self, usuario_id: int, outros_ids: List[int]) -> Dict[int, dict]:
+        meus = self.seguindo.get(usuario_id, ())
+        me_seguem = self.seguidores.get(usuario_id, ())
+        return {uid: {"eu_sigo": uid in meus, "me_segue": uid in me_seguem} for uid in dict.fromkeys(outros_ids)}
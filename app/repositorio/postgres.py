@@ -0,0 +1,83 @@
+# app/repositorio/postgres.py
+# Repositório de produção: só repassa para as funções de app/crud (que continuam sendo
+# a implementação de verdade, com single-flight, caches e SQL específico do Postgres).
+from typing import Dict, List
+
+from databases import Database
+
+from app.crud import like as like_crud
+from app.crud import post as post_crud
+from app.crud import seguir as seguir_crud
+from app.crud import usuario as usuario_crud
+from app.crud import versao as versao_crud
+from app.schemas.post import PostCreate
+from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
+
+
+class RepositorioPostgres:
+    def __init__(self, db: Database):
+        self.db = db
+
+    # ---------- usuário ----------
+    async def criar_usuario(self, dados: UsuarioCreate) -> dict:
+        return await usuario_crud.criar_usuario(self.db, dados)
+
+    async def autenticar_usuario(self, email: str, senha: str) -> dict:
+        return await usuario_crud.autenticar_usuario(self.db, email, senha)
+
+    async def buscar_usuario_por_id(self, usuario_id: int):
+        return await usuario_crud.buscar_usuario_por_id(self.db, usuario_id)
+
+    async def buscar_usuarios_por_ids(self, usuario_ids: List[int]) -> list:
+        return await usuario_crud.buscar_usuarios_por_ids(self.db, usuario_ids)
+
+    async def atualizar_usuario(self, usuario_id: int, dados: UsuarioUpdate) -> dict:
+        return await usuario_crud.atualizar_usuario(self.db, usuario_id, dados)
+
+    async def stats_usuario(self, usuario_id: int) -> dict:
+        return await usuario_crud.stats_usuario(self.db, usuario_id)
+
+    async def marcas_usuario(self, usuario_id: int):
+        return await versao_crud.marcas_usuario(self.db, usuario_id)
+
+    # ---------- post ----------
+    async def create_post(self, dados: PostCreate, usuario_id: int) -> dict:
+        return await post_crud.create_post(self.db, dados, usuario_id)
+
+    async def create_posts(self, dados: List[PostCreate], usuario_id: int) -> list:
+        return await post_crud.create_posts(self.db, dados, usuario_id)
+
+    async def get_posts_por_usuario(self, usuario_id: int, limit: int = 50, offset: int = 0) -> list:
+        return await post_crud.get_posts_por_usuario(self.db, usuario_id, limit=limit, offset=offset)
+
+    async def get_feed(self, viewer_id: int, limit: int = 50, offset: int = 0) -> list:
+        return await post_crud.get_feed(self.db, viewer_id=viewer_id, limit=limit, offset=offset)
+
+    async def delete_post(self, post_id: int, usuario_id: int) -> dict:
+        return await post_crud.delete_post(self.db, post_id, usuario_id)
+
+    # ---------- like ----------
+    async def dar_like(self, usuario_id: int, post_id: int) -> dict:
+        return await like_crud.dar_like(self.db, usuario_id, post_id)
+
+    async def remover_like(self, usuario_id: int, post_id: int) -> dict:
+        return await like_crud.remover_like(self.db, usuario_id, post_id)
+
+    async def resumo_like(self, usuario_id: int, post_id: int) -> dict:
+        return await like_crud.resumo_like(self.db, usuario_id, post_id)
+
+    async def batch_resumo_like(self, usuario_id: int, post_ids: List[int]) -> Dict[int, dict]:
+        return await like_crud.batch_resumo_like(self.db, usuario_id, post_ids)
+
+    # ---------- seguir ----------
+    async def seguir_usuario(self, seguidor_id: int, seguido_id: int) -> dict:
+        return await seguir_crud.seguir_usuario(self.db, seguidor_id, seguido_id)
+
+    async def deixar_de_seguir(self, seguidor_id: int, seguido_id: int) -> dict:
+        return await seguir_crud.deixar_de_seguir(self.db, seguidor_id, seguido_id)
+
+    async def aplicar_lote(self, seguidor_id: int, seguir_ids: List[int], deixar_ids: List[int]) -> dict:
+        return await seguir_crud.aplicar_lote(self.db, seguidor_id, seguir_ids, deixar_ids)
+
+    async def status_relacoes(self, usuario_id: int, outros_ids: List[int]) -> Dict[int, dict]:
+        return await seguir_crud.status_relacoes(self.db, usuario_id, outros_ids)
@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+
+from app.admin import exigir_admin
+from app.middleware import perfil as perfil_mw
+from app.monitor_loop import monitor as monitor_loop
+
+# Fora do OpenAPI e protegido por token admin (X-Admin-Token, ver app/admin.py)
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(exigir_admin)], include_in_schema=False)
+
+
+def _perfil_ou_404(perfil_id: int) -> perfil_mw.Perfil:
+    perfil = perfil_mw.buscar(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado (ou já saiu do buffer)")
+    return perfil
+
+
+@router.get("/perfis")
+async def listar_perfis():
+    """Perfis no buffer, do mais recente ao mais antigo."""
+    return [p.resumo() for p in reversed(perfil_mw.perfis)]
+
+
+@router.get("/perfis/{perfil_id}")
+async def detalhar_perfil(perfil_id: int):
+    """Resumo + linha do tempo das consultas ao banco."""
+    perfil = _perfil_ou_404(perfil_id)
+    linha = await asyncio.to_thread(perfil.linha_do_tempo)
+    return {**perfil.resumo(), "consultas_descartadas": perfil.consultas_descartadas, "linha_do_tempo": linha}
+
+
+@router.get("/perfis/{perfil_id}/download")
+async def baixar_perfil(perfil_id: int, formato: str = Query("speedscope", pattern="^(speedscope|pstats)$")):
+    """
+    speedscope: abra em https://www.speedscope.app;
+    pstats: `python -m pstats perfil-N.pstats` (ou snakeviz).
+    """
+    perfil = _perfil_ou_404(perfil_id)
+    # exportar é CPU (SQL compilado, agregação das amostras): fora do event loop
+    if formato == "pstats":
+        corpo = await asyncio.to_thread(perfil.pstats)
+        return Response(
+            corpo,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.pstats"'},
+        )
+    corpo = await asyncio.to_thread(perfil.speedscope)
+    return JSONResponse(
+        corpo, headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.speedscope.json"'}
+    )
+
+
+@router.get("/loop/bloqueios")
+async def bloqueios_do_loop():
+    """Últimos bloqueios do event loop (app/monitor_loop.py), do mais recente ao mais antigo, com a pilha."""
+    return {**monitor_loop.estado(), "recentes": list(reversed(monitor_loop.bloqueios))}
@@ -1,11 +1,13 @@
 # app/routers/like.py
-from fastapi import APIRouter, Depends, Query
-from typing import List, Dict
 from databases import Database
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict
 
-from app.database import get_database
-from app.crud.usuario import get_current_user
 from app.crud import like as like_crud
+from app.crud.usuario import get_current_user
+from app.database import get_database
+from app.repositorio import Repositorio, get_repositorio
+from app.schemas.like import CurtidoresPagina
 
 router = APIRouter(prefix="/like", tags=["Like"])
 
@@ -13,36 +15,60 @@ router = APIRouter(prefix="/like", tags=["Like"])
 @router.get("/batch")
 async def get_like_summary_batch(
     post_ids: List[int] = Query(..., description="IDs de post separados por vírgula"),
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ) -> Dict[int, dict]:
     """
     Ex.: /like/batch?post_ids=1&post_ids=2&post_ids=3
     Retorna { 1: {...}, 2: {...} }
     """
-    return await like_crud.batch_resumo_like(db, usuario_id, post_ids)
+    return await repo.batch_resumo_like(usuario_id, post_ids)
 
 # --- Rotas por post_id (dinâmicas) ---
 @router.post("/{post_id}")
 async def like_post(
     post_id: int,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await like_crud.dar_like(db, usuario_id, post_id)
+    return await repo.dar_like(usuario_id, post_id)
 
 @router.delete("/{post_id}")
 async def unlike_post(
     post_id: int,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await like_crud.remover_like(db, usuario_id, post_id)
+    return await repo.remover_like(usuario_id, post_id)
 
 @router.get("/{post_id}")
 async def get_like_summary(
     post_id: int,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await like_crud.resumo_like(db, usuario_id, post_id)
+    return await repo.resumo_like(usuario_id, post_id)
+
+@router.get(
+    "/{post_id}/usuarios",
+    response_model=CurtidoresPagina,
+    summary="Quem curtiu",
+    description=(
+        "Usuários que curtiram o post, do like mais recente ao mais antigo, paginado por cursor: "
+        "repita com `cursor=<proximo_cursor>` até ele vir nulo."
+    ),
+)
+async def get_curtidores(
+    post_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    db: Database = Depends(get_database),
+):
+    try:
+        resultado = await like_crud.listar_curtidores(db, post_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Post não encontrado")
+    itens, proximo = resultado
+    return {"itens": itens, "proximo_cursor": proximo}
@@ -0,0 +1,62 @@
+from databases import Database
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.crud import notificacao as notificacao_crud
+from app.crud.usuario import get_current_user
+from app.database import get_database
+from app.schemas.notificacao import MarcarLidas, MarcarLidasResultado, NaoLidas, NotificacaoPagina
+
+router = APIRouter(prefix="/notificacao", tags=["Notificações"])
+
+
+@router.get(
+    "/",
+    response_model=NotificacaoPagina,
+    summary="Minhas notificações",
+    description=(
+        "Likes nos meus posts e novos seguidores, agregados por alvo, da mais recente à mais antiga. "
+        "Paginado por cursor: repita com `cursor=<proximo_cursor>` até ele vir nulo."
+    ),
+)
+async def listar(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    apenas_nao_lidas: bool = Query(False),
+    db: Database = Depends(get_database),
+    usuario_id: int = Depends(get_current_user),
+):
+    try:
+        itens, proximo = await notificacao_crud.listar(
+            db, usuario_id, limit=limit, cursor=cursor, apenas_nao_lidas=apenas_nao_lidas
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    return {"itens": itens, "proximo_cursor": proximo}
+
+
+@router.get(
+    "/nao-lidas",
+    response_model=NaoLidas,
+    summary="Contador de não lidas",
+    description="Lido de um contador mantido nas escritas (não conta linhas).",
+)
+async def nao_lidas(
+    db: Database = Depends(get_database),
+    usuario_id: int = Depends(get_current_user),
+):
+    return {"nao_lidas": await notificacao_crud.nao_lidas(db, usuario_id)}
+
+
+@router.post(
+    "/lidas",
+    response_model=MarcarLidasResultado,
+    summary="Marcar como lidas",
+    description="Marca as notificações `ids` como lidas; sem `ids`, marca todas.",
+)
+async def marcar_lidas(
+    dados: MarcarLidas,
+    db: Database = Depends(get_database),
+    usuario_id: int = Depends(get_current_user),
+):
+    marcadas, restantes = await notificacao_crud.marcar_lidas(db, usuario_id, dados.ids)
+    return {"marcadas": marcadas, "nao_lidas": restantes}
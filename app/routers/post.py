@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
 from databases import Database
 from app.database import get_database
 from app.crud import post as post_crud
+from app.crud import ranking as ranking_crud
+from app.cache.trending import trending, TRENDING_K
 from app.crud.usuario import get_current_user
+from app.repositorio import Repositorio, get_repositorio
 from app.schemas.post import PostCreate
 
 router = APIRouter(prefix="/post", tags=["Post"])
@@ -14,10 +18,27 @@ router = APIRouter(prefix="/post", tags=["Post"])
 )
 async def create_post(
     post_in: PostCreate,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await post_crud.create_post(db, post_in, usuario_id)
+    return await repo.create_post(post_in, usuario_id)
+
+@router.post(
+    "/batch",
+    summary="Criar posts em lote",
+    description="Cria vários posts do usuário autenticado numa única inserção (ex.: agendamento, migração).",
+)
+async def create_posts(
+    posts_in: List[PostCreate],
+    repo: Repositorio = Depends(get_repositorio),
+    usuario_id: int = Depends(get_current_user),
+):
+    if len(posts_in) > post_crud.POST_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {post_crud.POST_BATCH_MAX} posts por requisição.",
+        )
+    return await repo.create_posts(posts_in, usuario_id)
 
 # @router.get(
 #     "/",
@@ -36,15 +57,34 @@ async def create_post(
 @router.get(
     "/feed",
     summary="Feed priorizado",
-    description="Retorna o feed priorizando posts de quem o usuário autenticado segue; depois os demais, ambos por ordem decrescente de data.",
+    description=(
+        "Retorna o feed priorizando posts de quem o usuário autenticado segue; depois os demais, "
+        "ambos por ordem decrescente de data. Com `mode=ranked`, ordena por score de engajamento "
+        "(recência, likes e afinidade com o autor)."
+    ),
 )
 async def read_feed(
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    mode: str = Query("padrao", pattern="^(padrao|ranked)$"),
 ):
-    return await post_crud.get_feed(db, viewer_id=usuario_id, limit=limit, offset=offset)
+    if mode == "ranked":
+        # ranked só existe no Postgres (post_score/afinidade)
+        return await ranking_crud.get_feed_ranked(get_database(), viewer_id=usuario_id, limit=limit, offset=offset)
+    return await repo.get_feed(viewer_id=usuario_id, limit=limit, offset=offset)
+
+@router.get(
+    "/trending",
+    summary="Em alta",
+    description="Posts com mais likes na última hora. Servido de um snapshot em memória atualizado a cada poucos segundos.",
+)
+async def read_trending(
+    db: Database = Depends(get_database),
+    limit: int = Query(20, ge=1, le=TRENDING_K),
+):
+    return await trending.listar(db, limit)
 
 @router.delete(
     "/{post_id}",
@@ -53,7 +93,7 @@ async def read_feed(
 )
 async def delete_post(
     post_id: int,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await post_crud.delete_post(db, post_id, usuario_id)
+    return await repo.delete_post(post_id, usuario_id)
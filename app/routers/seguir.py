@@ -1,21 +1,49 @@
-from fastapi import APIRouter, Depends
-from app.database import get_database
-from databases import Database
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.crud import seguir as seguir_crud
+from app.repositorio import Repositorio, get_repositorio
+from app.crud.usuario import get_current_user
+from app.schemas.seguir import SeguirLote, SeguirLoteResultado
 
 router = APIRouter(prefix="/seguir", tags=["Seguir"])
 
 
 @router.post("/")
-async def seguir_usuario(seguidor_id: int, seguido_id: int, db: Database = Depends(get_database)):
-    return await seguir_crud.seguir_usuario(db, seguidor_id, seguido_id)
+async def seguir_usuario(seguidor_id: int, seguido_id: int, repo: Repositorio = Depends(get_repositorio)):
+    return await repo.seguir_usuario(seguidor_id, seguido_id)
 
 
-# @router.get("/seguidos/{seguidor_id}")
-# async def listar_seguidos(seguidor_id: int, db: Database = Depends(get_database)):
-#     return await seguir_crud.listar_seguidos(db, seguidor_id)
+@router.delete("/")
+async def deixar_de_seguir(seguidor_id: int, seguido_id: int, repo: Repositorio = Depends(get_repositorio)):
+    return await repo.deixar_de_seguir(seguidor_id, seguido_id)
 
 
-@router.delete("/")
-async def deixar_de_seguir(seguidor_id: int, seguido_id: int, db: Database = Depends(get_database)):
-    return await seguir_crud.deixar_de_seguir(db, seguidor_id, seguido_id)
+@router.post("/lote", response_model=SeguirLoteResultado)
+async def aplicar_lote(
+    lote: SeguirLote,
+    repo: Repositorio = Depends(get_repositorio),
+    usuario_id: int = Depends(get_current_user),
+):
+    """
+    Segue e/ou deixa de seguir vários usuários numa chamada (ex.: importar contatos).
+    Idempotente: repetir o mesmo lote não muda nada e devolve listas vazias.
+    """
+    return await repo.aplicar_lote(usuario_id, lote.seguir, lote.deixar_de_seguir)
+
+
+@router.get("/status")
+async def status_relacoes(
+    ids: List[int] = Query(..., description="IDs de usuário (parâmetro repetido)"),
+    repo: Repositorio = Depends(get_repositorio),
+    usuario_id: int = Depends(get_current_user),
+) -> Dict[int, dict]:
+    """
+    Ex.: /seguir/status?ids=1&ids=2
+    Retorna { 1: {"eu_sigo": true, "me_segue": false}, 2: {...} } para o usuário autenticado.
+    """
+    if len(ids) > seguir_crud.SEGUIR_STATUS_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {seguir_crud.SEGUIR_STATUS_MAX} ids por requisição.",
+        )
+    return await repo.status_relacoes(usuario_id, ids)
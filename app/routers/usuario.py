@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from databases import Database
 from starlette import status
 from sqlalchemy.exc import IntegrityError
 
 from app.database import get_database
-from app.schemas.usuario import UsuarioCreate, UsuarioOut, UsuarioUpdate
+from app.schemas.usuario import UsuarioCreate, UsuarioOut, UsuarioUpdate, UsuarioPagina
+from app.schemas.seguir import RelacaoPagina
 from app.crud import usuario as crud_usuario
-from app.crud import post as post_crud
-from app.crud.usuario import autenticar_usuario, get_current_user
+from app.crud import sugestao as sugestao_crud
+from app.crud import seguir as seguir_crud
+from app import condicional
+from app.crud.usuario import get_current_user
+from app.cache.grafo import SEGUIDORES, SEGUINDO
+from app.repositorio import Repositorio, get_repositorio
 
 try:
     import asyncpg  # driver comum no Render para Postgres
@@ -25,9 +31,9 @@ router = APIRouter(prefix="/usuario", tags=["Usuário"])
 )
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
 ):
-    return await autenticar_usuario(db, form_data.username, form_data.password)
+    return await repo.autenticar_usuario(form_data.username, form_data.password)
 
 
 @router.post(
@@ -37,12 +43,12 @@ async def login(
     summary="Criar usuário",
     description="Cria um usuário com `nome`, `email` e `senha`.",
 )
-async def criar(usuario: UsuarioCreate, db: Database = Depends(get_database)):
+async def criar(usuario: UsuarioCreate, repo: Repositorio = Depends(get_repositorio)):
     """
     Cria usuário e trata erros comuns para não retornar 500.
     """
     try:
-        return await crud_usuario.criar_usuario(db, usuario)
+        return await repo.criar_usuario(usuario)
 
     except IntegrityError:
         # chave única do email violada
@@ -56,6 +62,29 @@ async def criar(usuario: UsuarioCreate, db: Database = Depends(get_database)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não foi possível criar o usuário.")
 
 
+@router.get(
+    "/",
+    response_model=UsuarioPagina,
+    summary="Listar usuários",
+    description=(
+        "Diretório de usuários com paginação por cursor: repita a chamada com "
+        "`cursor=<proximo_cursor>` até ele vir nulo. `q` filtra por prefixo do nome."
+    ),
+)
+async def listar(
+    limit: int = Query(50, ge=1, le=100),
+    sort: str = Query("nome", pattern="^-?(nome|id)$"),
+    cursor: str | None = Query(None),
+    q: str | None = Query(None, min_length=1, max_length=100),
+    db: Database = Depends(get_database),
+):
+    try:
+        itens, proximo = await crud_usuario.listar_usuarios(db, limit=limit, sort=sort, cursor=cursor, q=q)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    return {"itens": itens, "proximo_cursor": proximo}
+
+
 @router.get(
     "/me",
     response_model=UsuarioOut,
@@ -63,10 +92,10 @@ async def criar(usuario: UsuarioCreate, db: Database = Depends(get_database)):
     description="Retorna informações do usuário autenticado.",
 )
 async def get_me(
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    row = await crud_usuario.buscar_usuario_por_id(db, usuario_id)
+    row = await repo.buscar_usuario_por_id(usuario_id)
     if not row:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return row
@@ -80,16 +109,16 @@ async def get_me(
 )
 async def patch_me(
     payload: UsuarioUpdate,
-    db: Database = Depends(get_database),
+    repo: Repositorio = Depends(get_repositorio),
     usuario_id: int = Depends(get_current_user),
 ):
-    return await crud_usuario.atualizar_usuario(db, usuario_id, payload)
+    return await repo.atualizar_usuario(usuario_id, payload)
 
 
 @router.delete(
     "/me",
     summary="Excluir minha conta",
-    description="Remove a conta, seus posts e relações de seguir do usuário autenticado.",
+    description="Exclui a conta do usuário autenticado imediatamente; posts, likes e relações de seguir são removidos em segundo plano.",
 )
 async def delete_me(
     db: Database = Depends(get_database),
@@ -99,14 +128,56 @@ async def delete_me(
     return {"deleted": True}
 
 
+@router.get(
+    "/me/sugestoes",
+    summary="Quem seguir",
+    description="Sugestões de usuários para seguir (amigos de amigos), pré-calculadas em lote e ordenadas por vizinhos em comum.",
+)
+async def minhas_sugestoes(
+    db: Database = Depends(get_database),
+    usuario_id: int = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=sugestao_crud.SUGESTOES_TOP_N),
+):
+    return await sugestao_crud.listar_sugestoes(db, usuario_id, limit=limit)
+
+
+@router.get(
+    "/batch",
+    response_model=List[UsuarioOut],
+    summary="Buscar usuários em lote",
+    description="Ex.: /usuario/batch?ids=1&ids=2&ids=3. Retorna os usuários existentes, na ordem pedida, numa única consulta.",
+)
+async def buscar_lote(
+    ids: List[int] = Query(..., description="IDs de usuário (parâmetro repetido)"),
+    repo: Repositorio = Depends(get_repositorio),
+):
+    if len(ids) > crud_usuario.USUARIO_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {crud_usuario.USUARIO_BATCH_MAX} ids por requisição.",
+        )
+    return await repo.buscar_usuarios_por_ids(ids)
+
+
+async def _marcas(repo: Repositorio, usuario_id: int):
+    marcas = await repo.marcas_usuario(usuario_id)
+    if marcas is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return marcas
+
+
 @router.get(
     "/{usuario_id}",
     response_model=UsuarioOut,
     summary="Buscar usuário por ID",
-    description="Retorna um usuário específico.",
+    description="Retorna um usuário específico. Suporta `If-None-Match` (ETag).",
 )
-async def buscar(usuario_id: int, db: Database = Depends(get_database)):
-    usuario_row = await crud_usuario.buscar_usuario_por_id(db, usuario_id)
+async def buscar(usuario_id: int, request: Request, response: Response, repo: Repositorio = Depends(get_repositorio)):
+    marcas = await _marcas(repo, usuario_id)
+    tag = condicional.etag("usuario", usuario_id, marcas["atualizado_em"])
+    if (r304 := condicional.responder(request, response, tag)) is not None:
+        return r304
+    usuario_row = await repo.buscar_usuario_por_id(usuario_id)
     if usuario_row is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return usuario_row
@@ -115,21 +186,79 @@ async def buscar(usuario_id: int, db: Database = Depends(get_database)):
 @router.get(
     "/{usuario_id}/stats",
     summary="Estatísticas do perfil",
-    description="Retorna contadores agregados: posts, seguidores e seguindo.",
+    description="Retorna contadores agregados: posts, seguidores e seguindo. Suporta `If-None-Match` (ETag).",
 )
-async def stats(usuario_id: int, db: Database = Depends(get_database)):
-    return await crud_usuario.stats_usuario(db, usuario_id)
+async def stats(usuario_id: int, request: Request, response: Response, repo: Repositorio = Depends(get_repositorio)):
+    marcas = await _marcas(repo, usuario_id)
+    tag = condicional.etag(
+        "stats", usuario_id, marcas["atualizado_em"], marcas["versao"], marcas["ultimo_post"]
+    )
+    if (r304 := condicional.responder(request, response, tag)) is not None:
+        return r304
+    return await repo.stats_usuario(usuario_id)
 
 
 @router.get(
     "/{usuario_id}/posts",
     summary="Posts do usuário (timeline pública)",
-    description="Lista os posts de um usuário específico, com paginação.",
+    description="Lista os posts de um usuário específico, com paginação. Suporta `If-None-Match` (ETag).",
 )
 async def posts_do_usuario(
     usuario_id: int,
-    db: Database = Depends(get_database),
+    request: Request,
+    response: Response,
+    repo: Repositorio = Depends(get_repositorio),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
-    return await post_crud.get_posts_por_usuario(db, usuario_id, limit=limit, offset=offset)
+    marcas = await repo.marcas_usuario(usuario_id)
+    if marcas is None:
+        return []  # como antes: usuário inexistente/excluído tem timeline vazia
+    tag = condicional.etag(
+        "posts", usuario_id, limit, offset,
+        marcas["atualizado_em"], marcas["versao"], marcas["ultimo_post"],
+    )
+    if (r304 := condicional.responder(request, response, tag)) is not None:
+        return r304
+    return await repo.get_posts_por_usuario(usuario_id, limit=limit, offset=offset)
+
+
+async def _relacoes(db: Database, usuario_id: int, direcao: str, limit: int, cursor: str | None):
+    try:
+        resultado = await seguir_crud.listar_relacoes(db, usuario_id, direcao, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    total, itens, proximo = resultado
+    return {"total": total, "itens": itens, "proximo_cursor": proximo}
+
+
+@router.get(
+    "/{usuario_id}/seguidores",
+    response_model=RelacaoPagina,
+    summary="Seguidores do usuário",
+    description="Quem segue o usuário, do follow mais recente ao mais antigo, paginado por cursor, com o total.",
+)
+async def seguidores(
+    usuario_id: int,
+    db: Database = Depends(get_database),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+):
+    return await _relacoes(db, usuario_id, SEGUIDORES, limit, cursor)
+
+
+@router.get(
+    "/{usuario_id}/seguindo",
+    response_model=RelacaoPagina,
+    summary="Quem o usuário segue",
+    description="Usuários seguidos, do follow mais recente ao mais antigo, paginado por cursor, com o total.",
+)
+async def seguindo(
+    usuario_id: int,
+    db: Database = Depends(get_database),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+):
+    return await _relacoes(db, usuario_id, SEGUINDO, limit, cursor)
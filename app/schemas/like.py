@@ -0,0 +1,14 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.schemas.post import UsuarioSimples
+
+
+class Curtidor(UsuarioSimples):
+    curtido_em: datetime
+
+
+class CurtidoresPagina(BaseModel):
+    itens: List[Curtidor]
+    proximo_cursor: Optional[str] = None
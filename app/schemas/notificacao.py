@@ -0,0 +1,39 @@
+import os
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+from app.schemas.post import UsuarioSimples
+
+NOTIFICACAO_LIDAS_MAX = int(os.getenv("NOTIFICACAO_LIDAS_MAX", "500"))
+
+
+class NotificacaoOut(BaseModel):
+    id: int
+    # "like" (alvo_id = post curtido) ou "seguir" (alvo_id = 0)
+    tipo: str
+    alvo_id: int
+    # eventos agregados: "ator e mais (total - 1) curtiram seu post"
+    total: int
+    lida: bool
+    atualizado_em: datetime
+    # ator mais recente (None se a conta dele foi excluída)
+    ator: Optional[UsuarioSimples] = None
+
+
+class NotificacaoPagina(BaseModel):
+    itens: List[NotificacaoOut]
+    proximo_cursor: Optional[str] = None
+
+
+class MarcarLidas(BaseModel):
+    # omitido: marca todas
+    ids: Optional[List[int]] = Field(None, max_length=NOTIFICACAO_LIDAS_MAX)
+
+
+class NaoLidas(BaseModel):
+    nao_lidas: int
+
+
+class MarcarLidasResultado(NaoLidas):
+    marcadas: int
@@ -0,0 +1,37 @@
+import os
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.schemas.usuario import UsuarioOut
+
+SEGUIR_LOTE_MAX = int(os.getenv("SEGUIR_LOTE_MAX", "500"))
+
+
+class UsuarioRelacao(UsuarioOut):
+    # quando a relação de seguir foi criada
+    desde: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RelacaoPagina(BaseModel):
+    total: int
+    itens: List[UsuarioRelacao]
+    proximo_cursor: Optional[str] = None
+
+
+class SeguirLote(BaseModel):
+    seguir: List[int] = Field(default_factory=list, max_length=SEGUIR_LOTE_MAX)
+    deixar_de_seguir: List[int] = Field(default_factory=list, max_length=SEGUIR_LOTE_MAX)
+
+    @model_validator(mode="after")
+    def sem_conflito(self):
+        if set(self.seguir) & set(self.deixar_de_seguir):
+            raise ValueError("Um mesmo usuário não pode estar em `seguir` e `deixar_de_seguir`.")
+        return self
+
+
+class SeguirLoteResultado(BaseModel):
+    # só as arestas que de fato mudaram (já seguidos / não seguidos / inexistentes ficam de fora)
+    seguidos: List[int]
+    deixados: List[int]
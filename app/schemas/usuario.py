@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, ConfigDict
 
 class UsuarioBase(BaseModel):
@@ -15,3 +16,7 @@ class UsuarioUpdate(BaseModel):
     nome: str | None = None
     email: EmailStr | None = None
     senha: str | None = None
+
+class UsuarioPagina(BaseModel):
+    itens: List[UsuarioOut]
+    proximo_cursor: Optional[str] = None
@@ -0,0 +1,82 @@
+# app/workers/__init__.py
+# Tarefas de segundo plano que rodam dentro do lifespan do FastAPI.
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from databases import Database
+
+logger = logging.getLogger("uvicorn.error")
+
+_tasks: List[asyncio.Task] = []
+
+
+async def _loop(nome: str, passo: Callable[[], Awaitable[bool]], intervalo: float, acordar: Optional[asyncio.Event] = None):
+    """
+    Roda `passo` repetidamente. Enquanto houver trabalho (passo -> True) segue sem pausa
+    (apenas cede o event loop); quando não há, dorme `intervalo` ou até ser acordado.
+    Erros são logados e não derrubam o worker.
+    """
+    while True:
+        try:
+            trabalhou = await passo()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("⚠️ Worker %s falhou: %s", nome, e)
+            trabalhou = False
+
+        if trabalhou:
+            await asyncio.sleep(0)
+            continue
+
+        if acordar is None:
+            await asyncio.sleep(intervalo)
+            continue
+        try:
+            await asyncio.wait_for(acordar.wait(), timeout=intervalo)
+        except asyncio.TimeoutError:
+            pass
+        acordar.clear()
+
+
+def iniciar(db: Database):
+    from app.workers import purga, sugestoes, trending, particoes, arquivo, fila, ranking
+
+    _tasks.append(asyncio.create_task(
+        _loop("purga", lambda: purga.passo(db), purga.INTERVALO, purga.acordar),
+        name="worker-purga",
+    ))
+    _tasks.append(asyncio.create_task(
+        _loop("sugestoes", lambda: sugestoes.passo(db), sugestoes.INTERVALO),
+        name="worker-sugestoes",
+    ))
+    _tasks.append(asyncio.create_task(
+        _loop("trending", lambda: trending.passo(db), trending.INTERVALO),
+        name="worker-trending",
+    ))
+    _tasks.append(asyncio.create_task(
+        _loop("ranking", lambda: ranking.passo(db), ranking.INTERVALO),
+        name="worker-ranking",
+    ))
+    _tasks.append(asyncio.create_task(
+        _loop("particoes", lambda: particoes.passo(db), particoes.INTERVALO),
+        name="worker-particoes",
+    ))
+    _tasks.append(asyncio.create_task(
+        _loop("arquivo", lambda: arquivo.passo(db), arquivo.INTERVALO),
+        name="worker-arquivo",
+    ))
+    for i in range(max(fila.WORKERS, 1)):
+        _tasks.append(asyncio.create_task(
+            _loop(f"fila-{i}", lambda: fila.passo(db), fila.INTERVALO, fila.acordar),
+            name=f"worker-fila-{i}",
+        ))
+    logger.info("✅ workers iniciados (%d)", len(_tasks))
+
+
+async def parar():
+    for t in _tasks:
+        t.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
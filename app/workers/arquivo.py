@@ -0,0 +1,12 @@
+# app/workers/arquivo.py
+import os
+
+from databases import Database
+
+from app.crud import arquivo as arquivo_crud
+
+INTERVALO = float(os.getenv("POST_ARQUIVO_INTERVALO_SEGUNDOS", "600"))
+
+
+async def passo(db: Database) -> bool:
+    return await arquivo_crud.passo(db)
@@ -0,0 +1,19 @@
+# app/workers/fila.py
+import asyncio
+import os
+
+from databases import Database
+
+from app.crud import fila as fila_crud
+
+INTERVALO = float(os.getenv("FILA_INTERVALO_SEGUNDOS", "1"))
+# consumidores concorrentes (SKIP LOCKED: cada um pega tarefas diferentes)
+WORKERS = int(os.getenv("FILA_WORKERS", "2"))
+
+# Acordado após o commit de quem enfileirou, para não esperar o próximo ciclo
+acordar = asyncio.Event()
+
+
+async def passo(db: Database) -> bool:
+    await fila_crud.atualizar_estado(db)
+    return await fila_crud.processar_lote(db)
@@ -0,0 +1,31 @@
+# app/workers/particoes.py
+import logging
+import os
+
+from databases import Database
+
+from app.crud import arquivo as arquivo_crud
+from app.crud import particoes as particoes_crud
+
+logger = logging.getLogger("uvicorn.error")
+
+INTERVALO = float(os.getenv("POST_PARTICOES_INTERVALO_SEGUNDOS", str(6 * 3600)))
+
+
+async def passo(db: Database) -> bool:
+    criadas = await particoes_crud.garantir_futuras(db)
+    # posts das partições antigas vão para o arquivo antes do DETACH (nunca somem das leituras)
+    if await arquivo_crud.esvaziar_antigas(db):
+        return True
+    destacadas = await particoes_crud.destacar_antigas(db)
+    if destacadas:
+        # vazias: drenar só remove as tabelas
+        while await arquivo_crud.drenar_destacada(db) is not None:
+            pass
+    if criadas or destacadas:
+        logger.info(
+            "partições de post: criadas=%s destacadas=%s",
+            [m.isoformat() for m in criadas],
+            [m.isoformat() for m in destacadas],
+        )
+    return False
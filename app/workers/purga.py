@@ -0,0 +1,16 @@
+# app/workers/purga.py
+import asyncio
+import os
+
+from databases import Database
+
+from app.crud import purga as purga_crud
+
+INTERVALO = float(os.getenv("PURGA_INTERVALO", "5"))
+
+# Acordado por deletar_usuario para não esperar o próximo ciclo
+acordar = asyncio.Event()
+
+
+async def passo(db: Database) -> bool:
+    return await purga_crud.executar_passo(db)
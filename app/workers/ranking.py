@@ -0,0 +1,28 @@
+# app/workers/ranking.py
+# Passada única por processo: cria o post_score dos posts que não têm (criados antes do
+# feed ranqueado existir), em lotes por id. Posts novos já nascem com score
+# (registrar_post), então terminada a passada o worker só dorme.
+import logging
+import os
+
+from databases import Database
+
+from app.crud import ranking as ranking_crud
+
+INTERVALO = float(os.getenv("FEED_RANKED_SCORES_INTERVALO", "3600"))
+
+logger = logging.getLogger("uvicorn.error")
+
+_progresso = {"ultimo_id": 0, "concluido": False}
+
+
+async def passo(db: Database) -> bool:
+    if _progresso["concluido"]:
+        return False
+    ultimo = await ranking_crud.completar_scores(db, _progresso["ultimo_id"])
+    if ultimo is None:
+        _progresso["concluido"] = True
+        logger.info("✅ post_score completo (até o post %d)", _progresso["ultimo_id"])
+        return False
+    _progresso["ultimo_id"] = ultimo
+    return True
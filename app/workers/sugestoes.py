@@ -0,0 +1,31 @@
+# app/workers/sugestoes.py
+import asyncio
+import os
+
+from databases import Database
+
+from app.crud import sugestao as sugestao_crud
+
+INTERVALO = float(os.getenv("SUGESTOES_INTERVALO", "60"))
+
+
+async def passo(db: Database) -> bool:
+    # primeiro espalha as mudanças para os seguidores, depois recalcula os marcados
+    expandiu = await sugestao_crud.expandir_pendentes(db)
+    return await sugestao_crud.processar_pendentes(db) > 0 or expandiu
+
+
+async def _backfill():
+    from app.database import database
+
+    await database.connect()
+    try:
+        total = await sugestao_crud.recalcular_todos(database)
+        print(f"sugestões recalculadas para {total} usuários")
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    # Recálculo completo: python -m app.workers.sugestoes
+    asyncio.run(_backfill())
@@ -0,0 +1,15 @@
+# app/workers/trending.py
+import os
+
+from databases import Database
+
+from app.cache.trending import trending
+from app.crud import trending as trending_crud
+
+INTERVALO = float(os.getenv("TRENDING_REFRESH_SEGUNDOS", "5"))
+
+
+async def passo(db: Database) -> bool:
+    await trending_crud.expirar_buckets(db)
+    await trending.atualizar(db)
+    return False
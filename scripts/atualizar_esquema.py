@@ -0,0 +1,24 @@
+"""
+Acrescenta a um banco antigo as colunas e índices novos das tabelas que já existiam
+(app/esquema.py). Idempotente: pode rodar quantas vezes quiser.
+Também cria as tabelas que faltam (create_all), como o RUN_MIGRATIONS=1 do app.
+
+Uso:
+    DATABASE_URL=... python scripts/atualizar_esquema.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import esquema  # noqa: E402
+from app.database import get_engine  # noqa: E402
+
+
+def main():
+    esquema.migrar(get_engine())
+    print("esquema atualizado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Avaliação offline do feed: ordem padrão (seguidos + data) x ranked (score de engajamento).
+
+Semeia dados sintéticos no banco de DATABASE_URL (use um banco descartável!),
+preenche post_score/afinidade e compara, para uma amostra de viewers:
+    - likes médios e idade média (h) dos top-k posts;
+    - fração do top-k vinda de autores com quem o viewer tem afinidade;
+    - sobreposição entre as duas ordens;
+    - latência p50/p95 de cada consulta.
+
+Uso:
+    PYTHON_ENV=test DATABASE_URL=... python scripts/avaliar_feed.py --seed --usuarios 2000 --posts 50000
+    python scripts/avaliar_feed.py --backfill-apenas   # só preenche post_score/afinidade
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, select, func  # noqa: E402
+
+from app.database import database, get_engine, metadata  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.ranking import afinidade  # noqa: E402
+from app.crud import post as post_crud  # noqa: E402
+from app.crud import ranking as ranking_crud  # noqa: E402
+
+
+async def semear(usuarios: int, posts: int, seguindo: int, max_likes: int) -> list:
+    tag = int(time.time())
+    rows = await database.fetch_all(
+        text(
+            "INSERT INTO usuario (nome, email, senha) "
+            "SELECT 'seed ' || g, 'seed' || g || '.' || :tag || '@avaliacao.invalid', 'x' "
+            "FROM generate_series(1, :n) g RETURNING id"
+        ).bindparams(tag=str(tag), n=usuarios)
+    )
+    ids = [r[0] for r in rows]
+
+    # autores com popularidade enviesada (power-law aproximada)
+    await database.execute(
+        text(
+            "INSERT INTO post (post, usuario_id, data_criacao) "
+            "SELECT 'post sintético ' || g, "
+            "       (CAST(:ids AS int[]))[1 + floor(power(random(), 2) * :n)::int], "
+            "       now() - random() * interval '30 days' "
+            "FROM generate_series(1, :p) g"
+        ).bindparams(ids=ids, n=len(ids), p=posts)
+    )
+    await database.execute(
+        text(
+            "INSERT INTO seguir (seguidor_id, seguido_id) "
+            "SELECT u, (CAST(:ids AS int[]))[1 + floor(power(random(), 2) * :n)::int] "
+            "FROM unnest(CAST(:ids AS int[])) u, generate_series(1, :f) "
+            "ON CONFLICT DO NOTHING"
+        ).bindparams(ids=ids, n=len(ids), f=seguindo)
+    )
+    await database.execute(text("DELETE FROM seguir WHERE seguidor_id = seguido_id"))
+    await database.execute(
+        text(
+            'INSERT INTO "like" (usuario_id, post_id) '
+            "SELECT (CAST(:ids AS int[]))[1 + floor(random() * :n)::int], p.id "
+            "FROM post p CROSS JOIN LATERAL "
+            "     generate_series(1, floor(power(random(), 4) * :m + p.id * 0)::int) "
+            "WHERE p.usuario_id = ANY(CAST(:ids AS int[])) "
+            "ON CONFLICT DO NOTHING"
+        ).bindparams(ids=ids, n=len(ids), m=max_likes)
+    )
+    return ids
+
+
+async def _cronometrar(fn, repeticoes: int):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = await fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+    return resultado, tempos[len(tempos) // 2], tempos[int(len(tempos) * 0.95) - 1]
+
+
+async def avaliar(viewers: list, k: int, repeticoes: int):
+    agora = datetime.now(timezone.utc)
+    metricas = {"padrao": [], "ranked": []}
+    latencias = {"padrao": [], "ranked": []}
+    sobreposicao = []
+
+    for v in viewers:
+        autores_afins = {
+            r[0]
+            for r in await database.fetch_all(
+                select(afinidade.c.autor_id).where(
+                    (afinidade.c.usuario_id == v) & (afinidade.c.likes > 0)
+                )
+            )
+        }
+        padrao, p50a, p95a = await _cronometrar(
+            lambda: post_crud.get_feed(database, viewer_id=v, limit=k), repeticoes
+        )
+        ranked, p50b, p95b = await _cronometrar(
+            lambda: ranking_crud.get_feed_ranked(database, viewer_id=v, limit=k), repeticoes
+        )
+        latencias["padrao"].append((p50a, p95a))
+        latencias["ranked"].append((p50b, p95b))
+
+        for nome, itens in (("padrao", padrao), ("ranked", ranked)):
+            ids = [i["id"] for i in itens]
+            likes = {
+                r[0]: r[1]
+                for r in await database.fetch_all(
+                    text("SELECT post_id, likes FROM post_score WHERE post_id = ANY(CAST(:ids AS int[]))").bindparams(ids=ids)
+                )
+            }
+            metricas[nome].append(
+                (
+                    statistics.mean(likes.get(i, 0) for i in ids) if ids else 0,
+                    statistics.mean((agora - i["data_criacao"]).total_seconds() / 3600 for i in itens)
+                    if itens else 0,
+                    sum(1 for i in itens if i["usuario"]["id"] in autores_afins) / max(len(itens), 1),
+                )
+            )
+        a = {i["id"] for i in padrao}
+        b = {i["id"] for i in ranked}
+        sobreposicao.append(len(a & b) / max(len(a | b), 1))
+
+    print(f"\nviewers={len(viewers)} k={k} repetições={repeticoes}")
+    print(f"{'ordem':<8} {'likes@k':>9} {'idade(h)':>9} {'afinidade':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for nome in ("padrao", "ranked"):
+        m = metricas[nome]
+        lat = latencias[nome]
+        print(
+            f"{nome:<8} "
+            f"{statistics.mean(x[0] for x in m):>9.2f} "
+            f"{statistics.mean(x[1] for x in m):>9.1f} "
+            f"{statistics.mean(x[2] for x in m):>10.1%} "
+            f"{statistics.median(x[0] for x in lat):>8.2f} "
+            f"{statistics.median(x[1] for x in lat):>8.2f}"
+        )
+    print(f"sobreposição (Jaccard) média: {statistics.mean(sobreposicao):.1%}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="semeia dados sintéticos antes de avaliar")
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--seguindo", type=int, default=20, help="arestas por usuário")
+    parser.add_argument("--max-likes", type=int, default=60, help="teto de likes por post")
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--backfill-apenas", action="store_true")
+    args = parser.parse_args()
+
+    metadata.create_all(bind=get_engine())
+    await database.connect()
+    try:
+        ids = None
+        if args.seed:
+            t0 = time.perf_counter()
+            ids = await semear(args.usuarios, args.posts, args.seguindo, args.max_likes)
+            print(f"semeado em {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        n = await ranking_crud.backfill_scores(database)
+        print(f"backfill de {n} scores em {time.perf_counter() - t0:.1f}s")
+        if args.backfill_apenas:
+            return
+
+        if ids is None:
+            ids = [r[0] for r in await database.fetch_all(select(func.distinct(afinidade.c.usuario_id)))]
+        viewers = random.sample(ids, min(args.viewers, len(ids)))
+        await avaliar(viewers, args.k, args.repeticoes)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
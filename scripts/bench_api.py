@@ -0,0 +1,129 @@
+"""
+Custo de CPU por rota, sem banco: sobe a app com REPOSITORIO=memoria (app/repositorio),
+semeia usuários/posts/relações direto no repositório em memória e dispara requisições
+in-process (httpx + ASGITransport, sem rede). O que sobra é Python: roteamento, validação,
+serialização, middlewares e a lógica das rotas.
+
+Mede req/s e p50/p95 por rota; com --perfil, roda tudo sob cProfile e imprime as funções
+mais caras (ou salva o .pstats com --saida).
+
+Uso:
+    python scripts/bench_api.py --usuarios 2000 --posts 50000 --requisicoes 2000
+    python scripts/bench_api.py --rota feed --perfil --saida /tmp/feed.pstats
+"""
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ["REPOSITORIO"] = "memoria"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.crud.usuario import criar_token_acesso, gerar_hash_senha  # noqa: E402
+from app.main import app  # noqa: E402
+from app.repositorio import memoria  # noqa: E402
+
+
+def semear(usuarios: int, posts: int, seguindo: int):
+    # direto nas estruturas do repositório: criar_usuario pagaria um bcrypt por usuário
+    senha = gerar_hash_senha("senha123")
+    agora = datetime.now(timezone.utc)
+    for uid in range(1, usuarios + 1):
+        memoria.usuarios[uid] = {
+            "id": uid, "nome": f"usuario {uid}", "email": f"u{uid}@example.com", "senha": senha,
+            "excluido_em": None, "atualizado_em": agora, "versao": 0,
+        }
+        memoria.por_email[f"u{uid}@example.com"] = uid
+        next(memoria._ids_usuario)
+    inicio = agora - timedelta(seconds=posts)
+    for i in range(posts):
+        memoria._inserir_post(f"post {i}", random.randint(1, usuarios), inicio + timedelta(seconds=i))
+    for uid in range(1, usuarios + 1):
+        for alvo in random.sample(range(1, usuarios + 1), min(seguindo, usuarios)):
+            if alvo != uid:
+                memoria.seguindo[uid].add(alvo)
+                memoria.seguidores[alvo].add(uid)
+    for pid in random.sample(list(memoria.posts), min(len(memoria.posts), posts // 2)):
+        memoria.likes[pid].update(random.sample(range(1, usuarios + 1), 3))
+
+
+def rotas(usuarios: int):
+    def uid():
+        return random.randint(1, usuarios)
+
+    def post_ids():
+        return [("post_ids", random.choice(memoria.ordem)) for _ in range(20)]
+
+    return {
+        "usuario": lambda: ("GET", f"/usuario/{uid()}", {}, None),
+        "stats": lambda: ("GET", f"/usuario/{uid()}/stats", {}, None),
+        "timeline": lambda: ("GET", f"/usuario/{uid()}/posts", {"limit": 50}, None),
+        "feed": lambda: ("GET", "/post/feed", {"limit": 50}, None),
+        "like_batch": lambda: ("GET", "/like/batch", post_ids(), None),
+        "seguir_status": lambda: ("GET", "/seguir/status", [("ids", uid()) for _ in range(50)], None),
+        "criar_post": lambda: ("POST", "/post/", {}, {"post": "bench"}),
+    }
+
+
+async def medir(client: AsyncClient, gerar, requisicoes: int, usuarios: int):
+    tempos = []
+    inicio = time.perf_counter()
+    for _ in range(requisicoes):
+        metodo, url, params, corpo = gerar()
+        headers = {"Authorization": f"Bearer {criar_token_acesso({'sub': str(random.randint(1, usuarios))})}"}
+        t0 = time.perf_counter()
+        r = await client.request(metodo, url, params=params, json=corpo, headers=headers)
+        tempos.append((time.perf_counter() - t0) * 1000)
+        if r.status_code >= 400:
+            raise RuntimeError(f"{metodo} {url} -> {r.status_code}: {r.text[:200]}")
+    total = time.perf_counter() - inicio
+    tempos.sort()
+    return requisicoes / total, tempos[len(tempos) // 2], tempos[int(len(tempos) * 0.95)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--seguindo", type=int, default=50)
+    parser.add_argument("--requisicoes", type=int, default=1000)
+    parser.add_argument("--rota", action="append", help="só estas rotas (repetível)")
+    parser.add_argument("--perfil", action="store_true", help="roda sob cProfile")
+    parser.add_argument("--saida", help="arquivo .pstats (com --perfil)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    semear(args.usuarios, args.posts, args.seguindo)
+    todas = rotas(args.usuarios)
+    escolhidas = {n: todas[n] for n in (args.rota or todas)}
+
+    perfil = cProfile.Profile() if args.perfil else None
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for gerar in escolhidas.values():  # aquecimento (imports tardios, caches)
+            await medir(client, gerar, 20, args.usuarios)
+        print(f"{'rota':>14} | {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        if perfil:
+            perfil.enable()
+        for nome, gerar in escolhidas.items():
+            rps, p50, p95 = await medir(client, gerar, args.requisicoes, args.usuarios)
+            print(f"{nome:>14} | {rps:8.0f} {p50:8.3f} {p95:8.3f}")
+        if perfil:
+            perfil.disable()
+
+    if perfil:
+        if args.saida:
+            perfil.dump_stats(args.saida)
+            print(f"perfil salvo em {args.saida}")
+        pstats.Stats(perfil).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
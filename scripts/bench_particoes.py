@@ -0,0 +1,140 @@
+"""
+Benchmark do particionamento de post: latência do feed e da timeline x tamanho total da tabela.
+
+Recria o schema no banco de DATABASE_URL (use um banco descartável!), semeia usuários,
+follows e um mês de posts recentes e, a cada rodada, acrescenta mais histórico antigo
+(espalhado pelos últimos --meses meses, cada mês na sua partição). Em cada tamanho mede
+p50/p95 de:
+    - get_feed / get_posts_por_usuario com a janela (FEED_JANELA_DIAS, poda de partições);
+    - as mesmas consultas sem janela (FEED_JANELA_DIAS=0), varrendo todas as partições.
+
+Uso:
+    PYTHON_ENV=test DATABASE_URL=... python scripts/bench_particoes.py --rodadas 4 --historico 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import database, get_engine, metadata  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.post import inicio_do_mes  # noqa: E402
+from app.crud import particoes as particoes_crud  # noqa: E402
+from app.crud import post as post_crud  # noqa: E402
+
+
+async def semear_base(usuarios: int, recentes: int, seguindo: int) -> list:
+    rows = await database.fetch_all(
+        text(
+            "INSERT INTO usuario (nome, email, senha) "
+            "SELECT 'bench ' || g, 'bench' || g || '@particoes.invalid', 'x' "
+            "FROM generate_series(1, :n) g RETURNING id"
+        ).bindparams(n=usuarios)
+    )
+    ids = [r[0] for r in rows]
+    await database.execute(
+        text(
+            "INSERT INTO seguir (seguidor_id, seguido_id) "
+            "SELECT u, (CAST(:ids AS int[]))[1 + floor(random() * :n)::int] "
+            "FROM unnest(CAST(:ids AS int[])) u, generate_series(1, :f) "
+            "ON CONFLICT DO NOTHING"
+        ).bindparams(ids=ids, n=len(ids), f=seguindo)
+    )
+    await database.execute(text("DELETE FROM seguir WHERE seguidor_id = seguido_id"))
+    await _inserir_posts(ids, recentes, "1 second", "30 days")
+    return ids
+
+
+async def _inserir_posts(ids: list, n: int, de: str, ate: str):
+    await database.execute(
+        text(
+            "INSERT INTO post (post, usuario_id, data_criacao) "
+            "SELECT 'post ' || g, (CAST(:ids AS int[]))[1 + floor(random() * :n)::int], "
+            f"       now() - interval '{de}' - random() * (interval '{ate}' - interval '{de}') "
+            "FROM generate_series(1, :p) g"
+        ).bindparams(ids=ids, n=len(ids), p=n)
+    )
+
+
+async def acrescentar_historico(ids: list, n: int, meses: int):
+    hoje = datetime.now(timezone.utc).date()
+    existentes = set(await particoes_crud.listar(database))
+    for d in range(-meses, 0):
+        mes = inicio_do_mes(hoje, d)
+        if mes not in existentes:
+            await particoes_crud.criar_particao(database, mes)
+    await _inserir_posts(ids, n, "31 days", f"{meses * 30} days")
+    await database.execute(text("ANALYZE post"))
+
+
+async def _cronometrar(fn, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        await fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+    return tempos[len(tempos) // 2], tempos[max(int(len(tempos) * 0.95) - 1, 0)]
+
+
+async def medir(viewers: list, repeticoes: int, janela_dias: int) -> dict:
+    post_crud.FEED_JANELA_DIAS = janela_dias
+    f, t = [], []
+    for v in viewers:
+        f.append(await _cronometrar(lambda: post_crud.get_feed(database, viewer_id=v, limit=50), repeticoes))
+        # __wrapped__: sem o single-flight, que poderia reaproveitar a execução
+        t.append(await _cronometrar(
+            lambda: post_crud.get_posts_por_usuario.__wrapped__(database, v, limit=50), repeticoes
+        ))
+    feed = (sorted(x[0] for x in f)[len(f) // 2], max(x[1] for x in f))
+    timeline = (sorted(x[0] for x in t)[len(t) // 2], max(x[1] for x in t))
+    return {"feed": feed, "timeline": timeline}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=5000)
+    parser.add_argument("--seguindo", type=int, default=30)
+    parser.add_argument("--recentes", type=int, default=100000, help="posts do último mês")
+    parser.add_argument("--historico", type=int, default=500000, help="posts antigos acrescentados por rodada")
+    parser.add_argument("--meses", type=int, default=24)
+    parser.add_argument("--rodadas", type=int, default=4)
+    parser.add_argument("--viewers", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    janela = post_crud.FEED_JANELA_DIAS or 30
+    metadata.drop_all(bind=get_engine())
+    metadata.create_all(bind=get_engine())
+    await database.connect()
+    try:
+        ids = await semear_base(args.usuarios, args.recentes, args.seguindo)
+        await database.execute(text("ANALYZE"))
+        viewers = random.sample(ids, min(args.viewers, len(ids)))
+
+        print(f"{'posts':>10} {'partições':>9} | {'feed janela':>18} {'feed completo':>18} | "
+              f"{'timeline janela':>18} {'timeline completa':>18}   (p50/p95 ms)")
+        for rodada in range(args.rodadas + 1):
+            if rodada:
+                await acrescentar_historico(ids, args.historico, args.meses)
+            total = await database.fetch_val(text("SELECT count(*) FROM post"))
+            particoes = len(await particoes_crud.listar(database))
+            com = await medir(viewers, args.repeticoes, janela)
+            sem = await medir(viewers, args.repeticoes, 0)
+            fmt = lambda par: f"{par[0]:8.2f}/{par[1]:8.2f}"  # noqa: E731
+            print(f"{total:>10} {particoes:>9} | {fmt(com['feed']):>18} {fmt(sem['feed']):>18} | "
+                  f"{fmt(com['timeline']):>18} {fmt(sem['timeline']):>18}")
+    finally:
+        post_crud.FEED_JANELA_DIAS = janela
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
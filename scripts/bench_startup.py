@@ -0,0 +1,74 @@
+"""
+Benchmark de cold start: sobe o uvicorn N vezes e mede, a partir do spawn do processo,
+    - tempo até o primeiro 200 em /healthz (vivacidade: app aceitando tráfego);
+    - tempo até o primeiro 200 em /readyz  (banco conectado e pool aquecido);
+    - tempo da primeira requisição real ao banco depois de pronto.
+
+Uso:
+    DATABASE_URL=... python scripts/bench_startup.py --rodadas 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar_200(cliente: httpx.Client, url: str, t0: float, timeout: float) -> float:
+    while time.perf_counter() - t0 < timeout:
+        try:
+            if cliente.get(url).status_code == 200:
+                return time.perf_counter() - t0
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def rodada(timeout: float) -> tuple:
+    porta = _porta_livre()
+    base = f"http://127.0.0.1:{porta}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(porta), "--log-level", "warning"],
+        cwd=RAIZ,
+    )
+    try:
+        with httpx.Client(timeout=2.0) as cliente:
+            vivo = _esperar_200(cliente, f"{base}/healthz", t0, timeout)
+            pronto = _esperar_200(cliente, f"{base}/readyz", t0, timeout)
+            t1 = time.perf_counter()
+            cliente.get(f"{base}/usuario/0")
+            primeira = time.perf_counter() - t1
+        return vivo, pronto, primeira
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    resultados = [rodada(args.timeout) for _ in range(args.rodadas)]
+    for nome, idx in (("/healthz 200", 0), ("/readyz 200", 1), ("1ª query", 2)):
+        valores = [r[idx] * 1000 for r in resultados]
+        print(f"{nome:<14} mediana {statistics.median(valores):8.1f} ms   máx {max(valores):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark do diretório de usuários: OFFSET x keyset e busca por prefixo do nome.
+
+Semeia (com --seed) N usuários no banco de DATABASE_URL (use um banco descartável!),
+garante os índices de app/models/usuario.py (create_all não cria índices em tabela
+já existente) e mede p50/p95 de:
+    - página em profundidade crescente via OFFSET (o que listar_usuarios fazia);
+    - a mesma página via cursor keyset (listar_usuarios atual);
+    - busca `q=` por prefixo, com e sem o índice ix_usuario_nome_prefixo.
+
+Uso:
+    PYTHON_ENV=test DATABASE_URL=... python scripts/bench_usuarios.py --seed --usuarios 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, select, asc  # noqa: E402
+from sqlalchemy.schema import CreateIndex  # noqa: E402
+
+from app.database import database, get_engine, metadata  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.usuario import usuario  # noqa: E402
+from app.crud import usuario as usuario_crud  # noqa: E402
+from app.paginacao import codificar_cursor  # noqa: E402
+
+PREFIXOS = ["ana", "bru", "car", "dan", "edu", "fer", "gab", "hel", "isa", "jo"]
+
+
+async def semear(usuarios: int):
+    tag = int(time.time())
+    # nomes "<prefixo><sufixo> <número>": prefixos repetidos, como num diretório real
+    await database.execute(
+        text(
+            "INSERT INTO usuario (nome, email, senha) "
+            "SELECT (CAST(:prefixos AS text[]))[1 + g % :np] || substr(md5(g::text), 1, 4) || ' ' || g, "
+            "       'bench' || g || '.' || :tag || '@bench.invalid', 'x' "
+            "FROM generate_series(1, :n) g"
+        ).bindparams(prefixos=PREFIXOS, np=len(PREFIXOS), tag=str(tag), n=usuarios)
+    )
+
+
+def garantir_indices():
+    with get_engine().begin() as conn:
+        for indice in usuario.indexes:
+            ddl = str(CreateIndex(indice).compile(dialect=conn.dialect))
+            conn.execute(text(ddl.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1)))
+        conn.execute(text("ANALYZE usuario"))
+
+
+async def _cronometrar(fn, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        await fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+    return tempos[len(tempos) // 2], tempos[max(int(len(tempos) * 0.95) - 1, 0)]
+
+
+def _linha(nome: str, p50: float, p95: float):
+    print(f"{nome:<36} p50 {p50:9.2f} ms   p95 {p95:9.2f} ms")
+
+
+async def paginacao(profundidades: list, limit: int, repeticoes: int):
+    ordem = select(usuario).where(usuario.c.excluido_em.is_(None)).order_by(asc(usuario.c.nome), asc(usuario.c.id))
+    for prof in profundidades:
+        anterior = await database.fetch_one(ordem.limit(1).offset(prof - 1))
+        if anterior is None:
+            break
+        cursor = codificar_cursor(anterior["nome"], anterior["id"])
+        _linha(
+            f"OFFSET {prof}",
+            *await _cronometrar(lambda: database.fetch_all(ordem.limit(limit).offset(prof)), repeticoes),
+        )
+        _linha(
+            f"keyset (profundidade {prof})",
+            *await _cronometrar(
+                lambda: usuario_crud.listar_usuarios(database, limit=limit, sort="nome", cursor=cursor),
+                repeticoes,
+            ),
+        )
+
+
+async def busca(limit: int, repeticoes: int):
+    # prefixos seletivos tirados de nomes reais (prefixo + 3 caracteres do sufixo)
+    amostra = await database.fetch_all(text("SELECT nome FROM usuario TABLESAMPLE SYSTEM (1) LIMIT 10"))
+    termos = [r["nome"][:6] for r in amostra]
+
+    async def _todas():
+        for q in termos:
+            await usuario_crud.listar_usuarios(database, limit=limit, sort="nome", q=q)
+
+    _linha(f"q= x{len(termos)} (com índice de prefixo)", *await _cronometrar(_todas, repeticoes))
+    async with database.transaction(force_rollback=True):
+        await database.execute(text("DROP INDEX IF EXISTS ix_usuario_nome_prefixo"))
+        _linha(f"q= x{len(termos)} (sem índice)", *await _cronometrar(_todas, repeticoes))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="semeia usuários sintéticos antes de medir")
+    parser.add_argument("--usuarios", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--profundidades", default="1000,100000,500000,900000")
+    args = parser.parse_args()
+
+    metadata.create_all(bind=get_engine())
+    await database.connect()
+    try:
+        if args.seed:
+            t0 = time.perf_counter()
+            await semear(args.usuarios)
+            print(f"semeado em {time.perf_counter() - t0:.1f}s")
+        garantir_indices()
+
+        print(f"\nlimit={args.limit} repetições={args.repeticoes}")
+        await paginacao([int(p) for p in args.profundidades.split(",")], args.limit, args.repeticoes)
+        await busca(args.limit, max(args.repeticoes // 4, 1))
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
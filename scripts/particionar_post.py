@@ -0,0 +1,70 @@
+"""
+Conversão única de um `post` já existente (tabela comum) para a versão particionada por mês.
+
+create_all não altera tabelas existentes; rode isto uma vez em bancos criados antes do
+particionamento, com a aplicação parada:
+    1. renomeia post -> post_legado e remove as FKs que apontavam para ele;
+    2. cria o novo post particionado (default + partições de todos os meses com dados);
+    3. copia as linhas, acerta a sequence de id e apaga post_legado (--manter-legado para não apagar).
+
+Uso:
+    DATABASE_URL=... python scripts/particionar_post.py [--manter-legado]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import get_engine  # noqa: E402
+from app.models.post import post, inicio_do_mes, limites_particao, nome_particao  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manter-legado", action="store_true")
+    args = parser.parse_args()
+
+    with get_engine().begin() as conn:
+        if conn.execute(text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'post'::regclass")).first():
+            print("post já é particionada; nada a fazer.")
+            return
+
+        conn.execute(text("ALTER TABLE post RENAME TO post_legado"))
+        for idx in conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = 'post_legado'")).scalars():
+            conn.execute(text(f'ALTER INDEX "{idx}" RENAME TO "{idx}_legado"'))
+        fks = conn.execute(text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = 'post_legado'::regclass"
+        )).all()
+        for tabela, nome in fks:
+            conn.execute(text(f'ALTER TABLE {tabela} DROP CONSTRAINT "{nome}"'))
+
+        post.create(conn)  # after_create: default + meses em volta de hoje
+        minimo = conn.execute(text("SELECT min(data_criacao) FROM post_legado")).scalar()
+        hoje = datetime.now(timezone.utc).date()
+        mes = inicio_do_mes(minimo.date() if minimo else hoje)
+        while mes <= hoje:
+            de, ate = limites_particao(mes)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {nome_particao(mes)} PARTITION OF post FOR VALUES FROM ({de}) TO ({ate})"
+            ))
+            mes = inicio_do_mes(mes, 1)
+
+        n = conn.execute(text(
+            "INSERT INTO post (id, post, usuario_id, data_criacao) "
+            "SELECT id, post, usuario_id, coalesce(data_criacao, now()) FROM post_legado"
+        )).rowcount
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('post', 'id'), coalesce((SELECT max(id) FROM post), 0) + 1, false)"
+        ))
+        if not args.manter_legado:
+            conn.execute(text("DROP TABLE post_legado"))
+        print(f"{n} posts copiados para post particionada; FKs removidas: {[f[1] for f in fks]}")
+
+
+if __name__ == "__main__":
+    main()
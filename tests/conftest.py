@@ -1,11 +1,22 @@
 import asyncio
+import fnmatch
+import os
 import platform
 import pytest
 import pytest_asyncio
+
+# contagem de consultas/detector de N+1 é desligada por padrão; nos testes, sempre ligada
+os.environ.setdefault("CONSULTAS_ATIVA", "1")
+
 from httpx import AsyncClient, ASGITransport
 from app.main import app
-from app.database import database, engine, metadata
+from app.database import database, get_engine, metadata
 from app import models
+from app.monitor_loop import MonitorLoop
+from app.middleware import consultas as consultas_mw
+
+# teste em que o event loop fica preso além disso falha (bcrypt, I/O síncrono, CPU pesada...)
+LOOP_BLOQUEIO_MAX_MS = float(os.getenv("LOOP_BLOQUEIO_MAX_MS", "250"))
 
 # Windows precisa desse policy para asyncio + asyncpg
 if platform.system() == "Windows":
@@ -14,9 +25,22 @@ if platform.system() == "Windows":
 @pytest.fixture(scope="session", autouse=True)
 def preparar_banco():
     # cria o schema 1x por sessão
-    metadata.create_all(bind=engine)
+    metadata.create_all(bind=get_engine())
     yield
-    metadata.drop_all(bind=engine)
+    metadata.drop_all(bind=get_engine())
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "bloqueio_permitido: o teste pode bloquear o event loop (não falha pelo monitor)"
+    )
+    config.addinivalue_line(
+        "markers",
+        "orcamento_consultas(n, rota='*'): no máximo n consultas por requisição cuja "
+        "\"METODO /caminho\" casa com o padrão fnmatch `rota`",
+    )
+    config.addinivalue_line(
+        "markers", "n_mais_1_permitido: o teste pode repetir a mesma consulta N vezes numa requisição"
+    )
 
 # Garante conexão aberta/fechada por teste
 @pytest_asyncio.fixture(autouse=True)
@@ -35,3 +59,63 @@ async def client():
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+
+# Monitor do event loop em cada teste: bloqueio acima de LOOP_BLOQUEIO_MAX_MS falha o teste
+# com a pilha de quem bloqueou.
+@pytest_asyncio.fixture(autouse=True)
+async def monitor_loop(request):
+    monitor = MonitorLoop(intervalo_ms=20, limiar_ms=LOOP_BLOQUEIO_MAX_MS)
+    monitor.iniciar()
+    try:
+        yield monitor
+    finally:
+        await monitor.parar()
+    if monitor.bloqueios and request.node.get_closest_marker("bloqueio_permitido") is None:
+        detalhes = "\n\n".join(
+            f"{b['duracao_ms']} ms (task {b['tarefa']}):\n" + "".join(b["pilha"] or ["(sem pilha)\n"])
+            for b in monitor.bloqueios
+        )
+        pytest.fail(f"event loop bloqueado além de {LOOP_BLOQUEIO_MAX_MS:.0f} ms:\n{detalhes}", pytrace=False)
+
+
+class RegistroConsultas:
+    """Contagem de consultas de cada requisição feita no teste, na ordem."""
+
+    def __init__(self):
+        self.requisicoes = []  # (metodo, caminho, Contagem)
+
+    def __call__(self, metodo, caminho, contagem):
+        self.requisicoes.append((metodo, caminho, contagem))
+
+    @property
+    def ultima(self):
+        return self.requisicoes[-1][2]
+
+
+def _formas(contagem) -> str:
+    return "".join(f"\n    {n}× {forma[:200]}" for forma, n in contagem.por_forma().items())
+
+
+# Orçamento de consultas por requisição (marker orcamento_consultas) e detector de N+1
+# (mesma forma de consulta CONSULTAS_N_MAIS_1 vezes numa requisição), em todo teste.
+@pytest.fixture(autouse=True)
+def registro_consultas(request):
+    registro = consultas_mw.ouvir(RegistroConsultas())
+    try:
+        yield registro
+    finally:
+        consultas_mw.deixar_de_ouvir(registro)
+
+    falhas = []
+    orcamentos = [(m.args[0], m.kwargs.get("rota", "*")) for m in request.node.iter_markers("orcamento_consultas")]
+    n_mais_1 = request.node.get_closest_marker("n_mais_1_permitido") is None
+    for metodo, caminho, contagem in registro.requisicoes:
+        rota = f"{metodo} {caminho}"
+        for limite, padrao in orcamentos:
+            if contagem.total > limite and fnmatch.fnmatchcase(rota, padrao):
+                falhas.append(f"{rota}: {contagem.total} consultas (orçamento {limite}){_formas(contagem)}")
+        if n_mais_1:
+            for forma, n in contagem.repetidas(consultas_mw.CONSULTAS_N_MAIS_1).items():
+                falhas.append(f"{rota}: possível N+1, {n}× {forma[:200]}")
+    if falhas:
+        pytest.fail("consultas ao banco:\n" + "\n".join(falhas), pytrace=False)
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from app.middleware.admissao import AdmissaoMiddleware, ConfigGrupo, LimiteAdaptativo
+
+
+def _app_lento(liberar_feed: asyncio.Event) -> FastAPI:
+    mini = FastAPI()
+
+    @mini.get("/post/feed")
+    async def feed():
+        await liberar_feed.wait()
+        return {"ok": True}
+
+    @mini.post("/like/{post_id}")
+    async def like(post_id: int):
+        return {"liked": True}
+
+    @mini.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    mini.add_middleware(
+        AdmissaoMiddleware,
+        grupos={
+            "feed": ConfigGrupo(inicial=2, minimo=1, maximo=2, fila_max=1, alvo_ms=100, espera_max_s=0.2),
+            "likes": ConfigGrupo(inicial=4, minimo=1, maximo=8, fila_max=8, alvo_ms=100, espera_max_s=0.2),
+        },
+    )
+    return mini
+
+
+@pytest.mark.asyncio
+async def test_feed_congestionado_nao_trava_likes():
+    liberar = asyncio.Event()
+    transport = ASGITransport(app=_app_lento(liberar))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        # 2 em execução + 1 na fila; o 4º é rejeitado na hora
+        presos = [asyncio.create_task(client.get("/post/feed")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        r = await client.get("/post/feed")
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+
+        # rotas baratas e de infra seguem respondendo
+        assert (await client.post("/like/1")).status_code == 200
+        assert (await client.get("/healthz")).status_code == 200
+
+        liberar.set()
+        respostas = await asyncio.gather(*presos)
+        # o da fila pode ter expirado (espera máx. 0.2s), os 2 primeiros passam
+        assert [r.status_code for r in respostas][:2] == [200, 200]
+
+
+@pytest.mark.asyncio
+async def test_aimd_reduz_e_recupera_limite():
+    lim = LimiteAdaptativo("t", ConfigGrupo(inicial=10, minimo=2, maximo=10, fila_max=4, alvo_ms=10, espera_max_s=0.1))
+    assert await lim.adquirir()
+    lim.liberar(1.0)  # lento -> corte multiplicativo
+    assert lim.limite == pytest.approx(9.0)
+    for _ in range(20):
+        assert await lim.adquirir()
+        lim.liberar(0.001)  # rápido -> aumento aditivo
+    assert lim.limite == pytest.approx(10.0)
+    assert lim.em_uso == 0
@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.auth import gerar_token_teste
+from app.database import database
+from app.crud import arquivo as arquivo_crud
+from app.crud import particoes as particoes_crud
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _insere_post(usuario_id: int, texto: str, quando: datetime) -> int:
+    return await database.fetch_val(text(
+        "INSERT INTO post (post, usuario_id, data_criacao) VALUES (:p, :u, :d) RETURNING id"
+    ).bindparams(p=texto, u=usuario_id, d=quando))
+
+
+async def _timeline(client: AsyncClient, usuario_id: int, limit: int, offset: int):
+    r = await client.get(f"/usuario/{usuario_id}/posts", params={"limit": limit, "offset": offset})
+    assert r.status_code == 200, r.text
+    return [p["id"] for p in r.json()]
+
+
+@pytest.mark.asyncio
+async def test_timeline_cai_no_arquivo_quando_a_parte_quente_acaba(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "Arquivista", "arquivista@example.com")
+    headers = {"Authorization": f"Bearer {gerar_token_teste(autor)}"}
+
+    # 4 posts antigos (2002) + 3 recentes
+    base = datetime(2002, 6, 1, tzinfo=timezone.utc)
+    antigos = [await _insere_post(autor, f"antigo {i}", base + timedelta(days=i)) for i in range(4)]
+    recentes = []
+    for i in range(3):
+        r = await client.post("/post/", json={"post": f"recente {i}"}, headers=headers)
+        assert r.status_code in (200, 201), r.text
+        recentes.append(r.json()["id"])
+    esperado = recentes[::-1] + antigos[::-1]
+    assert await _timeline(client, autor, 50, 0) == esperado
+
+    movidos = await arquivo_crud.arquivar_lote(database, datetime(2003, 1, 1, tzinfo=timezone.utc), lote=3)
+    assert movidos == 3
+    assert await arquivo_crud.arquivar_lote(database, datetime(2003, 1, 1, tzinfo=timezone.utc)) == 1
+    assert await database.fetch_val(
+        text("SELECT count(*) FROM post WHERE usuario_id = :u").bindparams(u=autor)
+    ) == 3
+
+    # mesma timeline, inclusive nas páginas que cruzam a fronteira quente/arquivo
+    assert await _timeline(client, autor, 50, 0) == esperado
+    for limit in (2, 3, 4):
+        paginas = []
+        for offset in range(0, len(esperado) + limit, limit):
+            paginas += await _timeline(client, autor, limit, offset)
+        assert paginas == esperado
+
+    r = await client.get(f"/usuario/{autor}/stats")
+    assert r.json()["stats"]["posts"] == 7
+
+    # post arquivado continua curtível e apagável
+    r = await client.post(f"/like/{antigos[0]}", headers=headers)
+    assert r.status_code == 200, r.text
+    r = await client.delete(f"/post/{antigos[0]}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert await _timeline(client, autor, 50, 0) == esperado[:-1]
+    r = await client.post(f"/like/{antigos[0]}", headers=headers)
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_particao_e_esvaziada_antes_de_destacar(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "Destacado", "destacado@example.com")
+    await particoes_crud.criar_particao(database, date(2002, 2, 1))
+    try:
+        ids = [
+            await _insere_post(autor, f"fev {i}", datetime(2002, 2, 10 + i, tzinfo=timezone.utc))
+            for i in range(3)
+        ]
+        # os posts vão para o arquivo em lotes, sem sumir da timeline em nenhum momento
+        assert await arquivo_crud.esvaziar_antigas(database, reter_meses=1, lote=2, hoje=date(2002, 4, 1)) is True
+        assert await _timeline(client, autor, 50, 0) == ids[::-1]
+        assert await arquivo_crud.esvaziar_antigas(database, reter_meses=1, lote=2, hoje=date(2002, 4, 1)) is False
+        assert await _timeline(client, autor, 50, 0) == ids[::-1]
+
+        assert await particoes_crud.destacar_antigas(database, reter_meses=1, hoje=date(2002, 4, 1)) == [date(2002, 2, 1)]
+        assert await _timeline(client, autor, 50, 0) == ids[::-1]
+        # vazia: drenar só remove a tabela
+        assert await arquivo_crud.drenar_destacada(database) == 0
+        assert await particoes_crud.listar_destacadas(database) == []
+        assert await arquivo_crud.drenar_destacada(database) is None
+    finally:
+        await database.execute(text("DROP TABLE IF EXISTS post_p200202"))
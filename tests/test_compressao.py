@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient, ASGITransport
+from app.middleware.compressao import CompressaoMiddleware, escolher_codificacao
+
+POSTS = [{"id": i, "post": "olá " * 20, "usuario": {"id": 1, "nome": "Autor"}} for i in range(200)]
+
+
+def _app_comprimido(**kwargs) -> CompressaoMiddleware:
+    mini = FastAPI()
+
+    @mini.get("/usuario/{usuario_id}/posts")
+    async def posts(usuario_id: int):
+        return POSTS
+
+    @mini.get("/pequeno")
+    async def pequeno():
+        return {"ok": True}
+
+    @mini.get("/binario")
+    async def binario():
+        return PlainTextResponse("x" * 5000, media_type="application/octet-stream")
+
+    return CompressaoMiddleware(mini, **kwargs)
+
+
+def test_escolher_codificacao():
+    assert escolher_codificacao("gzip, deflate") == "gzip"
+    assert escolher_codificacao("identity") is None
+    assert escolher_codificacao("gzip;q=0, *;q=0") is None
+    assert escolher_codificacao("*") is not None
+    assert escolher_codificacao("") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("thread_bytes", [10**9, 1])  # inline e fora do event loop
+async def test_comprime_acima_do_limite_e_reaproveita(thread_bytes):
+    app = _app_comprimido(thread_bytes=thread_bytes)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(3):
+            r = await client.get("/usuario/1/posts", headers={"Accept-Encoding": "gzip"})
+            assert r.status_code == 200
+            assert r.headers["content-encoding"] == "gzip"
+            assert "Accept-Encoding" in r.headers["vary"]
+            assert int(r.headers["content-length"]) < len(r.content) / 5
+            assert r.json() == POSTS
+        # mesmo corpo: comprimido uma vez, as outras saem do cache
+        assert app.cache.estado()["misses"] == 1
+        assert app.cache.estado()["hits"] == 2
+
+        # abaixo do limite, cliente sem compressão ou tipo binário: corpo intacto
+        r = await client.get("/pequeno", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+        r = await client.get("/usuario/1/posts", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in r.headers
+        assert r.json() == POSTS
+        r = await client.get("/binario", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+        assert r.text == "x" * 5000
+
+
+@pytest.mark.asyncio
+async def test_prefere_brotli_quando_o_cliente_aceita():
+    assert escolher_codificacao("br, gzip") == "br"
+    assert escolher_codificacao("br;q=0.5, gzip") == "gzip"
+    app = _app_comprimido()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.get("/usuario/1/posts", headers={"Accept-Encoding": "br, gzip"})
+        assert r.status_code == 200
+        assert r.headers["content-encoding"] == "br"
+        assert int(r.headers["content-length"]) < len(r.content) / 5
+        assert r.json() == POSTS  # httpx decodifica br com o pacote brotli
@@ -0,0 +1,54 @@
+import pytest
+from httpx import AsyncClient
+
+from app import metricas
+from app.auth import gerar_token_teste
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post("/usuario/", json={"nome": nome, "email": email, "senha": senha})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def _auth(uid: int) -> dict:
+    return {"Authorization": f"Bearer {gerar_token_teste(uid)}"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(2, rota="POST /like/*")
+@pytest.mark.orcamento_consultas(3, rota="GET /like/*/usuarios")
+async def test_curtidores_paginados_por_data_do_like(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "AutorCurt", "autor.curt@example.com")
+    fas = [await _cria_usuario_api(client, f"FaCurt{i}", f"fa{i}.curt@example.com") for i in range(5)]
+    r = await client.post("/post/", json={"post": "curtam"}, headers=_auth(autor))
+    post_id = r.json()["id"]
+    for uid in fas:
+        assert (await client.post(f"/like/{post_id}", headers=_auth(uid))).status_code == 200
+
+    # conta excluída some da lista
+    assert (await client.delete("/usuario/me", headers=_auth(fas[1]))).status_code == 200
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = await client.get(f"/like/{post_id}/usuarios", params=params)
+        assert r.status_code == 200, r.text
+        corpo = r.json()
+        vistos += corpo["itens"]
+        paginas += 1
+        cursor = corpo["proximo_cursor"]
+        if cursor is None:
+            break
+    assert paginas == 2
+    assert [c["id"] for c in vistos] == [fas[4], fas[3], fas[2], fas[0]]
+    assert vistos[0]["nome"] == "FaCurt4" and vistos[0]["curtido_em"]
+
+    # primeira página repetida sai do micro-cache
+    antes = metricas.snapshot()["singleflight"]["_primeira_pagina_curtidores"]["cache_hits"]
+    assert (await client.get(f"/like/{post_id}/usuarios", params={"limit": 2})).json()["itens"] == vistos[:2]
+    assert metricas.snapshot()["singleflight"]["_primeira_pagina_curtidores"]["cache_hits"] == antes + 1
+
+    r = await client.get(f"/like/{post_id}/usuarios", params={"cursor": "xx"})
+    assert r.status_code == 400
+    assert (await client.get("/like/999999/usuarios")).status_code == 404
@@ -0,0 +1,64 @@
+from sqlalchemy import text
+
+from app import esquema
+from app.database import get_engine, metadata
+
+# esquema de antes das colunas/índices novos (tabelas como eram no começo do projeto)
+ESQUEMA_ANTIGO = """
+CREATE TABLE usuario (
+    id SERIAL PRIMARY KEY,
+    nome VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    senha VARCHAR(200) NOT NULL
+);
+CREATE TABLE post (
+    id SERIAL PRIMARY KEY,
+    post VARCHAR NOT NULL,
+    usuario_id INTEGER REFERENCES usuario (id),
+    data_criacao TIMESTAMP WITH TIME ZONE
+);
+CREATE TABLE "like" (
+    usuario_id INTEGER NOT NULL REFERENCES usuario (id) ON DELETE CASCADE,
+    post_id INTEGER NOT NULL REFERENCES post (id) ON DELETE CASCADE,
+    CONSTRAINT like_pkey PRIMARY KEY (usuario_id, post_id)
+);
+CREATE TABLE seguir (
+    seguidor_id INTEGER REFERENCES usuario (id),
+    seguido_id INTEGER REFERENCES usuario (id),
+    PRIMARY KEY (seguidor_id, seguido_id)
+);
+INSERT INTO usuario (nome, email, senha) VALUES ('Antiga', 'antiga@example.com', 'x'), ('Outra', 'outra@example.com', 'x');
+INSERT INTO post (post, usuario_id, data_criacao) VALUES ('oi', 1, now());
+INSERT INTO "like" (usuario_id, post_id) VALUES (2, 1);
+INSERT INTO seguir (seguidor_id, seguido_id) VALUES (2, 1);
+"""
+
+
+def test_atualiza_banco_criado_antes_das_colunas_novas():
+    # tudo numa transação desfeita no fim: DDL no Postgres também é transacional
+    with get_engine().connect() as conn, conn.begin() as transacao:
+        conn.exec_driver_sql("CREATE SCHEMA legado")
+        conn.exec_driver_sql("SET LOCAL search_path TO legado")
+        conn.exec_driver_sql(ESQUEMA_ANTIGO)
+        # o mesmo que esquema.migrar, rodado 2× (idempotente)
+        for _ in range(2):
+            metadata.create_all(bind=conn)
+            esquema.atualizar_esquema(conn)
+
+        colunas = set(conn.execute(text(
+            "SELECT table_name || '.' || column_name FROM information_schema.columns WHERE table_schema = 'legado'"
+        )).scalars())
+        for coluna in esquema.COLUNAS:
+            assert f"{coluna.table.name}.{coluna.name}" in colunas
+        indices = set(conn.execute(text("SELECT indexname FROM pg_indexes WHERE schemaname = 'legado'")).scalars())
+        for tabela in esquema.TABELAS_COM_INDICES:
+            assert {i.name for i in tabela.indexes} <= indices
+
+        # linhas antigas ganham os defaults das colunas NOT NULL
+        usuario = conn.execute(text(
+            "SELECT versao, atualizado_em IS NOT NULL, excluido_em FROM usuario WHERE id = 1"
+        )).one()
+        assert tuple(usuario) == (0, True, None)
+        assert conn.execute(text('SELECT count(*) FROM "like" WHERE data_criacao IS NOT NULL')).scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM seguir WHERE data_criacao IS NOT NULL")).scalar() == 1
+        transacao.rollback()
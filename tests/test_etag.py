@@ -0,0 +1,110 @@
+import pytest
+from httpx import AsyncClient
+
+from app.auth import gerar_token_teste
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _revalida(client: AsyncClient, url: str, etag: str) -> int:
+    return (await client.get(url, headers={"If-None-Match": etag})).status_code
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(5, rota="GET /usuario/*/stats")
+@pytest.mark.orcamento_consultas(5, rota="GET /usuario/*/posts")
+@pytest.mark.orcamento_consultas(4, rota="POST /seguir/")
+@pytest.mark.orcamento_consultas(1, rota="DELETE /seguir/")
+@pytest.mark.orcamento_consultas(6, rota="DELETE /post/*")
+@pytest.mark.orcamento_consultas(2, rota="PATCH /usuario/me")
+async def test_etag_perfil_stats_e_posts(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "AutorEtag", "autor.etag@example.com")
+    fa = await _cria_usuario_api(client, "FaEtag", "fa.etag@example.com")
+    headers = {"Authorization": f"Bearer {gerar_token_teste(autor)}"}
+
+    urls = [f"/usuario/{autor}", f"/usuario/{autor}/stats", f"/usuario/{autor}/posts"]
+    etags = {}
+    for url in urls:
+        r = await client.get(url)
+        assert r.status_code == 200, r.text
+        assert "public" in r.headers["cache-control"]
+        etags[url] = r.headers["etag"]
+        assert await _revalida(client, url, etags[url]) == 304
+    r = await client.get(urls[0], headers={"If-None-Match": etags[urls[0]]})
+    assert r.headers["etag"] == etags[urls[0]]
+    assert r.content == b""
+
+    # post novo: stats e posts mudam, perfil não
+    r = await client.post("/post/", json={"post": "primeiro"}, headers=headers)
+    assert r.status_code in (200, 201), r.text
+    post_id = r.json()["id"]
+    assert await _revalida(client, urls[0], etags[urls[0]]) == 304
+    assert await _revalida(client, urls[1], etags[urls[1]]) == 200
+    assert await _revalida(client, urls[2], etags[urls[2]]) == 200
+    etags = {url: (await client.get(url)).headers["etag"] for url in urls}
+
+    # novo seguidor: stats mudam, perfil não
+    r = await client.post("/seguir/", params={"seguidor_id": fa, "seguido_id": autor})
+    assert r.status_code == 200, r.text
+    assert await _revalida(client, urls[0], etags[urls[0]]) == 304
+    assert await _revalida(client, urls[1], etags[urls[1]]) == 200
+    etags = {url: (await client.get(url)).headers["etag"] for url in urls}
+
+    # unfollow de quem não seguia: nada muda
+    r = await client.delete("/seguir/", params={"seguidor_id": autor, "seguido_id": fa})
+    assert r.status_code == 200, r.text
+    for url in urls:
+        assert await _revalida(client, url, etags[url]) == 304
+
+    # post apagado (último post id não muda sozinho): stats e posts
+    r = await client.delete(f"/post/{post_id}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert await _revalida(client, urls[1], etags[urls[1]]) == 200
+    assert await _revalida(client, urls[2], etags[urls[2]]) == 200
+    etags = {url: (await client.get(url)).headers["etag"] for url in urls}
+
+    # perfil editado: tudo (o nome aparece na timeline)
+    r = await client.patch("/usuario/me", json={"nome": "AutorEtag2"}, headers=headers)
+    assert r.status_code == 200, r.text
+    for url in urls:
+        assert await _revalida(client, url, etags[url]) == 200
+
+    # paginação diferente, ETag diferente; usuário inexistente continua 404
+    r = await client.get(urls[2], params={"limit": 10})
+    assert r.headers["etag"] != (await client.get(urls[2])).headers["etag"]
+    assert (await client.get("/usuario/999999/stats")).status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(4, rota="GET /usuario/*/posts")
+async def test_304_leva_o_etag_da_representacao_comprimida(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "AutorEtagGz", "autor.etaggz@example.com")
+    headers = {"Authorization": f"Bearer {gerar_token_teste(autor)}"}
+    for i in range(10):
+        r = await client.post("/post/", json={"post": f"post longo {i} " + "x" * 200}, headers=headers)
+        assert r.status_code == 200, r.text
+
+    url = f"/usuario/{autor}/posts"
+    r = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    comprimido = r.headers["etag"]
+    assert comprimido.endswith('-gzip"')
+
+    r = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": comprimido})
+    assert r.status_code == 304
+    assert r.headers["etag"] == comprimido
+    assert "Accept-Encoding" in r.headers["vary"]
+
+    # quem guardou a versão crua revalida contra ela
+    r = await client.get(url, headers={"Accept-Encoding": "identity"})
+    crua = r.headers["etag"]
+    assert crua == comprimido.replace('-gzip"', '"')
+    r = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": crua})
+    assert r.status_code == 304 and r.headers["etag"] == crua
@@ -0,0 +1,105 @@
+import pytest
+from httpx import AsyncClient
+from app.auth import gerar_token_teste
+from app.database import database
+from app.crud import fila as fila_crud
+from app.models.ranking import post_score
+from app.workers import ranking as ranking_worker
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _cria_post_api(client: AsyncClient, token: str, conteudo: str) -> int:
+    resp = await client.post(
+        "/post/",
+        json={"post": conteudo},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_feed_ranked_prioriza_engajamento(client: AsyncClient):
+    """
+    Post antigo com vários likes passa à frente de um mais novo sem likes,
+    o que o feed padrão (por data) nunca faria.
+    """
+    autor = await _cria_usuario_api(client, "AutorRank", "autor.rank@example.com")
+    token_autor = gerar_token_teste(autor)
+    curtidores = [
+        await _cria_usuario_api(client, f"Fa{i}", f"fa{i}.rank@example.com") for i in range(4)
+    ]
+
+    popular = await _cria_post_api(client, token_autor, "post popular")
+    novo = await _cria_post_api(client, token_autor, "post novo sem likes")
+
+    for uid in curtidores:
+        r = await client.post(f"/like/{popular}", headers={"Authorization": f"Bearer {gerar_token_teste(uid)}"})
+        assert r.status_code == 200
+    # score/afinidade são aplicados pela fila
+    await fila_crud.drenar(database)
+
+    token_viewer = gerar_token_teste(curtidores[0])
+    resp = await client.get(
+        "/post/feed",
+        params={"mode": "ranked", "limit": 200},
+        headers={"Authorization": f"Bearer {token_viewer}"},
+    )
+    assert resp.status_code == 200, resp.text
+    ids = [p["id"] for p in resp.json()]
+    assert ids.index(popular) < ids.index(novo)
+
+    # unlike é refletido no score (likes voltam a 0 -> ordem por recência)
+    for uid in curtidores:
+        await client.delete(f"/like/{popular}", headers={"Authorization": f"Bearer {gerar_token_teste(uid)}"})
+    await fila_crud.drenar(database)
+    resp = await client.get(
+        "/post/feed",
+        params={"mode": "ranked", "limit": 200},
+        headers={"Authorization": f"Bearer {token_viewer}"},
+    )
+    ids = [p["id"] for p in resp.json()]
+    assert ids.index(novo) < ids.index(popular)
+
+    # modo inválido
+    resp = await client.get("/post/feed", params={"mode": "xpto"}, headers={"Authorization": f"Bearer {token_viewer}"})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_posts_sem_score_entram_no_feed_ranked(client: AsyncClient, monkeypatch):
+    """Post anterior ao feed ranqueado (sem linha em post_score) é completado pelo worker."""
+    autor = await _cria_usuario_api(client, "AutorLegado", "autor.legado@example.com")
+    fa = await _cria_usuario_api(client, "FaLegado", "fa.legado@example.com")
+    legado = await _cria_post_api(client, gerar_token_teste(autor), "post de antes do deploy")
+    assert (await client.post(f"/like/{legado}", headers={"Authorization": f"Bearer {gerar_token_teste(fa)}"})).status_code == 200
+    await fila_crud.drenar(database)
+    await database.execute(post_score.delete().where(post_score.c.post_id == legado))
+
+    async def feed_ranked():
+        r = await client.get(
+            "/post/feed", params={"mode": "ranked", "limit": 200},
+            headers={"Authorization": f"Bearer {gerar_token_teste(fa)}"},
+        )
+        return [p["id"] for p in r.json()]
+
+    assert legado not in await feed_ranked()
+
+    monkeypatch.setattr(ranking_worker, "_progresso", {"ultimo_id": 0, "concluido": False})
+    passos = 0
+    while await ranking_worker.passo(database):
+        passos += 1
+    assert passos >= 1 and ranking_worker._progresso["concluido"]
+    assert not await ranking_worker.passo(database)  # passada única
+
+    assert legado in await feed_ranked()
+    row = await database.fetch_one(post_score.select().where(post_score.c.post_id == legado))
+    assert row["likes"] == 1
@@ -0,0 +1,143 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app import metricas
+from app.auth import gerar_token_teste
+from app.crud import fila as fila_crud
+from app.database import database
+
+lotes_recebidos = []
+
+
+@fila_crud.tratador("teste_lote", lote=3)
+async def _tratar_lote(db, payloads):
+    lotes_recebidos.append([p["n"] for p in payloads])
+
+
+@fila_crud.tratador("teste_falha")
+async def _tratar_falha(db, payloads):
+    # escreve e falha: o savepoint tem de desfazer a escrita
+    await db.execute(text("INSERT INTO sugestao_pendente (usuario_id) VALUES (-4242) ON CONFLICT DO NOTHING"))
+    raise RuntimeError("quebrou")
+
+
+@fila_crud.tratador("teste_misto", lote=10)
+async def _tratar_misto(db, payloads):
+    if any(p.get("ruim") for p in payloads):
+        raise ValueError("payload ruim")
+    lotes_recebidos.append([p["n"] for p in payloads])
+
+
+async def _tarefas(tipo: str):
+    return await database.fetch_all(
+        text("SELECT tentativas, executar_em > now() AS adiada, erro, morta_em FROM tarefa WHERE tipo = :t").bindparams(t=tipo)
+    )
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post("/usuario/", json={"nome": nome, "email": email, "senha": senha})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_tarefas_do_mesmo_tipo_saem_em_lote():
+    lotes_recebidos.clear()
+    async with database.transaction():
+        for n in range(5):
+            await fila_crud.enfileirar(database, "teste_lote", {"n": n})
+
+    # rollback da escrita leva a tarefa junto
+    with pytest.raises(RuntimeError):
+        async with database.transaction():
+            await fila_crud.enfileirar(database, "teste_lote", {"n": 99})
+            raise RuntimeError("rollback")
+
+    await fila_crud.drenar(database)
+    assert lotes_recebidos == [[0, 1, 2], [3, 4]]
+    assert await _tarefas("teste_lote") == []
+
+
+@pytest.mark.asyncio
+async def test_falha_tem_backoff_e_depois_vira_morta(monkeypatch):
+    monkeypatch.setattr(fila_crud, "FILA_MAX_TENTATIVAS", 2)
+    antes = dict(metricas.snapshot()["contadores"])
+    await fila_crud.enfileirar(database, "teste_falha", {"x": 1})
+    try:
+        assert await fila_crud.processar_lote(database) is True
+        [t] = await _tarefas("teste_falha")
+        assert t["tentativas"] == 1 and t["adiada"] and "quebrou" in t["erro"] and t["morta_em"] is None
+        assert await database.fetch_val(text("SELECT count(*) FROM sugestao_pendente WHERE usuario_id = -4242")) == 0
+
+        # adiada: não sai antes da hora
+        await fila_crud.drenar(database)
+        assert (await _tarefas("teste_falha"))[0]["tentativas"] == 1
+
+        await database.execute(text("UPDATE tarefa SET executar_em = now() WHERE tipo = 'teste_falha'"))
+        await fila_crud.drenar(database)
+        [t] = await _tarefas("teste_falha")
+        assert t["tentativas"] == 2 and t["morta_em"] is not None
+        # morta: fora da fila
+        await database.execute(text("UPDATE tarefa SET executar_em = now() WHERE tipo = 'teste_falha'"))
+        await fila_crud.drenar(database)
+        assert (await _tarefas("teste_falha"))[0]["tentativas"] == 2
+
+        depois = metricas.snapshot()["contadores"]
+        assert depois.get("fila.falhas", 0) - antes.get("fila.falhas", 0) == 2
+        assert depois.get("fila.mortas", 0) - antes.get("fila.mortas", 0) == 1
+        await fila_crud.atualizar_estado(database, forcar=True)
+        assert metricas.snapshot()["fila"]["teste_falha"]["mortas"] == 1
+    finally:
+        await database.execute(text("DELETE FROM tarefa WHERE tipo = 'teste_falha'"))
+
+
+@pytest.mark.asyncio
+async def test_lote_com_tarefa_ruim_e_desfeito_sem_atrasar_as_boas():
+    lotes_recebidos.clear()
+    async with database.transaction():
+        for n in range(4):
+            await fila_crud.enfileirar(database, "teste_misto", {"n": n, "ruim": n == 2})
+    try:
+        await fila_crud.drenar(database)
+        # as boas saem na mesma drenagem, uma a uma; só a ruim fica esperando o backoff
+        assert sorted(lotes_recebidos) == [[0], [1], [3]]
+        [t] = await _tarefas("teste_misto")
+        assert t["tentativas"] == 2 and t["adiada"] and "payload ruim" in t["erro"]
+    finally:
+        await database.execute(text("DELETE FROM tarefa WHERE tipo = 'teste_misto'"))
+
+
+def test_backoff_cresce_e_tem_teto(monkeypatch):
+    monkeypatch.setattr(fila_crud, "FILA_BACKOFF_BASE_S", 1.0)
+    monkeypatch.setattr(fila_crud, "FILA_BACKOFF_MAX_S", 60.0)
+    for _ in range(50):
+        assert 2 <= fila_crud.backoff(2) <= 4
+        assert 30 <= fila_crud.backoff(20) <= 60
+
+
+@pytest.mark.asyncio
+async def test_like_aplica_score_e_trending_pela_fila(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "AutorFila", "autor.fila@example.com")
+    fas = [await _cria_usuario_api(client, f"FaFila{i}", f"fa{i}.fila@example.com") for i in range(3)]
+    r = await client.post("/post/", json={"post": "na fila"}, headers={"Authorization": f"Bearer {gerar_token_teste(autor)}"})
+    post_id = r.json()["id"]
+
+    for uid in fas:
+        r = await client.post(f"/like/{post_id}", headers={"Authorization": f"Bearer {gerar_token_teste(uid)}"})
+        assert r.status_code == 200, r.text
+    await client.delete(f"/like/{post_id}", headers={"Authorization": f"Bearer {gerar_token_teste(fas[0])}"})
+
+    score = text("SELECT likes FROM post_score WHERE post_id = :p").bindparams(p=post_id)
+    buckets = text("SELECT coalesce(sum(likes), 0) FROM like_bucket WHERE post_id = :p").bindparams(p=post_id)
+    # a requisição só gravou o like e a tarefa
+    assert await database.fetch_val(score) == 0
+    assert await database.fetch_val(buckets) == 0
+
+    await fila_crud.drenar(database)
+    assert await database.fetch_val(score) == 2
+    assert await database.fetch_val(buckets) == 2
+    afinidades = await database.fetch_all(
+        text("SELECT usuario_id, likes FROM afinidade WHERE autor_id = :a ORDER BY usuario_id").bindparams(a=autor)
+    )
+    assert [(r["usuario_id"], r["likes"]) for r in afinidades] == [(fas[1], 1), (fas[2], 1)]
@@ -0,0 +1,62 @@
+import pytest
+from array import array
+from httpx import AsyncClient
+from app.database import database
+from app.cache.grafo import grafo, GrafoSeguir, SEGUINDO, SEGUIDORES
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_grafo_carrega_e_acompanha_seguir(client: AsyncClient):
+    a = await _cria_usuario_api(client, "AliceGrafo", "alice.grafo@example.com")
+    b = await _cria_usuario_api(client, "BobGrafo", "bob.grafo@example.com")
+    c = await _cria_usuario_api(client, "CarolGrafo", "carol.grafo@example.com")
+
+    await client.post("/seguir/", params={"seguidor_id": a, "seguido_id": c})
+
+    # carga preguiçosa, ordenada
+    assert list(await grafo.seguindo(database, a)) == [c]
+    assert list(await grafo.seguidores(database, c)) == [a]
+
+    # seguir/deixar de seguir atualizam as listas em cache
+    await client.post("/seguir/", params={"seguidor_id": a, "seguido_id": b})
+    assert list(await grafo.seguindo(database, a)) == sorted([b, c])
+    assert await grafo.segue(database, a, b)
+
+    await client.delete("/seguir/", params={"seguidor_id": a, "seguido_id": c})
+    assert list(await grafo.seguindo(database, a)) == [b]
+    assert grafo.contagem(SEGUIDORES, c) == 0
+
+    # stats usa o cache e continua correto
+    body = (await client.get(f"/usuario/{a}/stats")).json()
+    assert body["stats"]["seguindo"] == 1
+
+
+def test_grafo_lru_por_bytes():
+    g = GrafoSeguir(max_bytes=1000)
+    for uid in range(10):
+        g._put((SEGUINDO, uid), array("i", range(50)))
+    # cada lista ocupa ~360 bytes: só cabem as duas mais recentes
+    assert g.contagem(SEGUINDO, 0) is None
+    assert g.contagem(SEGUINDO, 9) == 50
+    assert g._bytes <= 1000
+
+
+def test_grafo_arestas_novas_respeitam_limite_de_bytes():
+    g = GrafoSeguir(max_bytes=1000)
+    g._put((SEGUINDO, 1), array("i", range(50)))
+    g._put((SEGUINDO, 2), array("i", range(50)))
+    # a lista 2 cresce além do limite: a 1 (menos usada) sai
+    for uid in range(1000, 1100):
+        g.adicionar_aresta(2, uid)
+    assert g._bytes <= 1000
+    assert g.contagem(SEGUINDO, 1) is None
+    assert g.contagem(SEGUINDO, 2) == 150
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app import admin
+from app.monitor_loop import MonitorLoop
+
+
+def _hash_sincrono_lento():
+    time.sleep(0.3)
+
+
+async def _rota_que_bloqueia():
+    _hash_sincrono_lento()
+
+
+@pytest.mark.asyncio
+@pytest.mark.bloqueio_permitido
+async def test_bloqueio_registrado_com_pilha_e_task():
+    monitor = MonitorLoop(intervalo_ms=10, limiar_ms=100)
+    monitor.iniciar()
+    try:
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(_rota_que_bloqueia(), name="rota-lenta")
+        await asyncio.sleep(0.05)  # o batimento volta e fecha o bloqueio
+    finally:
+        await monitor.parar()
+
+    assert len(monitor.bloqueios) == 1
+    bloqueio = monitor.bloqueios[0]
+    assert bloqueio["duracao_ms"] >= 250
+    assert bloqueio["tarefa"] == "rota-lenta"
+    assert any("_hash_sincrono_lento" in linha for linha in bloqueio["pilha"])
+
+    estado = monitor.estado()
+    assert estado["bloqueios"] == 1 and estado["lag_max_ms"] >= 250
+    assert estado["lag_p50_ms"] < 100
+
+
+@pytest.mark.asyncio
+async def test_login_nao_bloqueia_o_loop(client: AsyncClient, monkeypatch):
+    # o primeiro uso do threadpool importa o backend do anyio (custo único): fica fora da medida
+    r = await client.post("/usuario/", json={"nome": "Loop", "email": "loop@example.com", "senha": "senha123"})
+    assert r.status_code == 201, r.text
+
+    # bcrypt roda em thread: o loop segue respondendo durante o login
+    monitor = MonitorLoop(intervalo_ms=10, limiar_ms=100)
+    monitor.iniciar()
+    try:
+        r = await client.post("/usuario/login", data={"username": "loop@example.com", "password": "senha123"})
+        await asyncio.sleep(0.02)
+    finally:
+        await monitor.parar()
+    assert r.status_code == 200
+    assert not monitor.bloqueios and monitor.estado()["lag_max_ms"] < 100
+
+    monkeypatch.setattr(admin, "ADMIN_SEGREDO", "segredo_admin_teste")
+    assert (await client.get("/admin/loop/bloqueios")).status_code == 404
+    r = await client.get("/admin/loop/bloqueios", headers={"X-Admin-Token": admin.gerar_token_admin(5)})
+    assert r.status_code == 200 and "recentes" in r.json()
@@ -0,0 +1,81 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+
+from app.auth import gerar_token_teste
+from app.crud import fila as fila_crud
+from app.database import database
+from app.models.notificacao import notificacao
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post("/usuario/", json={"nome": nome, "email": email, "senha": senha})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def _auth(uid: int) -> dict:
+    return {"Authorization": f"Bearer {gerar_token_teste(uid)}"}
+
+
+async def _nao_lidas(client: AsyncClient, uid: int) -> int:
+    resp = await client.get("/notificacao/nao-lidas", headers=_auth(uid))
+    assert resp.status_code == 200, resp.text
+    return resp.json()["nao_lidas"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /notificacao/*")
+@pytest.mark.orcamento_consultas(1, rota="GET /notificacao/")
+@pytest.mark.orcamento_consultas(3, rota="POST /notificacao/lidas")
+async def test_notificacoes_agregadas_com_contador(client: AsyncClient):
+    autora = await _cria_usuario_api(client, "AutoraNotif", "autora.notif@example.com")
+    fas = [await _cria_usuario_api(client, f"FaNotif{i}", f"fa{i}.notif@example.com") for i in range(4)]
+    r = await client.post("/post/", json={"post": "viral"}, headers=_auth(autora))
+    post_id = r.json()["id"]
+
+    for uid in fas[:3]:
+        await client.post(f"/like/{post_id}", headers=_auth(uid))
+    await client.post(f"/like/{post_id}", headers=_auth(autora))  # o próprio like não notifica
+    await client.post("/seguir/", params={"seguidor_id": fas[0], "seguido_id": autora})
+    await client.post("/seguir/lote", json={"seguir": [autora]}, headers=_auth(fas[1]))
+
+    # nada antes da fila rodar
+    assert await _nao_lidas(client, autora) == 0
+    await fila_crud.drenar(database)
+
+    # uma linha por alvo: 3 likes no post, 2 seguidores
+    assert await _nao_lidas(client, autora) == 2
+    r = await client.get("/notificacao/", params={"limit": 1}, headers=_auth(autora))
+    assert r.status_code == 200, r.text
+    pagina = r.json()
+    assert len(pagina["itens"]) == 1 and pagina["proximo_cursor"]
+    r = await client.get("/notificacao/", params={"limit": 1, "cursor": pagina["proximo_cursor"]}, headers=_auth(autora))
+    segunda = r.json()
+    assert segunda["proximo_cursor"] is None
+    itens = {n["tipo"]: n for n in pagina["itens"] + segunda["itens"]}
+    assert itens["like"]["alvo_id"] == post_id and itens["like"]["total"] == 3
+    assert itens["like"]["ator"]["id"] == fas[2]
+    assert itens["seguir"]["total"] == 2 and itens["seguir"]["ator"]["nome"] == "FaNotif1"
+
+    # lida: o próximo like abre outra linha em vez de somar na antiga
+    r = await client.post("/notificacao/lidas", json={"ids": [itens["like"]["id"]]}, headers=_auth(autora))
+    assert r.json() == {"marcadas": 1, "nao_lidas": 1}
+    await client.post(f"/like/{post_id}", headers=_auth(fas[3]))
+    await fila_crud.drenar(database)
+    r = await client.get("/notificacao/", params={"apenas_nao_lidas": True}, headers=_auth(autora))
+    nao_lidas = r.json()["itens"]
+    assert [(n["tipo"], n["total"]) for n in nao_lidas] == [("like", 1), ("seguir", 2)]
+    assert await _nao_lidas(client, autora) == 2
+
+    # notificações são só do destinatário
+    r = await client.post("/notificacao/lidas", json={"ids": [nao_lidas[0]["id"]]}, headers=_auth(fas[0]))
+    assert r.json()["marcadas"] == 0
+
+    r = await client.post("/notificacao/lidas", json={}, headers=_auth(autora))
+    assert r.json() == {"marcadas": 2, "nao_lidas": 0}
+    assert await database.fetch_val(
+        select(func.count()).select_from(notificacao).where((notificacao.c.usuario_id == autora) & ~notificacao.c.lida)
+    ) == 0
+
+    assert (await client.get("/notificacao/", params={"cursor": "lixo"}, headers=_auth(autora))).status_code == 400
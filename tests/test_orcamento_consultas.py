@@ -0,0 +1,102 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+
+from app import consultas, metricas
+from app.auth import gerar_token_teste
+from app.database import database
+from app.middleware import consultas as consultas_mw
+from app.models.usuario import usuario
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post("/usuario/", json={"nome": nome, "email": email, "senha": senha})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def _auth(uid: int) -> dict:
+    return {"Authorization": f"Bearer {gerar_token_teste(uid)}"}
+
+
+# orçamentos medidos com cache frio; consulta a mais numa dessas rotas falha o teste
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/me")
+@pytest.mark.orcamento_consultas(5, rota="GET /usuario/*/stats")
+@pytest.mark.orcamento_consultas(4, rota="GET /usuario/*/posts")
+@pytest.mark.orcamento_consultas(3, rota="GET /post/feed")
+@pytest.mark.orcamento_consultas(1, rota="GET /post/trending")
+@pytest.mark.orcamento_consultas(1, rota="GET /like/*/usuarios")
+@pytest.mark.orcamento_consultas(1, rota="GET /notificacao/*")
+async def test_orcamento_de_consultas_por_rota(client: AsyncClient, registro_consultas):
+    leitor = await _cria_usuario_api(client, "Orc0", "orc0@example.com")
+    autores = [await _cria_usuario_api(client, f"Orc{i}", f"orc{i}@example.com") for i in range(1, 7)]
+    posts = []
+    for uid in autores:
+        r = await client.post("/seguir/", params={"seguidor_id": leitor, "seguido_id": uid})
+        assert r.status_code in (200, 201), r.text
+        for j in range(3):
+            posts.append((await client.post("/post/", json={"post": f"orc {j}"}, headers=_auth(uid))).json()["id"])
+    for post_id in posts[:6]:
+        assert (await client.post(f"/like/{post_id}", headers=_auth(leitor))).status_code == 200
+
+    # o custo não cresce com o tamanho da página (nada de consulta por post/usuário)
+    rotas = [
+        "/usuario/me",
+        f"/usuario/{autores[0]}/stats",
+        f"/usuario/{autores[0]}/posts",
+        "/post/feed",
+        "/post/feed?mode=ranked",
+        "/post/trending",
+        f"/like/{posts[0]}/usuarios",
+        "/notificacao/",
+        "/notificacao/nao-lidas",
+    ]
+    for rota in rotas:
+        r = await client.get(rota, headers=_auth(leitor))
+        assert r.status_code == 200, (rota, r.text)
+        assert registro_consultas.ultima.total >= 1
+
+    r = await client.get("/post/feed", params={"limit": 200}, headers=_auth(leitor))
+    assert len(r.json()) >= len(posts)
+    assert registro_consultas.ultima.total <= 3
+
+
+@pytest.mark.asyncio
+async def test_forma_ignora_valores():
+    q1 = select(usuario.c.nome).where(usuario.c.id == 1)
+    q2 = select(usuario.c.nome).where(usuario.c.id == 2)
+    assert consultas.forma(q1) == consultas.forma(q2)
+    assert consultas.forma("SELECT * FROM post_2024 WHERE id = 7 AND nome = 'a''b'") == (
+        "SELECT * FROM post_2024 WHERE id = ? AND nome = ?"
+    )
+
+    consultas.ativar_contagem()
+    with consultas.contar() as externa:
+        with consultas.contar() as interna:
+            for uid in range(6):
+                await database.fetch_one(select(usuario.c.nome).where(usuario.c.id == uid))
+        await database.fetch_val(select(usuario.c.id).limit(1))
+    assert interna.total == 6 and externa.total == 7
+    assert interna.repetidas(5) == {consultas.forma(q1): 6}
+    assert externa.repetidas(7) == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.n_mais_1_permitido
+async def test_middleware_aponta_n_mais_1(registro_consultas):
+    async def rota_n_mais_1(scope, receive, send):
+        for uid in range(consultas_mw.CONSULTAS_N_MAIS_1):
+            await database.fetch_one(select(usuario.c.nome).where(usuario.c.id == uid))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    antes = metricas.snapshot()["contadores"].get("consultas.n_mais_1", 0)
+    transport = ASGITransport(app=consultas_mw.ConsultasMiddleware(rota_n_mais_1))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/lenta")).status_code == 200
+
+    metodo, caminho, contagem = registro_consultas.requisicoes[-1]
+    assert (metodo, caminho, contagem.total) == ("GET", "/lenta", consultas_mw.CONSULTAS_N_MAIS_1)
+    assert list(contagem.repetidas(consultas_mw.CONSULTAS_N_MAIS_1).values()) == [consultas_mw.CONSULTAS_N_MAIS_1]
+    assert metricas.snapshot()["contadores"]["consultas.n_mais_1"] == antes + 1
@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.auth import gerar_token_teste
+from app.database import database
+from app.crud import particoes as particoes_crud
+from app.crud import post as post_crud
+from app import metricas
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _particao_do_post(post_id: int) -> str:
+    return await database.fetch_val(
+        text("SELECT tableoid::regclass::text FROM post WHERE id = :id").bindparams(id=post_id)
+    )
+
+
+@pytest.mark.asyncio
+async def test_manutencao_de_particoes(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "Particionado", "particionado@example.com")
+    futuro = await database.fetch_val(text(
+        "INSERT INTO post (post, usuario_id, data_criacao) "
+        "VALUES ('do futuro', :u, '2030-02-10 12:00:00+00') RETURNING id"
+    ).bindparams(u=autor))
+    try:
+        # sem partição para o mês: caiu na default
+        assert await _particao_do_post(futuro) == "post_default"
+
+        criadas = await particoes_crud.garantir_futuras(database, futuras=1, hoje=date(2030, 1, 15))
+        assert criadas == [date(2030, 1, 1), date(2030, 2, 1)]
+        # a linha foi movida para a partição nova antes do ATTACH
+        assert await _particao_do_post(futuro) == "post_p203002"
+        assert await particoes_crud.garantir_futuras(database, futuras=1, hoje=date(2030, 1, 15)) == []
+
+        # destaca só o que é mais antigo que a retenção
+        await particoes_crud.criar_particao(database, date(2001, 1, 1))
+        destacadas = await particoes_crud.destacar_antigas(database, reter_meses=1, hoje=date(2001, 3, 1))
+        assert destacadas == [date(2001, 1, 1)]
+        assert date(2001, 1, 1) not in await particoes_crud.listar(database)
+        assert await particoes_crud.destacar_antigas(database, reter_meses=0) == []
+    finally:
+        for nome in ("post_p203001", "post_p203002", "post_p200101"):
+            await database.execute(text(f"DROP TABLE IF EXISTS {nome}"))
+
+
+@pytest.mark.asyncio
+async def test_feed_com_janela_cai_para_consulta_completa(client: AsyncClient):
+    viewer = await _cria_usuario_api(client, "LeitorJanela", "leitor.janela@example.com")
+    autor = await _cria_usuario_api(client, "AutorAntigo", "autor.antigo@example.com")
+    r = await client.post("/seguir/", params={"seguidor_id": viewer, "seguido_id": autor})
+    assert r.status_code == 200, r.text
+
+    # post de um seguido fora da janela: vem antes de qualquer post recente de não seguido
+    antigo = datetime.now(timezone.utc) - timedelta(days=post_crud.FEED_JANELA_DIAS + 20)
+    velho_id = await database.fetch_val(text(
+        "INSERT INTO post (post, usuario_id, data_criacao) VALUES ('antigo', :u, :d) RETURNING id"
+    ).bindparams(u=autor, d=antigo))
+    outro = await _cria_usuario_api(client, "Recente", "recente.janela@example.com")
+    r = await client.post(
+        "/post/", json={"post": "recente"},
+        headers={"Authorization": f"Bearer {gerar_token_teste(outro)}"},
+    )
+    assert r.status_code in (200, 201), r.text
+
+    antes = metricas.snapshot()["contadores"].get("post.janela_fallback", 0)
+    r = await client.get("/post/feed", params={"limit": 1}, headers={"Authorization": f"Bearer {gerar_token_teste(viewer)}"})
+    assert [p["id"] for p in r.json()] == [velho_id]
+    assert metricas.snapshot()["contadores"].get("post.janela_fallback", 0) > antes
+
+    # timeline também enxerga posts fora da janela
+    r = await client.get(f"/usuario/{autor}/posts")
+    assert [p["id"] for p in r.json()] == [velho_id]
@@ -0,0 +1,81 @@
+import pstats
+
+import pytest
+from httpx import AsyncClient
+
+from app import admin
+from app.middleware import perfil as perfil_mw
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post("/usuario/", json={"nome": nome, "email": email, "senha": senha})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.fixture
+def segredo_admin(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_SEGREDO", "segredo_admin_teste")
+    monkeypatch.setattr(perfil_mw, "PERFIL_INTERVALO_MS", 1.0)
+    return {"X-Admin-Token": admin.gerar_token_admin(5)}
+
+
+@pytest.mark.asyncio
+async def test_perfil_sob_demanda_com_cpu_e_banco(client: AsyncClient, segredo_admin, tmp_path):
+    uid = await _cria_usuario_api(client, "Perfilada", "perfilada@example.com")
+
+    # sem header (ou com token inválido) nada é capturado
+    r = await client.get(f"/usuario/{uid}/stats")
+    assert "x-perfil-id" not in r.headers
+    r = await client.get(f"/usuario/{uid}/stats", headers={"X-Perfil": "invalido"})
+    assert "x-perfil-id" not in r.headers
+
+    # login: bcrypt roda numa thread; o loop fica esperando (select) e o amostrador vê isso
+    r = await client.post(
+        "/usuario/login",
+        data={"username": "perfilada@example.com", "password": "senha123"},
+        headers={"X-Perfil": segredo_admin["X-Admin-Token"]},
+    )
+    assert r.status_code == 200, r.text
+    perfil_id = int(r.headers["x-perfil-id"])
+
+    assert (await client.get("/admin/perfis")).status_code == 404
+    resumos = (await client.get("/admin/perfis", headers=segredo_admin)).json()
+    resumo = next(p for p in resumos if p["id"] == perfil_id)
+    assert resumo["caminho"] == "/usuario/login" and resumo["status"] == 200 and resumo["motivo"] == "header"
+    assert resumo["amostras"] > 0 and resumo["consultas"] >= 1
+
+    detalhe = (await client.get(f"/admin/perfis/{perfil_id}", headers=segredo_admin)).json()
+    assert any("FROM usuario" in c["sql"] for c in detalhe["linha_do_tempo"])
+
+    # speedscope: CPU amostrada + consultas como eventos
+    r = await client.get(f"/admin/perfis/{perfil_id}/download", headers=segredo_admin)
+    assert r.status_code == 200
+    doc = r.json()
+    cpu, banco = doc["profiles"]
+    assert cpu["type"] == "sampled" and len(cpu["samples"]) == len(cpu["weights"]) > 0
+    quadros = doc["shared"]["frames"]
+    assert all(0 <= i < len(quadros) for amostra in cpu["samples"] for i in amostra)
+    assert banco["type"] == "evented" and banco["events"][0]["type"] == "O"
+
+    # pstats: carregável pela biblioteca padrão; a verificação de senha não aparece na
+    # thread do loop (foi para asyncio.to_thread), a espera por ela sim
+    r = await client.get(f"/admin/perfis/{perfil_id}/download", params={"formato": "pstats"}, headers=segredo_admin)
+    arquivo = tmp_path / "perfil.pstats"
+    arquivo.write_bytes(r.content)
+    stats = pstats.Stats(str(arquivo))
+    funcoes = {nome: ct for (_, _, nome), (_, _, _, ct, _) in stats.stats.items()}
+    assert "verificar_senha" not in funcoes
+    assert funcoes.get("select", 0) > 0
+
+    assert (await client.get("/admin/perfis/999999", headers=segredo_admin)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_perfil_por_amostragem(client: AsyncClient, segredo_admin, monkeypatch):
+    monkeypatch.setattr(perfil_mw, "PERFIL_AMOSTRAGEM", 1.0)
+    r = await client.get("/post/trending")
+    perfil = perfil_mw.buscar(int(r.headers["x-perfil-id"]))
+    assert perfil.motivo == "amostragem" and perfil.caminho == "/post/trending"
+    # rotas de infra nunca são perfiladas
+    assert "x-perfil-id" not in (await client.get("/healthz")).headers
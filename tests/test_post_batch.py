@@ -0,0 +1,46 @@
+import pytest
+from httpx import AsyncClient
+
+from app.auth import gerar_token_teste
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(2, rota="POST /post/batch")
+async def test_criar_posts_em_lote(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "Agendador", "agendador@example.com")
+    headers = {"Authorization": f"Bearer {gerar_token_teste(autor)}"}
+
+    textos = [f"post agendado {i}" for i in range(5)]
+    r = await client.post("/post/batch", json=[{"post": t} for t in textos], headers=headers)
+    assert r.status_code == 200, r.text
+    criados = r.json()
+    assert [p["post"] for p in criados] == textos
+    assert all(p["usuario"] == {"id": autor, "nome": "Agendador"} for p in criados)
+    assert len({p["id"] for p in criados}) == 5
+
+    # timeline (mais novo primeiro) e contadores já refletem o lote
+    r = await client.get(f"/usuario/{autor}/posts")
+    assert [p["post"] for p in r.json()] == textos[::-1]
+    r = await client.get(f"/usuario/{autor}/stats")
+    assert r.json()["stats"]["posts"] == 5
+
+    # entram no feed ranked (score criado junto)
+    r = await client.get("/post/feed", params={"mode": "ranked"}, headers=headers)
+    assert {p["id"] for p in criados} <= {p["id"] for p in r.json()}
+
+    # validação por item, lote vazio e limite
+    r = await client.post("/post/batch", json=[{"post": "ok"}, {"post": "   "}], headers=headers)
+    assert r.status_code == 422
+    r = await client.post("/post/batch", json=[], headers=headers)
+    assert r.status_code == 200 and r.json() == []
+    r = await client.post("/post/batch", json=[{"post": "x"}] * 101, headers=headers)
+    assert r.status_code == 400
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app import main
+from app.database import database
+
+
+async def _esperar_status(status: str, timeout: float = 2.0):
+    limite = time.monotonic() + timeout
+    while main.prontidao["status"] != status:
+        assert time.monotonic() < limite, main.prontidao
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_readyz_acompanha_inicializacao_e_nao_desiste(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(main, "prontidao", {"status": "iniciando", "erro": None, "inicio": time.monotonic(), "pronto_em_s": None})
+    monkeypatch.setattr(main, "DB_CONNECT_TENTATIVAS", 2)
+    monkeypatch.setattr(main, "DB_CONNECT_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(main, "DB_CONNECT_BACKOFF_MAX", 0.005)
+    monkeypatch.setattr(main.workers, "iniciar", lambda db: None)
+
+    banco_no_ar = asyncio.Event()
+    tentativas = []
+    connect_real = database.connect
+
+    async def connect():
+        tentativas.append(time.monotonic())
+        if not banco_no_ar.is_set():
+            raise ConnectionRefusedError("banco fora do ar")
+        await connect_real()
+
+    monkeypatch.setattr(database, "connect", connect)
+
+    r = await client.get("/readyz")
+    assert r.status_code == 503 and r.json()["status"] == "iniciando"
+    assert r.headers["retry-after"] == "2"
+
+    tarefa = asyncio.create_task(main._inicializar_banco())
+    try:
+        # esgotou DB_CONNECT_TENTATIVAS: /readyz mostra o erro, /healthz segue ok
+        await _esperar_status("erro")
+        r = await client.get("/readyz")
+        assert r.status_code == 503 and r.json()["erro"] == "banco fora do ar"
+        assert (await client.get("/healthz")).status_code == 200
+
+        # ... mas as tentativas continuam: o banco volta e a instância fica pronta sozinha
+        n = len(tentativas)
+        await asyncio.sleep(0.05)
+        assert len(tentativas) > n
+        banco_no_ar.set()
+        await _esperar_status("pronto")
+        await tarefa
+    finally:
+        tarefa.cancel()
+        await asyncio.gather(tarefa, return_exceptions=True)
+
+    r = await client.get("/readyz")
+    assert r.status_code == 200
+    assert r.json()["status"] == "pronto" and "erro" not in r.json()
+
+
+@pytest.mark.asyncio
+async def test_rotas_de_banco_respondem_503_sem_conexao(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(database, "is_connected", False)
+    r = await client.get("/usuario/1/stats")
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "2"
+    assert r.json()["detail"] == "Banco de dados ainda não está disponível."
+    # rotas só de Postgres (fora do repositório) também
+    assert (await client.get("/post/trending")).status_code == 503
@@ -0,0 +1,160 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func, or_
+from app.auth import gerar_token_teste
+from app.database import database
+from app.crud import purga as purga_crud
+from app.models.usuario import usuario
+from app.models.post import post
+from app.models.seguir import seguir
+from app.models.like import like
+from app.cache.grafo import grafo
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _cria_post_api(client: AsyncClient, token: str, conteudo: str) -> int:
+    resp = await client.post(
+        "/post/",
+        json={"post": conteudo},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_exclusao_tombstone_e_purga_em_lotes(client: AsyncClient):
+    """
+    DELETE /usuario/me só marca o tombstone; a purga em lotes remove o resto.
+    """
+    # Arrange: A tem posts, likes e relações nos dois sentidos
+    a = await _cria_usuario_api(client, "AlicePurga", "alice.purga@example.com")
+    b = await _cria_usuario_api(client, "BobPurga", "bob.purga@example.com")
+    token_a = gerar_token_teste(a)
+    token_b = gerar_token_teste(b)
+
+    posts_a = [await _cria_post_api(client, token_a, f"post {i} da Alice") for i in range(3)]
+    post_b = await _cria_post_api(client, token_b, "post do Bob")
+
+    for pid in posts_a:
+        assert (await client.post(f"/like/{pid}", headers={"Authorization": f"Bearer {token_b}"})).status_code == 200
+    assert (await client.post(f"/like/{post_b}", headers={"Authorization": f"Bearer {token_a}"})).status_code == 200
+    await client.post("/seguir/", params={"seguidor_id": a, "seguido_id": b})
+    await client.post("/seguir/", params={"seguidor_id": b, "seguido_id": a})
+
+    # Act: exclusão
+    resp = await client.delete("/usuario/me", headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200
+    assert resp.json()["deleted"] is True
+
+    # Tombstone: some das leituras na hora, mas os dados ainda estão lá
+    assert (await client.get(f"/usuario/{a}")).status_code == 404
+    assert (await client.get(f"/usuario/{a}/posts")).json() == []
+    assert await database.fetch_val(
+        select(func.count()).select_from(post).where(post.c.usuario_id == a)
+    ) == 3
+
+    # Purga em lotes de 1 (força várias iterações por fase)
+    passos = 0
+    while await purga_crud.executar_passo(database, chunk=1):
+        passos += 1
+        assert passos < 100
+    assert passos > len(purga_crud.FASES)
+
+    # Assert: nada sobrou
+    assert await database.fetch_one(usuario.select().where(usuario.c.id == a)) is None
+    assert await database.fetch_val(
+        select(func.count()).select_from(post).where(post.c.usuario_id == a)
+    ) == 0
+    assert await database.fetch_val(
+        select(func.count()).select_from(seguir).where(
+            or_(seguir.c.seguidor_id == a, seguir.c.seguido_id == a)
+        )
+    ) == 0
+    assert await database.fetch_val(
+        select(func.count()).select_from(like).where(
+            or_(like.c.usuario_id == a, like.c.post_id.in_(posts_a))
+        )
+    ) == 0
+
+    status = await purga_crud.status_purga(database, a)
+    assert status["concluido_em"] is not None
+    assert status["removidos"] >= 3 + 3 + 1 + 2 + 1
+
+    # B continua intacto
+    assert (await client.get(f"/usuario/{b}")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_conta_excluida_nao_escreve_e_dependente_tardio_reinicia_purga(client: AsyncClient):
+    a = await _cria_usuario_api(client, "AnaTardia", "ana.tardia@example.com")
+    b = await _cria_usuario_api(client, "BetoTardio", "beto.tardio@example.com")
+    token_a = gerar_token_teste(a)
+    while await purga_crud.executar_passo(database):
+        pass  # purgas de outros testes não atrapalham a contagem de passos abaixo
+
+    assert (await client.delete("/usuario/me", headers={"Authorization": f"Bearer {token_a}"})).status_code == 200
+
+    # token ainda válido, mas a conta excluída não escreve mais nada que bloqueie a purga
+    assert (await client.post("/seguir/", params={"seguidor_id": a, "seguido_id": b})).status_code == 404
+    assert (await client.post("/seguir/", params={"seguidor_id": b, "seguido_id": a})).status_code == 404
+    r = await client.post("/seguir/lote", json={"seguir": [b]}, headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200 and r.json()["seguidos"] == []
+    r = await client.post("/post/", json={"post": "depois de excluir"}, headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 404
+
+    # um follow que escapou (ex.: corrida com o tombstone) antes da última fase
+    while (await purga_crud.status_purga(database, a))["fase"] != "usuario":
+        assert await purga_crud.executar_passo(database)
+    await database.execute(seguir.insert().values(seguidor_id=b, seguido_id=a))
+
+    # a fase final não falha por FK: a purga volta ao início e termina
+    assert await purga_crud.executar_passo(database)
+    assert (await purga_crud.status_purga(database, a))["fase"] == purga_crud.FASES[0]
+    while await purga_crud.executar_passo(database):
+        pass
+    assert (await purga_crud.status_purga(database, a))["concluido_em"] is not None
+    assert await database.fetch_one(usuario.select().where(usuario.c.id == a)) is None
+
+
+@pytest.mark.asyncio
+async def test_rollback_da_purga_nao_mexe_no_grafo(client: AsyncClient, monkeypatch):
+    a = await _cria_usuario_api(client, "AnaRollback", "ana.rollback@example.com")
+    b = await _cria_usuario_api(client, "BetoRollback", "beto.rollback@example.com")
+    assert (await client.post("/seguir/", params={"seguidor_id": b, "seguido_id": a})).status_code == 200
+    while await purga_crud.executar_passo(database):
+        pass
+    assert list(await grafo.seguindo(database, b)) == [a]  # carregado no cache
+
+    assert (await client.delete("/usuario/me", headers={"Authorization": f"Bearer {gerar_token_teste(a)}"})).status_code == 200
+    while (await purga_crud.status_purga(database, a))["fase"] != "seguir":
+        assert await purga_crud.executar_passo(database)
+
+    fase_seguir = purga_crud._EXECUTORES["seguir"]
+
+    async def falha_depois_de_apagar(*args):
+        await fase_seguir(*args)
+        raise RuntimeError("falha no meio da transação")
+
+    monkeypatch.setitem(purga_crud._EXECUTORES, "seguir", falha_depois_de_apagar)
+    with pytest.raises(RuntimeError):
+        await purga_crud.executar_passo(database)
+
+    # rollback: a aresta continua no banco e no cache
+    assert await database.fetch_val(
+        select(func.count()).select_from(seguir).where(seguir.c.seguido_id == a)
+    ) == 1
+    assert list(await grafo.seguindo(database, b)) == [a]
+
+    monkeypatch.setitem(purga_crud._EXECUTORES, "seguir", fase_seguir)
+    while await purga_crud.executar_passo(database):
+        pass
+    assert list(await grafo.seguindo(database, b)) == []
@@ -0,0 +1,133 @@
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from app.auth import gerar_token_teste
+from app.database import database
+from app.main import app
+from app.repositorio import RepositorioMemoria, RepositorioPostgres, get_repositorio
+from app.schemas.post import PostCreate
+from app.schemas.usuario import UsuarioCreate
+
+
+async def _cenario(repo, sufixo: str) -> dict:
+    """Roda o mesmo roteiro no repositório e devolve as saídas com ids trocados por nomes/textos."""
+    ids = {}
+    for nome in ("ana", "bia", "caio", "duda"):
+        criado = await repo.criar_usuario(UsuarioCreate(nome=nome, email=f"{nome}.{sufixo}@example.com", senha="senha123"))
+        ids[nome] = criado["id"]
+    nomes = {v: k for k, v in ids.items()}
+
+    posts = {}
+    for autor, texto in [("bia", "b1"), ("caio", "c1"), ("duda", "d1"), ("bia", "b2"), ("ana", "a1"), ("caio", "c2")]:
+        posts[texto] = (await repo.create_post(PostCreate(post=f"{texto}-{sufixo}"), ids[autor]))["id"]
+    for p in await repo.create_posts([PostCreate(post=f"{t}-{sufixo}") for t in ("d2", "d3")], ids["duda"]):
+        posts[p["post"].split("-")[0]] = p["id"]
+    textos = {v: k for k, v in posts.items()}
+
+    await repo.seguir_usuario(ids["ana"], ids["bia"])
+    await repo.seguir_usuario(ids["ana"], ids["caio"])
+    lote = await repo.aplicar_lote(ids["duda"], [ids["ana"], ids["duda"], ids["bia"]], [ids["caio"]])
+
+    await repo.dar_like(ids["bia"], posts["a1"])
+    await repo.dar_like(ids["caio"], posts["a1"])
+    await repo.dar_like(ids["caio"], posts["a1"])
+    await repo.remover_like(ids["caio"], posts["a1"])
+    await repo.dar_like(ids["ana"], posts["b1"])
+    await repo.delete_post(posts["c1"], ids["caio"])
+
+    erros = []
+    for chamada in (
+        lambda: repo.delete_post(posts["b1"], ids["ana"]),
+        lambda: repo.delete_post(posts["c1"], ids["caio"]),
+        lambda: repo.dar_like(ids["ana"], posts["c1"]),
+        lambda: repo.stats_usuario(-1),
+        lambda: repo.seguir_usuario(ids["ana"], ids["bia"]),
+        lambda: repo.seguir_usuario(ids["ana"], -1),
+        lambda: repo.seguir_usuario(ids["bia"], ids["bia"]),
+        lambda: repo.create_posts([PostCreate(post=f"x-{sufixo}")], -1),
+    ):
+        try:
+            await chamada()
+        except HTTPException as e:
+            erros.append(e.status_code)
+
+    def _feed(rows):
+        return [(textos[r["id"]], nomes[r["usuario"]["id"]]) for r in rows]
+
+    feed = {
+        (limit, offset): _feed(await repo.get_feed(ids["ana"], limit=limit, offset=offset))
+        for limit, offset in [(7, 0), (2, 0), (2, 2), (3, 4)]
+    }
+    timeline = {
+        offset: _feed(await repo.get_posts_por_usuario(ids["duda"], limit=2, offset=offset))
+        for offset in (0, 2, 4)
+    }
+    stats = {nome: (await repo.stats_usuario(uid))["stats"] for nome, uid in ids.items()}
+    likes = {
+        textos[pid]: {k: v for k, v in r.items() if k != "post_id"}
+        for pid, r in (await repo.batch_resumo_like(ids["caio"], [posts["a1"], posts["b1"], posts["b2"]])).items()
+    }
+    status = {
+        nomes[uid]: r for uid, r in (await repo.status_relacoes(ids["ana"], [ids["bia"], ids["duda"]])).items()
+    }
+    lidos = [u["nome"] for u in await repo.buscar_usuarios_por_ids([ids["caio"], 0, ids["ana"], ids["caio"]])]
+    marcas = await repo.marcas_usuario(ids["duda"])
+    return {
+        "lote": {k: [nomes[u] for u in v] for k, v in lote.items()},
+        "erros": erros,
+        "feed": feed,
+        "timeline": timeline,
+        "stats": stats,
+        "likes": likes,
+        "status": status,
+        "lidos": lidos,
+        "ultimo_post": textos[marcas["ultimo_post"]],
+        "inexistente": await repo.marcas_usuario(0),
+    }
+
+
+@pytest.mark.asyncio
+async def test_memoria_tem_a_mesma_semantica_do_postgres():
+    postgres = await _cenario(RepositorioPostgres(database), "pg")
+    memoria = await _cenario(RepositorioMemoria(), "mem")
+    assert memoria == postgres
+    # sanidade do próprio roteiro: seguidos primeiro, depois o resto, cada grupo do mais novo ao mais antigo
+    assert postgres["feed"][(7, 0)] == [
+        ("c2", "caio"), ("b2", "bia"), ("b1", "bia"),
+        ("d3", "duda"), ("d2", "duda"), ("a1", "ana"), ("d1", "duda"),
+    ]
+    assert postgres["erros"] == [403, 404, 404, 404, 409, 404, 400, 404]
+
+
+@pytest.mark.asyncio
+async def test_api_com_repositorio_em_memoria(client: AsyncClient):
+    repo = RepositorioMemoria()
+    app.dependency_overrides[get_repositorio] = lambda: repo
+    try:
+        r = await client.post("/usuario/", json={"nome": "Mem", "email": "mem@example.com", "senha": "senha123"})
+        assert r.status_code == 201, r.text
+        uid = r.json()["id"]
+        r = await client.post("/usuario/login", data={"username": "mem@example.com", "password": "senha123"})
+        assert r.status_code == 200, r.text
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        r = await client.post("/post/", json={"post": "oi"}, headers=headers)
+        assert r.status_code == 200, r.text
+        pid = r.json()["id"]
+        r = await client.post(f"/like/{pid}", headers=headers)
+        assert r.json() == {"liked": True, "post_id": pid}
+
+        r = await client.get(f"/usuario/{uid}/posts")
+        assert [p["id"] for p in r.json()] == [pid]
+        r304 = await client.get(f"/usuario/{uid}/posts", headers={"If-None-Match": r.headers["etag"]})
+        assert r304.status_code == 304
+        r = await client.get("/post/feed", headers=headers)
+        assert [p["post"] for p in r.json()] == ["oi"]
+        r = await client.get(f"/usuario/{uid}/stats")
+        assert r.json()["stats"] == {"posts": 1, "seguidores": 0, "seguindo": 0}
+
+        r = await client.delete(f"/post/{pid}", headers={"Authorization": f"Bearer {gerar_token_teste(uid + 1)}"})
+        assert r.status_code == 403
+    finally:
+        app.dependency_overrides.pop(get_repositorio, None)
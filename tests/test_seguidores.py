@@ -0,0 +1,60 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _paginas(client: AsyncClient, url: str, limit: int):
+    totais, ids, cursor = set(), [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = await client.get(url, params=params)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        totais.add(body["total"])
+        ids += [u["id"] for u in body["itens"]]
+        cursor = body["proximo_cursor"]
+        if cursor is None:
+            return totais, ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/*/seguidores")
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/*/seguindo")
+async def test_seguidores_e_seguindo_paginados(client: AsyncClient):
+    alvo = await _cria_usuario_api(client, "Alvo", "alvo.seg@example.com")
+    fas = [await _cria_usuario_api(client, f"Fa{i}", f"fa{i}.seg@example.com") for i in range(5)]
+    for f in fas:
+        r = await client.post("/seguir/", params={"seguidor_id": f, "seguido_id": alvo})
+        assert r.status_code == 200, r.text
+        r = await client.post("/seguir/", params={"seguidor_id": alvo, "seguido_id": f})
+        assert r.status_code == 200, r.text
+
+    # follow mais recente primeiro, sem repetir nem pular entre páginas, total constante
+    totais, ids = await _paginas(client, f"/usuario/{alvo}/seguidores", limit=2)
+    assert totais == {5}
+    assert ids == fas[::-1]
+
+    totais, ids = await _paginas(client, f"/usuario/{alvo}/seguindo", limit=3)
+    assert totais == {5}
+    assert ids == fas[::-1]
+
+    r = await client.get(f"/usuario/{alvo}/seguidores")
+    item = r.json()["itens"][0]
+    assert set(item) == {"id", "nome", "email", "desde"}
+
+    # página única, sem relações e usuário inexistente
+    r = await client.get(f"/usuario/{fas[0]}/seguidores")
+    assert r.json() == {"total": 1, "itens": [r.json()["itens"][0]], "proximo_cursor": None}
+    sozinho = await _cria_usuario_api(client, "Sozinho", "sozinho.seg@example.com")
+    r = await client.get(f"/usuario/{sozinho}/seguindo")
+    assert r.json() == {"total": 0, "itens": [], "proximo_cursor": None}
+    assert (await client.get("/usuario/999999/seguidores")).status_code == 404
+    assert (await client.get(f"/usuario/{alvo}/seguidores", params={"cursor": "x"})).status_code == 400
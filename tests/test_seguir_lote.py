@@ -0,0 +1,79 @@
+import pytest
+from httpx import AsyncClient
+
+from app.auth import gerar_token_teste
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(4, rota="POST /seguir/lote")
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/*/seguindo")
+async def test_seguir_em_lote_idempotente(client: AsyncClient):
+    eu = await _cria_usuario_api(client, "Importador", "importador@example.com")
+    outros = [await _cria_usuario_api(client, f"Contato{i}", f"contato{i}@example.com") for i in range(4)]
+    headers = {"Authorization": f"Bearer {gerar_token_teste(eu)}"}
+
+    # já seguia outros[0]
+    r = await client.post("/seguir/", params={"seguidor_id": eu, "seguido_id": outros[0]})
+    assert r.status_code == 200, r.text
+
+    lote = {"seguir": outros + [outros[1], eu, 999999]}
+    r = await client.post("/seguir/lote", json=lote, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"seguidos": sorted(outros[1:]), "deixados": []}
+
+    # repetir não muda nada
+    r = await client.post("/seguir/lote", json=lote, headers=headers)
+    assert r.json() == {"seguidos": [], "deixados": []}
+
+    r = await client.get(f"/usuario/{eu}/stats")
+    assert r.json()["stats"]["seguindo"] == 4
+
+    r = await client.post(
+        "/seguir/lote",
+        json={"deixar_de_seguir": [outros[2], outros[3], 999999]},
+        headers=headers,
+    )
+    assert r.json() == {"seguidos": [], "deixados": sorted(outros[2:])}
+    r = await client.get(f"/usuario/{eu}/seguindo")
+    assert {u["id"] for u in r.json()["itens"]} == {outros[0], outros[1]}
+    r = await client.get(f"/usuario/{outros[3]}/stats")
+    assert r.json()["stats"]["seguidores"] == 0
+
+    # conflito no mesmo lote e sem autenticação
+    r = await client.post("/seguir/lote", json={"seguir": [outros[0]], "deixar_de_seguir": [outros[0]]}, headers=headers)
+    assert r.status_code == 422
+    assert (await client.post("/seguir/lote", json=lote)).status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /seguir/status")
+async def test_status_relacoes(client: AsyncClient):
+    eu = await _cria_usuario_api(client, "Status", "status.eu@example.com")
+    a, b, c = [await _cria_usuario_api(client, f"Status{i}", f"status{i}@example.com") for i in range(3)]
+    headers = {"Authorization": f"Bearer {gerar_token_teste(eu)}"}
+
+    for seguidor, seguido in ((eu, a), (a, eu), (b, eu), (eu, c), (b, c)):
+        r = await client.post("/seguir/", params={"seguidor_id": seguidor, "seguido_id": seguido})
+        assert r.status_code == 200, r.text
+
+    r = await client.get("/seguir/status", params=[("ids", a), ("ids", b), ("ids", c), ("ids", 999999)], headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {
+        str(a): {"eu_sigo": True, "me_segue": True},
+        str(b): {"eu_sigo": False, "me_segue": True},
+        str(c): {"eu_sigo": True, "me_segue": False},
+        "999999": {"eu_sigo": False, "me_segue": False},
+    }
+
+    r = await client.get("/seguir/status", params=[("ids", i) for i in range(301)], headers=headers)
+    assert r.status_code == 400
+    assert (await client.get("/seguir/status", params={"ids": a})).status_code == 401
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.cache.singleflight import coalescer, invalidar
+
+
+def _contador():
+    chamadas = {"n": 0}
+
+    async def lenta(db, usuario_id: int, limit: int = 10):
+        chamadas["n"] += 1
+        await asyncio.sleep(0.02)
+        if usuario_id < 0:
+            raise ValueError("id inválido")
+        return {"id": usuario_id, "limit": limit, "execucao": chamadas["n"]}
+
+    return chamadas, lenta
+
+
+@pytest.mark.asyncio
+async def test_chamadas_concorrentes_compartilham_execucao():
+    chamadas, lenta = _contador()
+    lenta.__name__ = "lenta_sf_1"
+    fn = coalescer(ttl_ms=0)(lenta)
+
+    resultados = await asyncio.gather(*(fn(None, 7, limit=10) for _ in range(20)))
+    assert chamadas["n"] == 1
+    assert all(r == resultados[0] for r in resultados)
+
+    # argumentos diferentes não se misturam
+    await asyncio.gather(fn(None, 7, limit=10), fn(None, 8, limit=10))
+    assert chamadas["n"] == 3
+
+    # sem TTL, chamada posterior executa de novo
+    await fn(None, 7, limit=10)
+    assert chamadas["n"] == 4
+
+
+@pytest.mark.asyncio
+async def test_excecao_propagada_e_nao_cacheada():
+    chamadas, lenta = _contador()
+    lenta.__name__ = "lenta_sf_2"
+    fn = coalescer(ttl_ms=1000)(lenta)
+
+    resultados = await asyncio.gather(*(fn(None, -1) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in resultados)
+    assert chamadas["n"] == 1
+    with pytest.raises(ValueError):
+        await fn(None, -1)
+    assert chamadas["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_micro_ttl_e_invalidacao():
+    chamadas, lenta = _contador()
+    lenta.__name__ = "lenta_sf_3"
+    fn = coalescer(ttl_ms=1000)(lenta)
+
+    await fn(None, 1)
+    await fn(None, 1)
+    assert chamadas["n"] == 1
+
+    invalidar("lenta_sf_3", 1)
+    await fn(None, 1)
+    assert chamadas["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelar_quem_iniciou_nao_afeta_os_demais():
+    chamadas, lenta = _contador()
+    lenta.__name__ = "lenta_sf_4"
+    fn = coalescer(ttl_ms=0)(lenta)
+
+    primeira = asyncio.create_task(fn(None, 3))
+    await asyncio.sleep(0)
+    segunda = asyncio.create_task(fn(None, 3))
+    await asyncio.sleep(0)
+    primeira.cancel()
+    assert (await segunda)["id"] == 3
+    assert chamadas["n"] == 1
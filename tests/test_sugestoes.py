@@ -0,0 +1,101 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from app.auth import gerar_token_teste
+from app.database import database
+from app.crud import sugestao as sugestao_crud
+from app.models.sugestao import sugestao_pendente, sugestao_expansao
+from app.workers import sugestoes as sugestoes_worker
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _seguir_api(client: AsyncClient, seguidor_id: int, seguido_id: int) -> None:
+    resp = await client.post(
+        "/seguir/",
+        params={"seguidor_id": seguidor_id, "seguido_id": seguido_id},
+    )
+    assert resp.status_code == 200, resp.text
+
+
+async def _processa_tudo():
+    while await sugestoes_worker.passo(database):
+        pass
+
+
+async def _pendentes(ids) -> set:
+    rows = await database.fetch_all(
+        select(sugestao_pendente.c.usuario_id).where(sugestao_pendente.c.usuario_id.in_(ids))
+    )
+    return {r["usuario_id"] for r in rows}
+
+
+@pytest.mark.asyncio
+async def test_sugestoes_amigos_de_amigos(client: AsyncClient):
+    """
+    A segue B e C; B e C seguem D; só B segue E.
+    Sugestões de A: D (2 em comum) antes de E (1); nunca B, C ou o próprio A.
+    """
+    a = await _cria_usuario_api(client, "AliceSug", "alice.sug@example.com")
+    b = await _cria_usuario_api(client, "BobSug", "bob.sug@example.com")
+    c = await _cria_usuario_api(client, "CarolSug", "carol.sug@example.com")
+    d = await _cria_usuario_api(client, "DaveSug", "dave.sug@example.com")
+    e = await _cria_usuario_api(client, "EveSug", "eve.sug@example.com")
+    token_a = gerar_token_teste(a)
+
+    for seguidor, seguido in [(a, b), (a, c), (b, d), (c, d), (b, e), (b, a)]:
+        await _seguir_api(client, seguidor, seguido)
+    await _processa_tudo()
+
+    resp = await client.get("/usuario/me/sugestoes", headers={"Authorization": f"Bearer {token_a}"})
+    assert resp.status_code == 200, resp.text
+    sugestoes = resp.json()
+    assert [s["id"] for s in sugestoes] == [d, e]
+    assert sugestoes[0]["em_comum"] == 2
+
+    # Incremental: A passa a seguir D -> só A (e quem segue A) é recalculado
+    await _seguir_api(client, a, d)
+    await _processa_tudo()
+    resp = await client.get("/usuario/me/sugestoes", headers={"Authorization": f"Bearer {token_a}"})
+    assert [s["id"] for s in resp.json()] == [e]
+
+
+@pytest.mark.asyncio
+async def test_seguidores_marcados_pelo_worker_em_lotes(client: AsyncClient):
+    """
+    O follow marca só quem seguiu; os seguidores dele são marcados pelo worker, em lotes.
+    """
+    x = await _cria_usuario_api(client, "XisSug", "xis.sug@example.com")
+    y = await _cria_usuario_api(client, "YpsSug", "yps.sug@example.com")
+    fas = [await _cria_usuario_api(client, f"FaSug{i}", f"fa{i}.sug@example.com") for i in range(5)]
+    for f in fas:
+        await _seguir_api(client, f, x)
+    await _processa_tudo()
+
+    await _seguir_api(client, x, y)
+    assert await _pendentes([x, *fas]) == {x}
+
+    while await database.fetch_val(select(sugestao_expansao.c.usuario_id).where(sugestao_expansao.c.usuario_id != x)):
+        await sugestao_crud.expandir_pendentes(database, lote=2)  # expansões de outros testes
+    assert await sugestao_crud.expandir_pendentes(database, lote=2)
+    assert await _pendentes(fas) == set(fas[:2])
+
+    # mudou de novo no meio da passada: termina e recomeça do primeiro seguidor
+    await database.execute(sugestao_pendente.delete().where(sugestao_pendente.c.usuario_id.in_(fas)))
+    await client.delete("/seguir/", params={"seguidor_id": x, "seguido_id": y})
+    for _ in range(2):
+        assert await sugestao_crud.expandir_pendentes(database, lote=2)
+    assert await _pendentes(fas) == set(fas[2:])
+    await _processa_tudo()
+    assert await database.fetch_val(select(sugestao_expansao.c.usuario_id).where(sugestao_expansao.c.usuario_id == x)) is None
+
+    # X não segue mais Y: os seguidores recalculados não recebem Y
+    resp = await client.get("/usuario/me/sugestoes", headers={"Authorization": f"Bearer {gerar_token_teste(fas[0])}"})
+    assert y not in [s["id"] for s in resp.json()]
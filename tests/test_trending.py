@@ -0,0 +1,58 @@
+import pytest
+from httpx import AsyncClient
+from app.auth import gerar_token_teste
+from app.database import database
+from app.cache.trending import trending
+from app.crud import fila as fila_crud
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _cria_post_api(client: AsyncClient, token: str, conteudo: str) -> int:
+    resp = await client.post(
+        "/post/",
+        json={"post": conteudo},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_trending_por_likes_na_janela(client: AsyncClient):
+    autor = await _cria_usuario_api(client, "AutorTrend", "autor.trend@example.com")
+    token_autor = gerar_token_teste(autor)
+    fas = [gerar_token_teste(await _cria_usuario_api(client, f"FaT{i}", f"fa{i}.trend@example.com")) for i in range(3)]
+
+    morno = await _cria_post_api(client, token_autor, "post morno")
+    quente = await _cria_post_api(client, token_autor, "post quente")
+
+    for token in fas:
+        await client.post(f"/like/{quente}", headers={"Authorization": f"Bearer {token}"})
+    await client.post(f"/like/{morno}", headers={"Authorization": f"Bearer {fas[0]}"})
+    # like repetido não conta duas vezes
+    await client.post(f"/like/{morno}", headers={"Authorization": f"Bearer {fas[0]}"})
+
+    await fila_crud.drenar(database)
+    await trending.atualizar(database)
+    resp = await client.get("/post/trending")
+    assert resp.status_code == 200, resp.text
+    itens = {p["id"]: p for p in resp.json()}
+    assert itens[quente]["likes"] == 3
+    assert itens[morno]["likes"] == 1
+    ids = [p["id"] for p in resp.json()]
+    assert ids.index(quente) < ids.index(morno)
+
+    # unlike desconta do bucket; o snapshot só muda no próximo refresh
+    await client.delete(f"/like/{morno}", headers={"Authorization": f"Bearer {fas[0]}"})
+    assert morno in [p["id"] for p in (await client.get("/post/trending")).json()]
+    await fila_crud.drenar(database)
+    await trending.atualizar(database)
+    assert morno not in [p["id"] for p in (await client.get("/post/trending")).json()]
@@ -0,0 +1,36 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/batch")
+async def test_batch_usuarios(client: AsyncClient):
+    a = await _cria_usuario_api(client, "AliceLote", "alice.lote@example.com")
+    b = await _cria_usuario_api(client, "BobLote", "bob.lote@example.com")
+
+    # ordem pedida, repetidos e inexistentes descartados
+    r = await client.get(
+        "/usuario/batch",
+        params=[("ids", str(b)), ("ids", "999999"), ("ids", str(a)), ("ids", str(b))],
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [u["id"] for u in body] == [b, a]
+    assert body[1] == {"id": a, "nome": "AliceLote", "email": "alice.lote@example.com"}
+    assert all("senha" not in u for u in body)
+
+    # limite de ids
+    r = await client.get("/usuario/batch", params=[("ids", str(i)) for i in range(1, 302)])
+    assert r.status_code == 400
+
+    # rota dinâmica continua funcionando
+    assert (await client.get(f"/usuario/{a}")).status_code == 200
@@ -0,0 +1,54 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def _cria_usuario_api(client: AsyncClient, nome: str, email: str, senha: str = "senha123") -> int:
+    resp = await client.post(
+        "/usuario/",
+        json={"nome": nome, "email": email, "senha": senha},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+async def _todas_as_paginas(client: AsyncClient, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        r = await client.get("/usuario/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        ids += [u["id"] for u in body["itens"]]
+        cursor = body["proximo_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_consultas(1, rota="GET /usuario/")
+async def test_listar_usuarios_keyset_e_busca(client: AsyncClient):
+    # nomes repetidos para exercitar o desempate por id
+    nomes = ["Zeca Diretorio", "ana Diretorio", "Ana Diretorio", "Bruno Diretorio", "ana Diretorio"]
+    ids = [
+        await _cria_usuario_api(client, nome, f"diretorio{i}@example.com")
+        for i, nome in enumerate(nomes)
+    ]
+    outro = await _cria_usuario_api(client, "Carla 100%_x", "diretorio.outro@example.com")
+
+    # busca por prefixo sem diferenciar maiúsculas; páginas de 2 em 2 sem repetir nem pular
+    por_id = await _todas_as_paginas(client, q="ana dir", sort="id", limit=2)
+    assert por_id == [ids[1], ids[2], ids[4]]
+    assert await _todas_as_paginas(client, q="ANA DIR", sort="-id", limit=2) == por_id[::-1]
+
+    # paginar de 1 em 1 dá a mesma ordem que uma página só
+    for sort in ("nome", "-nome"):
+        uma_pagina = await _todas_as_paginas(client, q="a", sort=sort, limit=100)
+        assert set(uma_pagina) >= {ids[1], ids[2], ids[4]}
+        assert await _todas_as_paginas(client, q="a", sort=sort, limit=1) == uma_pagina
+
+    # curingas do LIKE são tratados como texto
+    assert await _todas_as_paginas(client, q="carla 100%_") == [outro]
+    assert await _todas_as_paginas(client, q="carla 1%") == []
+
+    # cursor adulterado
+    r = await client.get("/usuario/", params={"cursor": "nao-e-um-cursor"})
+    assert r.status_code == 400